@@ -1,6 +1,10 @@
 from .auth_utils import (
     verify_password,
     get_password_hash,
+    verify_and_update_password,
+    verify_password_async,
+    get_password_hash_async,
+    verify_and_update_password_async,
     create_access_token,
     create_refresh_token,
     verify_token,
@@ -10,6 +14,10 @@ from .auth_utils import (
 __all__ = [
     "verify_password",
     "get_password_hash", 
+    "verify_and_update_password",
+    "verify_password_async",
+    "get_password_hash_async",
+    "verify_and_update_password_async",
     "create_access_token",
     "create_refresh_token",
     "verify_token",
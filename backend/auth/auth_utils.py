@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -19,7 +21,21 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made at any other cost fall outside min_rounds/max_rounds, so passlib
+# flags them as needing an update and they are rehashed on the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Bounded pool for bcrypt work so hashing never runs on the event loop.
+# bcrypt releases the GIL, so threads give real parallelism here.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -29,6 +45,25 @@ def get_password_hash(password: str) -> str:
     """Hash a password."""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if the stored one is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the password hashing pool, returning a new hash if it needs rehashing."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
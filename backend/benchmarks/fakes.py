@@ -0,0 +1,209 @@
+"""
+Offline stand-ins for OpenAI, Pinecone and SerpAPI used by the benchmarks.
+
+Each fake sleeps for a latency drawn from a LatencyModel (log-normal, given a
+median and p95) and returns canned but structurally valid output, so the
+request path runs end to end without network access.
+"""
+import asyncio
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.vectorstores import InMemoryVectorStore
+from langchain_core.documents import Document
+
+
+class LatencyModel:
+    """Log-normal latency with a given median and p95, in milliseconds"""
+
+    def __init__(self, median_ms: float, p95_ms: Optional[float] = None, seed: Optional[int] = None):
+        self.median_ms = max(0.0, median_ms)
+        p95_ms = p95_ms if p95_ms is not None else median_ms
+        # p95 of a log-normal is median * exp(1.645 * sigma)
+        self.sigma = math.log(p95_ms / median_ms) / 1.645 if median_ms > 0 and p95_ms > median_ms else 0.0
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Parse "median" or "median:p95" (milliseconds)"""
+        median, _, p95 = spec.partition(":")
+        return cls(float(median), float(p95) if p95 else None)
+
+    def sample_ms(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(self._random.gauss(0.0, self.sigma)) if self.sigma else self.median_ms
+
+    def sleep(self) -> None:
+        delay = self.sample_ms()
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def __repr__(self) -> str:
+        p95 = self.median_ms * math.exp(1.645 * self.sigma)
+        return f"{self.median_ms:.0f}ms/p95 {p95:.0f}ms"
+
+
+FEEDBACK_ANALYSIS_RESPONSE = json.dumps({
+    "quality_score": 7,
+    "tone_analysis": {"overall_tone": "constructive", "constructiveness_score": 7, "balance_score": 6},
+    "specificity_suggestions": ["Add a concrete example", "Quantify the impact", "Reference the project timeline"],
+    "missing_areas": ["Communication", "Collaboration", "Technical depth"],
+    "actionability_suggestions": ["Set a goal for next quarter", "Schedule a check-in", "Suggest a training"],
+    "overall_recommendations": "Add specific examples and clear next steps."
+})
+
+ONBOARDING_RESPONSES = [
+    "Great question! SAP's onboarding covers our mission, policies and perks. Any questions about what we've covered so far?",
+    "You're doing fantastic! Let's keep going with the next step of your onboarding. Ready to continue?",
+    "Happy to help with that. Our policies are designed to keep everyone safe and productive. Anything else you'd like to know?",
+]
+
+
+def canned_response(prompt: str, rng: random.Random) -> str:
+    """Pick a plausible response for the prompt"""
+    if "exact JSON format" in prompt or "Output ONLY the JSON" in prompt:
+        return FEEDBACK_ANALYSIS_RESPONSE
+    if "Context:" in prompt and "Question:" in prompt:
+        return "Based on the knowledge base, new employees get 25 days of annual leave. Contact HR for details."
+    return rng.choice(ONBOARDING_RESPONSES)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that sleeps for a sampled latency and returns canned content with usage metadata"""
+
+    latency: Any = None
+    model_name: str = "fake-gpt-4o"
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency is not None:
+            self.latency.sleep()
+        prompt = "\n".join(str(message.content) for message in messages)
+        content = canned_response(prompt, random.Random(hash(prompt) ^ self.seed))
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            },
+            response_metadata={"model_name": self.model_name}
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hash-based embeddings with simulated latency"""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, size: int = 64):
+        self.latency = latency
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        rng = random.Random(hash(text))
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.size)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency is not None:
+            self.latency.sleep()
+        return self._embed(text)
+
+
+class FakeVectorStore(InMemoryVectorStore):
+    """In-memory vector store with simulated query latency (stands in for Pinecone)"""
+
+    def __init__(self, embedding: Embeddings, latency: Optional[LatencyModel] = None):
+        super().__init__(embedding=embedding)
+        self.latency = latency
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any):
+        if self.latency is not None:
+            self.latency.sleep()
+        return super().similarity_search_with_score(query, k=k, **kwargs)
+
+
+KNOWLEDGE_BASE = [
+    "New employees receive 25 days of annual leave plus public holidays.",
+    "The SAP code of conduct applies to all employees and contractors.",
+    "Remote work is supported up to three days per week with manager approval.",
+    "Health insurance enrollment must be completed within 30 days of joining.",
+    "IT will provision your laptop and SAP access during your first week.",
+    "The employee stock purchase plan opens twice a year.",
+    "Learning budgets can be used for certifications and online courses.",
+    "Expense reports are submitted through SAP Concur within 30 days.",
+]
+
+
+def build_fake_vectorstore(embeddings: Embeddings, latency: Optional[LatencyModel] = None) -> FakeVectorStore:
+    store = FakeVectorStore(embeddings, latency)
+    store.add_documents([Document(page_content=text, metadata={"source": f"faq_{i}.md"}) for i, text in enumerate(KNOWLEDGE_BASE)])
+    return store
+
+
+def make_fake_google_search(latency: Optional[LatencyModel] = None):
+    """Build a GoogleSearch replacement bound to a latency model"""
+
+    class FakeGoogleSearch:
+        def __init__(self, params: Dict[str, Any]):
+            self.params = params
+
+        def get_dict(self) -> Dict[str, Any]:
+            if latency is not None:
+                latency.sleep()
+            skill = self.params.get("q", "course").split(" online course")[0]
+            return {
+                "organic_results": [
+                    {"title": f"{skill} course {i}", "link": f"https://example.com/{i}"} for i in range(1, 6)
+                ]
+            }
+
+    return FakeGoogleSearch
+
+
+SKILL_RECOMMENDATIONS_RESPONSE = json.dumps({
+    "recommendations": [
+        {"skill": "SAP BTP", "reason": "Core platform for SAP extensions", "difficulty": "Intermediate", "estimatedTime": "2-3 months"},
+        {"skill": "Data Analysis", "reason": "Supports data-driven decisions", "difficulty": "Beginner", "estimatedTime": "1-2 months"},
+        {"skill": "Cloud Architecture", "reason": "Needed for scalable solutions", "difficulty": "Advanced", "estimatedTime": "6 months"}
+    ]
+})
+
+
+def make_fake_async_openai(latency: Optional[LatencyModel] = None):
+    """Build an AsyncOpenAI replacement whose chat completions return skill recommendations"""
+
+    async def create(model: str = "gpt-4o", messages: Optional[List[Dict[str, Any]]] = None, **kwargs):
+        if latency is not None:
+            await asyncio.sleep(latency.sample_ms() / 1000)
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages or []) // 4
+        completion_tokens = len(SKILL_RECOMMENDATIONS_RESPONSE) // 4
+        return SimpleNamespace(
+            model=model,
+            usage={"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens},
+            choices=[SimpleNamespace(message=SimpleNamespace(content=SKILL_RECOMMENDATIONS_RESPONSE))]
+        )
+
+    class FakeAsyncOpenAI:
+        def __init__(self, *args: Any, **kwargs: Any):
+            self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+    return FakeAsyncOpenAI
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Offline load test
+Boots the FastAPI app in-process against SQLite (or a local Postgres) with fake
+OpenAI, embeddings, vector store and SerpAPI backends, drives a weighted mix of
+routes from concurrent virtual users and reports throughput and p50/p95/p99
+latency per route.
+
+Usage: python benchmarks/load_test.py [--concurrency 16] [--duration 30]
+           [--mix chat=5,leaderboard=2,rag=2,feedback=1]
+           [--llm-latency 800:2500] [--embedding-latency 30:80]
+           [--vector-latency 40:120] [--serpapi-latency 300:900]
+           [--database-url postgresql://...] [--json results.json]
+
+Latencies are "median" or "median:p95" in milliseconds. SQLite serializes
+writes, so use a local Postgres for numbers comparable to production.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_MIX = "chat=5,leaderboard=2,rag=2,feedback=1"
+
+CHAT_MESSAGES = [
+    "hi",
+    "What is SAP's mission?",
+    "I've watched the video",
+    "no questions",
+    "I've reviewed the company policies",
+    "How many vacation days do I get?",
+    "I've reviewed the employee perks",
+    "yes",
+    "Can you tell me more about the culture quiz?",
+]
+RAG_QUESTIONS = [
+    "How many days of annual leave do I get?",
+    "When do I need to enroll in health insurance?",
+    "Can I work remotely?",
+    "How do I submit expenses?",
+]
+FEEDBACK_TEXTS = [
+    "Great work on the migration project this quarter.",
+    "Alex needs to improve communication with stakeholders and deliver on time. " * 4,
+    "Consistently strong technical contributions, but should mentor junior team members more.",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load test for the AutomateAI backend")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before the run")
+    parser.add_argument("--users", type=int, default=50, help="seeded onboarding users")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route weights, e.g. chat=5,rag=1")
+    parser.add_argument("--llm-latency", default="800:2500")
+    parser.add_argument("--embedding-latency", default="30:80")
+    parser.add_argument("--vector-latency", default="40:120")
+    parser.add_argument("--serpapi-latency", default="300:900")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", default=None, help="write results to this file")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> str:
+    """Point settings at the benchmark database and disable background work; must run before app imports"""
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='automateai-bench-'), 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["PERFORMANCE_DATABASE_URL"] = database_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ["ONBOARDING_CHECKPOINTER"] = "memory"
+    os.environ["ONBOARDING_CHECKPOINT_MAINTENANCE_MINUTES"] = "0"
+    os.environ["LLM_USAGE_FLUSH_SECONDS"] = "0"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    return database_url
+
+
+def boot_app(args: argparse.Namespace):
+    """Import the app, create tables, install fakes and seed users. Returns (app, users)"""
+    import main
+    import database
+    import db
+    import routers.skills
+    from services import rag_service as rag_module
+    from auth.auth_utils import create_access_token
+    from llm_usage import usage_callback
+    from models.user import User
+    from benchmarks.fakes import (
+        LatencyModel, FakeChatModel, FakeEmbeddings, build_fake_vectorstore,
+        make_fake_google_search, make_fake_async_openai
+    )
+
+    # database.py echoes every statement; that would dominate the profile
+    database.engine.echo = False
+
+    # The startup hook runs Postgres-only migrations, so create the schema directly
+    database.Base.metadata.create_all(bind=database.engine)
+    db.Base.metadata.create_all(bind=db.engine)
+    db.PerformanceBase.metadata.create_all(bind=db.performance_engine)
+
+    llm = FakeChatModel(latency=LatencyModel.parse(args.llm_latency), seed=args.seed, callbacks=[usage_callback])
+    main.hr_agent.llm = llm
+    main.conversation_summarizer.llm = llm
+
+    rag = rag_module.RAGService.__new__(rag_module.RAGService)
+    rag.pc = rag.index = None
+    rag.llm = llm
+    rag.embeddings = FakeEmbeddings(LatencyModel.parse(args.embedding_latency))
+    rag.vectorstore = build_fake_vectorstore(rag.embeddings, LatencyModel.parse(args.vector_latency))
+    rag.initialized = True
+    rag_module.rag_service = rag
+
+    routers.skills.GoogleSearch = make_fake_google_search(LatencyModel.parse(args.serpapi_latency))
+    routers.skills.AsyncOpenAI = make_fake_async_openai(LatencyModel.parse(args.llm_latency))
+
+    session = database.SessionLocal()
+    try:
+        users = []
+        for i in range(args.users):
+            username = f"bench_user_{i}"
+            user = session.query(User).filter(User.username == username).first()
+            if user is None:
+                user = User(username=username, email=f"{username}@bench.local", hashed_password="!", is_active=True)
+                session.add(user)
+                session.flush()
+            users.append({"id": user.id, "token": create_access_token({"sub": username})})
+        session.commit()
+    finally:
+        session.close()
+
+    return main.app, users
+
+
+# Each scenario returns (method, url, json body, headers)
+Scenario = Callable[[random.Random, Dict[str, Any], int], Tuple[str, str, Any, Dict[str, str]]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "chat": lambda rng, user, turn: (
+        "POST", f"/api/user/{user['id']}/chat", {"message": CHAT_MESSAGES[turn % len(CHAT_MESSAGES)]}, {}
+    ),
+    "state": lambda rng, user, turn: ("GET", f"/api/user/{user['id']}/state", None, {}),
+    "leaderboard": lambda rng, user, turn: (
+        "GET", "/api/leaderboard", None, {"Authorization": f"Bearer {user['token']}"}
+    ),
+    "rag": lambda rng, user, turn: (
+        "POST", "/api/chat", {"message": rng.choice(RAG_QUESTIONS), "user_id": str(user["id"])}, {}
+    ),
+    "feedback": lambda rng, user, turn: (
+        "POST", "/api/feedback/analyze", {"feedback_text": rng.choice(FEEDBACK_TEXTS)}, {}
+    ),
+    "skills": lambda rng, user, turn: (
+        "POST", "/api/skills/recommendations", {"current_skills": "python, sql", "user_profile": "developer"}, {}
+    ),
+}
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Available: {', '.join(SCENARIOS)}")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_load(app, users: List[Dict[str, Any]], mix: List[Tuple[str, float]], args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    measuring = {"on": False}
+
+    async def virtual_user(worker: int, client, deadline: float):
+        rng = random.Random(args.seed + worker)
+        user = users[worker % len(users)]
+        turn = 0
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, url, body, headers = SCENARIOS[name](rng, user, turn)
+            turn += 1
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body, headers=headers)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - start
+            if measuring["on"]:
+                samples[name].append(elapsed)
+                errors[name] += failed
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        total = args.warmup + args.duration
+        deadline = time.perf_counter() + total
+        workers = [asyncio.create_task(virtual_user(i, client, deadline)) for i in range(args.concurrency)]
+        await asyncio.sleep(args.warmup)
+        measuring["on"] = True
+        started = time.perf_counter()
+        await asyncio.gather(*workers)
+        elapsed = time.perf_counter() - started
+
+    routes = {}
+    for name in names:
+        values = sorted(samples[name])
+        routes[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "mean_ms": (sum(values) / len(values) * 1000) if values else 0.0,
+        }
+    total_requests = sum(route["requests"] for route in routes.values())
+    return {
+        "elapsed_s": elapsed,
+        "total_requests": total_requests,
+        "throughput_rps": total_requests / elapsed if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+def print_report(results: Dict[str, Any], args: argparse.Namespace, database_url: str):
+    print(f"database: {database_url.split('@')[-1]}, concurrency: {args.concurrency}, duration: {args.duration:.0f}s")
+    print(f"latency: llm {args.llm_latency}, embeddings {args.embedding_latency}, vector {args.vector_latency}, serpapi {args.serpapi_latency} (ms)")
+    print(f"{'route':<12} {'reqs':>7} {'errs':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, route in results["routes"].items():
+        print(
+            f"{name:<12} {route['requests']:>7} {route['errors']:>5} {route['throughput_rps']:>8.1f} "
+            f"{route['p50_ms']:>9.1f} {route['p95_ms']:>9.1f} {route['p99_ms']:>9.1f}"
+        )
+    print(f"{'total':<12} {results['total_requests']:>7} {'':>5} {results['throughput_rps']:>8.1f}")
+
+
+def main():
+    args = parse_args()
+    database_url = configure_environment(args)
+    mix = parse_mix(args.mix)
+    app, users = boot_app(args)
+
+    results = asyncio.run(run_load(app, users, mix, args))
+    print_report(results, args, database_url)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "json_path"}, **results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
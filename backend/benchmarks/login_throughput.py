@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark
+Compares inline bcrypt verification against the password hashing pool and
+measures how long the event loop is stalled while logins are in flight.
+
+Usage: python benchmarks/login_throughput.py [concurrent_logins]
+"""
+import sys
+import os
+import time
+import asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth.auth_utils import (
+    get_password_hash,
+    verify_password,
+    verify_password_async,
+    BCRYPT_ROUNDS,
+    PASSWORD_HASH_WORKERS
+)
+
+PASSWORD = "benchmark-password"
+
+
+async def _inline_login(hashed: str) -> bool:
+    """Simulate the old login path: bcrypt runs on the event loop"""
+    return verify_password(PASSWORD, hashed)
+
+
+async def _pooled_login(hashed: str) -> bool:
+    """Simulate the new login path: bcrypt runs on the hashing pool"""
+    return await verify_password_async(PASSWORD, hashed)
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float, lags: list):
+    """Record how late the loop wakes up - a stand-in for chat streaming"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_scenario(login, hashed: str, concurrency: int) -> dict:
+    """Run `concurrency` logins at once alongside a heartbeat task"""
+    stop = asyncio.Event()
+    lags = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, 0.01, lags))
+    await asyncio.sleep(0.02)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login(hashed) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await heartbeat
+    assert all(results), "password verification failed"
+
+    return {
+        "elapsed": elapsed,
+        "logins_per_sec": concurrency / elapsed if elapsed else 0.0,
+        "max_loop_lag_ms": max(lags, default=0.0) * 1000
+    }
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    hashed = get_password_hash(PASSWORD)
+
+    print(f"bcrypt rounds: {BCRYPT_ROUNDS}, hashing workers: {PASSWORD_HASH_WORKERS}, concurrent logins: {concurrency}")
+    for name, login in (("inline", _inline_login), ("pooled", _pooled_login)):
+        stats = asyncio.run(run_scenario(login, hashed, concurrency))
+        print(
+            f"{name:>7}: {stats['logins_per_sec']:.1f} logins/s, "
+            f"total {stats['elapsed']:.2f}s, max event loop lag {stats['max_loop_lag_ms']:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
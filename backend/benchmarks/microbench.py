@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the CPU-bound helpers on the request path
+Times each helper on realistic and adversarial inputs (long messages, large
+histories, large job catalogs), compares against a saved baseline and exits
+non-zero when any case regresses beyond the tolerance.
+
+Usage: python benchmarks/microbench.py [--save] [--baseline PATH] [--tolerance 0.25]
+           [--filter NAME] [--repeat 7]
+
+Record a baseline on the target machine with --save, then run without it
+before and after an optimization. Timings are the best of --repeat runs, in
+microseconds per call.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing main builds the app; keep it off the network and out of the real databases
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("PERFORMANCE_DATABASE_URL", "sqlite://")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("ONBOARDING_CHECKPOINTER", "none")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "microbench.json")
+
+SENTENCE = "Welcome to SAP, where we help the world run better and improve people's lives."
+BUTTON_MESSAGE = "Let's start with a short welcome video! SHOW_VIDEO_BUTTON"
+
+
+def _message(sentences: int, sep: str = " ") -> str:
+    return sep.join(SENTENCE for _ in range(sentences))
+
+
+def _history(turns: int, content_length: int) -> List[Dict[str, str]]:
+    content = ("x" * content_length)
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i} {content}"})
+        history.append({"role": "assistant", "text": f"answer {i} {content}"})
+    return history
+
+
+def _node_tasks(done: bool) -> Dict[str, Dict[str, bool]]:
+    return {
+        "welcome_overview": {"welcome_video": done, "company_policies": done, "employee_perks": False, "culture_quiz": done},
+        "personal_info": {"personal_info_form": done, "emergency_contact": False, "legal_forms": False},
+        "account_setup": {"email_setup": False, "sap_access": False, "permissions": False},
+    }
+
+
+def _job_catalog(jobs: List[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    """Scale the shipped catalog up to `size` jobs with shuffled attributes"""
+    rng = random.Random(7)
+    styles = sorted({style for job in jobs for style in job.get("work_style", [])})
+    environments = sorted({env for job in jobs for env in job.get("environment", [])})
+    catalog = []
+    for i in range(size):
+        job = dict(jobs[i % len(jobs)])
+        job["id"] = i + 1
+        job["work_style"] = rng.sample(styles, min(3, len(styles)))
+        job["environment"] = rng.sample(environments, min(2, len(environments)))
+        job["growth_potential"] = rng.choice(["Medium", "High", "Very High"])
+        job["experience_level"] = rng.choice(["Entry", "Mid", "Mid-Senior", "Senior"])
+        catalog.append(job)
+    return catalog
+
+
+QUIZ_ANSWERS = {
+    "career_goal": "technical_expert",
+    "work_environment": "enterprise",
+    "work_style": "analytical",
+    "motivation": "growth",
+    "strength": "leadership",
+}
+# Every answer maps to attributes, so every weight bucket is exercised
+ADVERSARIAL_QUIZ_ANSWERS = {f"q{i}": value for i, value in enumerate(
+    ["team_lead", "management", "leadership", "startup", "enterprise", "consulting", "remote", "growth"] * 8
+)}
+
+
+def build_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """(name, zero-argument callable) for every benchmarked helper and input"""
+    import main
+    from langgraph_connection import LangGraphConnection
+    from prompts import format_chat_history
+    from services.rag_service import RAGService
+    from services.recommendation_service import SAPJobRecommendationService, JobFeatureMatrix, NUMPY_AVAILABLE
+    from db import calculate_goal_progress_from_onboarding, migrate_goals_to_new_format
+
+    # The helpers don't touch instance state, so call them unbound
+    split_message = lambda message: LangGraphConnection._split_message(None, message)
+    format_task_status = lambda node, tasks: LangGraphConnection._format_task_status(None, node, tasks)
+    rag_format_response = lambda response: RAGService._format_response(None, response)
+
+    recommender = SAPJobRecommendationService()
+    jobs = recommender.jobs_data
+    large_catalog = _job_catalog(jobs, 5000)
+    score = recommender._calculate_match_score
+
+    short_message = "Great, let's move on!"
+    long_message = _message(40)
+    huge_message = _message(2000)
+    no_break_message = "a" * 20000
+    long_response = _message(60, sep=". ")
+    old_goals = [{"name": "Training", "progress": 80}, {"name": "Onboarding", "progress": 50}]
+    many_old_goals = [{"name": random.Random(i).choice(["Training", "Onboarding", "Other"]), "progress": i % 101} for i in range(500)]
+
+    cases = [
+        ("split_message/short", lambda: split_message(short_message)),
+        ("split_message/button", lambda: split_message(BUTTON_MESSAGE)),
+        ("split_message/long", lambda: split_message(long_message)),
+        ("split_message/huge", lambda: split_message(huge_message)),
+        ("split_message/no_breaks", lambda: split_message(no_break_message)),
+        ("format_task_status/empty", lambda: format_task_status("welcome_overview", {})),
+        ("format_task_status/welcome", lambda: format_task_status("welcome_overview", _NODE_TASKS)),
+        ("format_task_status/account", lambda: format_task_status("account_setup", _NODE_TASKS)),
+        ("format_chat_history/10", lambda: format_chat_history(_HISTORY_SMALL)),
+        ("format_chat_history/1000", lambda: format_chat_history(_HISTORY_LARGE)),
+        ("format_chat_history/long_turns", lambda: format_chat_history(_HISTORY_LONG_TURNS)),
+        ("format_response/main", lambda: main._format_response(long_response)),
+        ("format_response/main_huge", lambda: main._format_response(huge_message)),
+        ("format_response/rag", lambda: rag_format_response(long_response)),
+        ("goal_progress/partial", lambda: calculate_goal_progress_from_onboarding(_NODE_TASKS, "personal_info")),
+        ("goal_progress/empty", lambda: calculate_goal_progress_from_onboarding({}, "welcome_overview")),
+        ("migrate_goals/typical", lambda: migrate_goals_to_new_format(old_goals)),
+        ("migrate_goals/500", lambda: migrate_goals_to_new_format(many_old_goals)),
+        ("match_score/one_job", lambda: score(jobs[0], QUIZ_ANSWERS)),
+        ("match_score/catalog", lambda: [score(job, QUIZ_ANSWERS) for job in jobs]),
+        ("match_score/catalog_5000", lambda: [score(job, QUIZ_ANSWERS) for job in large_catalog]),
+        ("match_score/adversarial_answers", lambda: [score(job, ADVERSARIAL_QUIZ_ANSWERS) for job in jobs]),
+    ]
+    if NUMPY_AVAILABLE:
+        matrix, large_matrix = JobFeatureMatrix(jobs), JobFeatureMatrix(large_catalog)
+        cases += [
+            ("job_matrix/top5", lambda: matrix.top_k(QUIZ_ANSWERS, 5)),
+            ("job_matrix/top5_catalog_5000", lambda: large_matrix.top_k(QUIZ_ANSWERS, 5)),
+            ("job_matrix/adversarial_answers", lambda: matrix.top_k(ADVERSARIAL_QUIZ_ANSWERS, 5)),
+        ]
+    return cases
+
+
+_NODE_TASKS = _node_tasks(True)
+_HISTORY_SMALL = _history(5, 120)
+_HISTORY_LARGE = _history(500, 120)
+_HISTORY_LONG_TURNS = _history(20, 8000)
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    """Best per-call time in microseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("results_us", {})
+
+
+def save_baseline(path: str, results: Dict[str, float]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "results_us": results}, f, indent=2, sort_keys=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for request-path helpers")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--filter", default="", help="only run cases containing this string")
+    parser.add_argument("--repeat", type=int, default=7)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    baseline = load_baseline(args.baseline)
+    results: Dict[str, float] = {}
+    regressions = []
+
+    print(f"{'case':<36} {'us/call':>12} {'baseline':>12} {'change':>8}")
+    for name, func in build_cases():
+        if args.filter not in name:
+            continue
+        results[name] = elapsed = measure(func, args.repeat)
+        previous = baseline.get(name)
+        if previous:
+            change = elapsed / previous - 1
+            flag = "  REGRESSION" if change > args.tolerance else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<36} {elapsed:>12.2f} {previous:>12.2f} {change:>+7.0%}{flag}")
+        else:
+            print(f"{name:<36} {elapsed:>12.2f} {'-':>12} {'':>8}")
+
+    if args.save:
+        save_baseline(args.baseline, {**baseline, **results})
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    if not baseline:
+        print("No baseline found; run with --save to record one")
+
+
+if __name__ == "__main__":
+    main()
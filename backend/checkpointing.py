@@ -0,0 +1,175 @@
+"""
+Persistent conversation checkpoints for the onboarding graph.
+
+Each user's onboarding conversation is a LangGraph thread keyed by user_id, so a
+turn resumes from the last checkpoint instead of re-hydrating chat history from
+the database. The backend is chosen with ONBOARDING_CHECKPOINTER:
+
+- postgres: PostgresSaver on DATABASE_URL (production)
+- sqlite:   SqliteSaver on a local file (development)
+- memory:   in-process MemorySaver (tests / single worker)
+- none:     checkpointing disabled
+
+Old checkpoints are compacted and idle threads evicted by a background
+maintenance loop (see start_checkpoint_maintenance). It walks the threads of
+known users one at a time and leaves recently active threads alone.
+"""
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from langgraph.checkpoint.memory import MemorySaver
+from config import settings
+from db import SessionLocal, UserState
+
+logger = logging.getLogger(__name__)
+
+# Optional checkpoint backends, handle gracefully if not installed
+try:
+    from langgraph.checkpoint.postgres import PostgresSaver
+    from psycopg_pool import ConnectionPool
+    POSTGRES_CHECKPOINTER_AVAILABLE = True
+except ImportError:
+    POSTGRES_CHECKPOINTER_AVAILABLE = False
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    SQLITE_CHECKPOINTER_AVAILABLE = True
+except ImportError:
+    SQLITE_CHECKPOINTER_AVAILABLE = False
+
+
+def thread_config(user_id: str) -> Dict[str, Any]:
+    """LangGraph config for a user's onboarding thread"""
+    return {"configurable": {"thread_id": str(user_id)}}
+
+
+def _postgres_conninfo(database_url: str) -> str:
+    """Strip SQLAlchemy driver suffixes (postgresql+psycopg2://) for psycopg"""
+    scheme, sep, rest = database_url.partition("://")
+    return f"{scheme.split('+')[0]}{sep}{rest}"
+
+
+def create_checkpointer():
+    """Create the configured checkpoint saver, or None if checkpointing is disabled"""
+    backend = settings.ONBOARDING_CHECKPOINTER.lower()
+
+    if backend == "none":
+        return None
+
+    if backend == "postgres":
+        if POSTGRES_CHECKPOINTER_AVAILABLE:
+            try:
+                pool = ConnectionPool(
+                    conninfo=_postgres_conninfo(settings.DATABASE_URL),
+                    max_size=settings.ONBOARDING_CHECKPOINT_POOL_SIZE,
+                    kwargs={"autocommit": True, "prepare_threshold": 0},
+                    open=True
+                )
+                saver = PostgresSaver(pool)
+                saver.setup()
+                return saver
+            except Exception as e:
+                logger.error("Failed to initialize Postgres checkpointer, falling back to memory. Error: %s", e)
+        else:
+            logger.warning("langgraph-checkpoint-postgres not installed, using in-memory checkpoints")
+        return MemorySaver()
+
+    if backend == "sqlite":
+        if SQLITE_CHECKPOINTER_AVAILABLE:
+            conn = sqlite3.connect(settings.ONBOARDING_CHECKPOINT_SQLITE_PATH, check_same_thread=False)
+            return SqliteSaver(conn)
+        logger.warning("langgraph-checkpoint-sqlite not installed, using in-memory checkpoints")
+        return MemorySaver()
+
+    return MemorySaver()
+
+
+def _checkpoint_time(checkpoint: Dict[str, Any]) -> Optional[datetime]:
+    """Parse a checkpoint's ISO timestamp"""
+    try:
+        ts = datetime.fromisoformat(checkpoint["ts"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _onboarding_thread_ids() -> List[str]:
+    """Onboarding threads are keyed by user_id, so user_states lists every thread"""
+    db = SessionLocal()
+    try:
+        return [row.user_id for row in db.query(UserState.user_id)]
+    finally:
+        db.close()
+
+
+def compact_checkpoints(graph, checkpointer, thread_ids: Iterable[str], max_per_thread: int, ttl_days: int,
+                        idle_minutes: int) -> Dict[str, int]:
+    """Evict idle threads and collapse threads with too many checkpoints.
+
+    A compacted thread keeps only its latest state as a single checkpoint,
+    which is all a new turn needs to resume. Compaction deletes and re-seeds
+    the thread, so threads with a checkpoint from the last `idle_minutes` are
+    skipped rather than raced with a turn in flight.
+    """
+    stats = {"threads": 0, "evicted": 0, "compacted": 0, "active": 0}
+    if checkpointer is None:
+        return stats
+
+    now = datetime.now(timezone.utc)
+    ttl_cutoff = now - timedelta(days=ttl_days)
+    idle_cutoff = now - timedelta(minutes=idle_minutes)
+
+    for thread_id in thread_ids:
+        config = thread_config(thread_id)
+        try:
+            # Newest first; one past the limit is enough to tell whether to compact
+            items = list(checkpointer.list(config, limit=max_per_thread + 1))
+            if not items:
+                continue
+            stats["threads"] += 1
+            latest = _checkpoint_time(items[0].checkpoint)
+            if latest is not None and latest < ttl_cutoff:
+                checkpointer.delete_thread(thread_id)
+                stats["evicted"] += 1
+            elif latest is None or latest >= idle_cutoff:
+                stats["active"] += 1
+            elif len(items) > max_per_thread:
+                values = graph.get_state(config).values
+                checkpointer.delete_thread(thread_id)
+                if values:
+                    # Re-seed as if the final node just ran, leaving nothing pending
+                    graph.update_state(config, values, as_node="welcome_overview")
+                stats["compacted"] += 1
+        except Exception as e:
+            logger.error("Checkpoint maintenance failed for thread %s: %s", thread_id, e)
+
+    return stats
+
+
+def start_checkpoint_maintenance(graph, checkpointer) -> Optional[threading.Thread]:
+    """Run compact_checkpoints periodically on a daemon thread"""
+    interval = settings.ONBOARDING_CHECKPOINT_MAINTENANCE_MINUTES * 60
+    if checkpointer is None or interval <= 0:
+        return None
+
+    def _loop():
+        stop = threading.Event()
+        while not stop.wait(interval):
+            try:
+                stats = compact_checkpoints(
+                    graph,
+                    checkpointer,
+                    _onboarding_thread_ids(),
+                    settings.ONBOARDING_CHECKPOINT_MAX_PER_THREAD,
+                    settings.ONBOARDING_CHECKPOINT_TTL_DAYS,
+                    settings.ONBOARDING_CHECKPOINT_IDLE_MINUTES
+                )
+                logger.info("Checkpoint maintenance: %s", stats)
+            except Exception as e:
+                logger.error("Checkpoint maintenance error: %s", e)
+
+    thread = threading.Thread(target=_loop, name="checkpoint-maintenance", daemon=True)
+    thread.start()
+    return thread
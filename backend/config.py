@@ -32,6 +32,26 @@ class Settings:
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
     PERFORMANCE_OPENAI_MODEL = os.getenv("PERFORMANCE_OPENAI_MODEL", "gpt-4")
     
+    # Onboarding chat: number of recent messages passed to the graph and the LLM
+    ONBOARDING_HISTORY_WINDOW = int(os.getenv("ONBOARDING_HISTORY_WINDOW", "3"))
+    # Rolling summary of older messages, refreshed in the background every N turns
+    ONBOARDING_SUMMARY_EVERY_N_TURNS = int(os.getenv("ONBOARDING_SUMMARY_EVERY_N_TURNS", "5"))
+    ONBOARDING_SUMMARY_MAX_CHARS = int(os.getenv("ONBOARDING_SUMMARY_MAX_CHARS", "1200"))
+    
+    # Onboarding graph checkpoints: postgres, sqlite (dev), memory or none
+    ONBOARDING_CHECKPOINTER = os.getenv(
+        "ONBOARDING_CHECKPOINTER",
+        "postgres" if DATABASE_URL.startswith("postgres") else "sqlite"
+    )
+    ONBOARDING_CHECKPOINT_SQLITE_PATH = os.getenv("ONBOARDING_CHECKPOINT_SQLITE_PATH", "onboarding_checkpoints.sqlite")
+    ONBOARDING_CHECKPOINT_POOL_SIZE = int(os.getenv("ONBOARDING_CHECKPOINT_POOL_SIZE", "5"))
+    # Threads idle longer than the TTL are evicted; longer threads are compacted to their latest state
+    ONBOARDING_CHECKPOINT_TTL_DAYS = int(os.getenv("ONBOARDING_CHECKPOINT_TTL_DAYS", "30"))
+    ONBOARDING_CHECKPOINT_MAX_PER_THREAD = int(os.getenv("ONBOARDING_CHECKPOINT_MAX_PER_THREAD", "20"))
+    ONBOARDING_CHECKPOINT_MAINTENANCE_MINUTES = int(os.getenv("ONBOARDING_CHECKPOINT_MAINTENANCE_MINUTES", "60"))
+    # Threads with a checkpoint newer than this may have a turn in flight and are not compacted
+    ONBOARDING_CHECKPOINT_IDLE_MINUTES = int(os.getenv("ONBOARDING_CHECKPOINT_IDLE_MINUTES", "15"))
+    
     # Gemini Configuration removed (no longer used)
     
     # SeaLion Configuration (for career coaching)
@@ -43,6 +63,53 @@ class Settings:
     PERFORMANCE_DEBUG = os.getenv("PERFORMANCE_DEBUG", "True").lower() == "true"
     PERFORMANCE_LOG_LEVEL = os.getenv("PERFORMANCE_LOG_LEVEL", "INFO")
     
+    # Logging (see logging_config.py)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # e.g. "db=WARNING,routers.career=DEBUG"
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text or json
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+    
+    # Latency metrics (see tracing.py), exported on /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    SLOW_REQUEST_LOG_MS = int(os.getenv("SLOW_REQUEST_LOG_MS", "2000"))
+    
+    # LLM token accounting (see llm_usage.py)
+    LLM_USAGE_FLUSH_SECONDS = int(os.getenv("LLM_USAGE_FLUSH_SECONDS", "60"))
+    LLM_PRICING_JSON = os.getenv("LLM_PRICING_JSON", "")  # {"model": [prompt, cached, completion]} USD per 1M tokens
+    
+    # Progress update analysis jobs (see progress_jobs.py)
+    PROGRESS_JOB_STORE = os.getenv("PROGRESS_JOB_STORE", "database")  # database or memory
+    PROGRESS_JOB_WORKERS = int(os.getenv("PROGRESS_JOB_WORKERS", "4"))
+    # Jobs running longer than this at startup were orphaned by a dead process and are re-queued
+    PROGRESS_JOB_STALE_SECONDS = int(os.getenv("PROGRESS_JOB_STALE_SECONDS", "600"))
+    PROGRESS_JOB_STREAM_TIMEOUT_SECONDS = float(os.getenv("PROGRESS_JOB_STREAM_TIMEOUT_SECONDS", "60"))
+    
+    # Goal history daily rollups (see goal_history.py); retention 0 keeps raw history forever
+    GOAL_ROLLUP_INTERVAL_SECONDS = int(os.getenv("GOAL_ROLLUP_INTERVAL_SECONDS", "300"))
+    GOAL_HISTORY_RETENTION_DAYS = int(os.getenv("GOAL_HISTORY_RETENTION_DAYS", "0"))
+    # Rows younger than this are left for the next run, so slow transactions commit first
+    GOAL_ROLLUP_GRACE_SECONDS = int(os.getenv("GOAL_ROLLUP_GRACE_SECONDS", "300"))
+    
+    # Manager team overviews cached per manager (see team_overview.py); 0 disables
+    TEAM_OVERVIEW_CACHE_TTL_SECONDS = float(os.getenv("TEAM_OVERVIEW_CACHE_TTL_SECONDS", "300"))
+    
+    # Org hierarchy queries: maximum levels walked below or above a user
+    ORG_TREE_MAX_DEPTH = int(os.getenv("ORG_TREE_MAX_DEPTH", "20"))
+    
+    # Data catalogs (see services/catalog.py): seconds between file mtime checks
+    CATALOG_RELOAD_CHECK_SECONDS = float(os.getenv("CATALOG_RELOAD_CHECK_SECONDS", "5"))
+    
+    # Career coach results cached by quiz answers (see services/career_cache.py); TTL 0 disables
+    CAREER_COACH_CACHE_TTL_SECONDS = float(os.getenv("CAREER_COACH_CACHE_TTL_SECONDS", "86400"))
+    CAREER_COACH_CACHE_MAX_ENTRIES = int(os.getenv("CAREER_COACH_CACHE_MAX_ENTRIES", "2048"))
+    # Optional JSON list of answer dicts to precompute at startup (e.g. the most common combinations)
+    CAREER_COACH_PRECOMPUTE_FILE = os.getenv("CAREER_COACH_PRECOMPUTE_FILE", "")
+    
+    # Career oracle route stories cached per (role, experience bucket, goal); TTL 0 disables
+    ORACLE_CACHE_TTL_SECONDS = float(os.getenv("ORACLE_CACHE_TTL_SECONDS", "86400"))
+    ORACLE_CACHE_VARIANTS = int(os.getenv("ORACLE_CACHE_VARIANTS", "3"))
+    ORACLE_CACHE_MAX_KEYS = int(os.getenv("ORACLE_CACHE_MAX_KEYS", "1024"))
+    
     # CORS
     # Include localhost for dev and known prod domains by default. Override via ALLOWED_ORIGINS env.
     ALLOWED_ORIGINS = os.getenv(
@@ -0,0 +1,143 @@
+"""
+Rolling conversation summaries for onboarding chat.
+
+The prompt carries a short verbatim window of recent messages plus a running
+summary of everything older, stored on UserState. The summary is refreshed off
+the request path: /chat counts turns, and every ONBOARDING_SUMMARY_EVERY_N_TURNS
+turns a background worker folds the messages that have left the recent window
+into the summary. The write is conditional, so turns counted during the LLM
+call and restarts that happen meanwhile are not lost or overwritten.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from sqlalchemy import case
+from langchain_core.messages import HumanMessage
+from config import settings
+from db import SessionLocal, UserState, ChatMessage, get_user_state, get_chat_messages_after
+from prompts import CONVERSATION_SUMMARY_PROMPT, format_chat_history
+from llm_usage import usage_user
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationSummarizer:
+    """Background worker that keeps UserState.conversation_summary up to date"""
+
+    def __init__(self, llm, session_factory=SessionLocal):
+        self.llm = llm
+        self.session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation-summary")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def record_turn(self, user_state) -> int:
+        """Count a completed chat turn on the (uncommitted) user state"""
+        user_state.turns_since_summary = (user_state.turns_since_summary or 0) + 1
+        return user_state.turns_since_summary
+
+    def maybe_schedule(self, user_id: str, turns_since_summary: int) -> bool:
+        """Queue a summary refresh once enough turns have accumulated"""
+        if self.llm is None or turns_since_summary < settings.ONBOARDING_SUMMARY_EVERY_N_TURNS:
+            return False
+        with self._lock:
+            # At most one refresh in flight per user
+            if user_id in self._pending:
+                return False
+            self._pending.add(user_id)
+        self._executor.submit(self._run, user_id)
+        return True
+
+    def _run(self, user_id: str) -> None:
+        try:
+            self.refresh_summary(user_id)
+        except Exception as e:
+            logger.error("Conversation summary failed for user %s: %s", user_id, e)
+        finally:
+            with self._lock:
+                self._pending.discard(user_id)
+
+    def refresh_summary(self, user_id: str) -> bool:
+        """Fold messages older than the recent window into the user's summary"""
+        db = self.session_factory()
+        try:
+            user_state = get_user_state(db, user_id)
+            if not user_state:
+                return False
+            # Snapshot what this refresh is based on; turns keep arriving during the LLM call
+            turns_seen = user_state.turns_since_summary or 0
+            last_message_id = user_state.summary_last_message_id or 0
+            previous_summary = user_state.conversation_summary
+
+            new_messages = get_chat_messages_after(db, user_id, last_message_id)
+            # The recent window is still sent verbatim, so leave it out of the summary
+            window = settings.ONBOARDING_HISTORY_WINDOW
+            to_summarize = new_messages[:-window] if window > 0 else new_messages
+            if not to_summarize:
+                self._save(db, user_id, last_message_id, turns_seen)
+                return False
+            # Don't hold the read transaction open across the LLM call
+            db.commit()
+
+            prompt = CONVERSATION_SUMMARY_PROMPT.format(
+                previous_summary=previous_summary or "(none yet)",
+                new_messages=format_chat_history(
+                    [{"role": msg.role, "content": msg.content} for msg in to_summarize]
+                ),
+                max_chars=settings.ONBOARDING_SUMMARY_MAX_CHARS
+            )
+            with usage_user(user_id):
+                response = self.llm.invoke([HumanMessage(content=prompt)])
+            summary = trim_summary(response.content.strip(), settings.ONBOARDING_SUMMARY_MAX_CHARS)
+
+            return self._save(db, user_id, last_message_id, turns_seen,
+                              summary=summary, summarized_through=to_summarize[-1].id)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _save(self, db, user_id: str, last_message_id: int, turns_seen: int,
+              summary: Optional[str] = None, summarized_through: Optional[int] = None) -> bool:
+        """Write the refresh unless the conversation moved on underneath it.
+
+        Only the turns counted when the refresh started are subtracted, and the
+        write is skipped if another refresh advanced the summary or a restart
+        deleted the summarized messages in the meantime.
+        """
+        values = {
+            UserState.turns_since_summary: case(
+                (UserState.turns_since_summary > turns_seen, UserState.turns_since_summary - turns_seen),
+                else_=0
+            )
+        }
+        query = db.query(UserState).filter(
+            UserState.user_id == user_id,
+            UserState.summary_last_message_id == last_message_id
+        )
+        if summary is not None:
+            values[UserState.conversation_summary] = summary
+            values[UserState.summary_last_message_id] = summarized_through
+            query = query.filter(
+                db.query(ChatMessage.id).filter(ChatMessage.id == summarized_through).exists()
+            )
+        updated = query.update(values, synchronize_session=False)
+        db.commit()
+        if not updated:
+            logger.info("Conversation for user %s changed during summary refresh, discarding it", user_id)
+        return bool(updated) and summary is not None
+
+
+def trim_summary(summary: str, max_chars: int) -> str:
+    """Cut an over-long summary back to its last complete sentence within max_chars"""
+    if len(summary) <= max_chars:
+        return summary
+    # One extra character so a sentence ending exactly at the limit is still found
+    head = summary[:max_chars + 1]
+    end = max(head.rfind(mark) for mark in (". ", "! ", "? ", "\n"))
+    if end > 0:
+        return summary[:end + 1].rstrip()
+    # No sentence boundary at all: fall back to the last whole word
+    return head.rsplit(" ", 1)[0][:max_chars].rstrip()
@@ -1,10 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, create_engine, Boolean, DECIMAL, Date, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, create_engine, Boolean, DECIMAL, Date, UniqueConstraint, Index, text, true, and_, bindparam, select, cast, event, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, Session, joinedload
+from sqlalchemy.orm import sessionmaker, relationship, Session, joinedload, aliased
 from datetime import datetime, date
 from typing import Optional, List
 from config import settings
 from models.user import User
+from task_matcher import match_task_signals
+from logging_config import SAMPLED
+from tracing import traced
+import logging
+from itertools import chain
+
+logger = logging.getLogger(__name__)
 
 # Main Database setup
 Base = declarative_base()
@@ -20,14 +29,9 @@ PerformanceSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=p
 
 # PerformanceFeedback moved to performance database section below
 
-class UserState(Base):
-    __tablename__ = "user_states"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, unique=True, index=True, nullable=False)
-    current_node = Column(String, default="welcome_overview")
-    total_points = Column(Integer, default=0)  # Total points earned
-    node_tasks = Column(JSON, default=lambda: {
+def default_node_tasks() -> dict:
+    """Initial onboarding task state for a new user"""
+    return {
         "welcome_overview": {
             "welcome_video": False,
             "company_policies": False,
@@ -38,13 +42,30 @@ class UserState(Base):
             "sap_access": False,
             "permissions": False
         }
-    })
-    personal_goals = Column(JSON, default=lambda: {
+    }
+
+def default_personal_goals() -> dict:
+    """Initial personal goals for a new user"""
+    return {
         "goals": [
             {"id": 1, "name": "Training", "progress": 0, "target": 100},
             {"id": 2, "name": "Onboarding", "progress": 0, "target": 100}
         ]
-    })
+    }
+
+class UserState(Base):
+    __tablename__ = "user_states"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, unique=True, index=True, nullable=False)
+    current_node = Column(String, default="welcome_overview")
+    total_points = Column(Integer, default=0)  # Total points earned
+    node_tasks = Column(JSON, default=default_node_tasks)
+    personal_goals = Column(JSON, default=default_personal_goals)
+    # Rolling summary of older onboarding chat, maintained in the background
+    conversation_summary = Column(Text, nullable=True)
+    summary_last_message_id = Column(Integer, default=0)  # Last chat message folded into the summary
+    turns_since_summary = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -123,6 +144,8 @@ class PerformanceFeedback(PerformanceBase):
     # Relationships
     employee = relationship("PerformanceUser", foreign_keys=[employee_id], back_populates="feedbacks_received")
     manager = relationship("PerformanceUser", foreign_keys=[manager_id], back_populates="feedbacks_given")
+    
+    __table_args__ = (Index('ix_performance_feedbacks_employee_created', 'employee_id', 'created_at'),)
 
 class ProgressUpdate(PerformanceBase):
     __tablename__ = "progress_updates"
@@ -132,7 +155,44 @@ class ProgressUpdate(PerformanceBase):
     progress_text = Column(Text, nullable=False)
     updated_goals = Column(JSON, nullable=False)  # The goals after update
     ai_insight = Column(Text, nullable=True)  # AI-generated insight
+    job_id = Column(String(36), nullable=True)  # Progress job that saved this update, if any
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_progress_updates_user_created', 'user_id', 'created_at'),
+        Index('ux_progress_updates_job_id', 'job_id', unique=True),
+    )
+
+class ProgressJob(PerformanceBase):
+    """Queued AI analysis of a progress update (see progress_jobs.py)"""
+    __tablename__ = "progress_jobs"
+
+    id = Column(String(36), primary_key=True)
+    user_id = Column(String(50), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, done, fallback
+    progress_text = Column(Text, nullable=False)
+    current_goals = Column(JSON, nullable=False)
+    provisional = Column(JSON, nullable=True)  # Keyword-based estimate returned on enqueue
+    result = Column(JSON, nullable=True)  # Final goals, chart_data and insight
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)  # When a worker claimed the job
+    finished_at = Column(DateTime, nullable=True)
+
+class LLMUsage(PerformanceBase):
+    """LLM token usage, aggregated per flush interval by route, model and user"""
+    __tablename__ = "llm_usage"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    period_start = Column(DateTime, nullable=False, index=True)
+    period_end = Column(DateTime, nullable=False)
+    route = Column(String(255), nullable=False, index=True)
+    model = Column(String(100), nullable=False, index=True)
+    user_id = Column(String(50), nullable=True, index=True)
+    calls = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cached_tokens = Column(Integer, default=0)
 
 class UserGoal(PerformanceBase):
     __tablename__ = "user_goals"
@@ -155,8 +215,32 @@ class GoalProgressHistory(PerformanceBase):
     user_id = Column(String(50), nullable=False, index=True)
     goal_id = Column(String(100), nullable=False)
     action = Column(String(50), nullable=False)  # 'completed', 'uncompleted', 'created'
+    category = Column(String(50), nullable=True)  # Older rows only have it in extra_data
     timestamp = Column(DateTime, default=datetime.utcnow)
     extra_data = Column(JSON)  # Changed from 'metadata' to 'extra_data'
+    
+    __table_args__ = (Index('ix_goal_history_user_goal_time', 'user_id', 'goal_id', 'timestamp'),)
+
+class GoalProgressDaily(PerformanceBase):
+    """Goal transitions per user, day and category, rolled up from goal_progress_history (see goal_history.py)"""
+    __tablename__ = "goal_progress_daily"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String(50), nullable=False)
+    day = Column(Date, nullable=False, index=True)
+    category = Column(String(50), nullable=False)
+    completed_count = Column(Integer, default=0)
+    uncompleted_count = Column(Integer, default=0)
+    created_count = Column(Integer, default=0)
+    
+    __table_args__ = (UniqueConstraint('user_id', 'day', 'category', name='unique_goal_progress_day'),)
+
+class RollupWatermark(PerformanceBase):
+    """Last source row folded into a rollup table"""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String(50), primary_key=True)
+    last_id = Column(Integer, nullable=False, default=0)
 
 class PerformanceGoal(PerformanceBase):
     __tablename__ = "performance_goals"
@@ -180,6 +264,8 @@ class PerformanceGoal(PerformanceBase):
     # Relationships
     employee = relationship("PerformanceUser", foreign_keys=[employee_id])
     manager = relationship("PerformanceUser", foreign_keys=[manager_id])
+    
+    __table_args__ = (Index('ix_performance_goals_employee_status', 'employee_id', 'status'),)
 
 class PerformanceMetric(PerformanceBase):
     __tablename__ = "performance_metrics"
@@ -223,52 +309,167 @@ def create_performance_tables():
     """Create all performance database tables"""
     PerformanceBase.metadata.create_all(bind=performance_engine)
 
+# Performance write notifications: listeners get the set of employees whose feedback, goals
+# or progress changed, as performance_users primary keys and/or user_id strings, after commit.
+# ALL_EMPLOYEES means the org structure itself changed.
+ALL_EMPLOYEES = "*"
+_performance_write_listeners = []
+
+def on_performance_write(listener) -> None:
+    _performance_write_listeners.append(listener)
+
+def notify_performance_write(employee_keys: set) -> None:
+    for listener in _performance_write_listeners:
+        try:
+            listener(employee_keys)
+        except Exception as e:
+            logger.error("Performance write listener failed: %s", e)
+
+@event.listens_for(PerformanceSessionLocal, "after_flush")
+def _collect_performance_writes(session, flush_context):
+    keys = session.info.setdefault("performance_writes", set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (PerformanceFeedback, PerformanceGoal)):
+            keys.add(obj.employee_id)
+        elif isinstance(obj, (UserGoal, ProgressUpdate)):
+            keys.add(obj.user_id)
+        elif isinstance(obj, PerformanceUser):
+            keys.add(ALL_EMPLOYEES)
+
+@event.listens_for(PerformanceSessionLocal, "after_commit")
+def _publish_performance_writes(session):
+    keys = session.info.pop("performance_writes", None)
+    if keys:
+        notify_performance_write(keys)
+
+@event.listens_for(PerformanceSessionLocal, "after_rollback")
+def _discard_performance_writes(session):
+    session.info.pop("performance_writes", None)
+
 # =============================================================================
 # MAIN DATABASE CRUD FUNCTIONS
 # =============================================================================
 def get_user_state(db: Session, user_id: str) -> Optional[UserState]:
     """Get user state by user_id"""
     try:
-        print(f"Querying user state for user_id: {user_id}")
+        logger.debug("Querying user state for user_id: %s", user_id, extra=SAMPLED)
         result = db.query(UserState).filter(UserState.user_id == user_id).first()
-        print(f"User state query result: {result}")
+        logger.debug("User state query result: %s", result, extra=SAMPLED)
         return result
     except Exception as e:
-        print(f"Error getting user state: {e}")
+        logger.error("Error getting user state: %s", e)
         raise
 
 def create_user_state(db: Session, user_id: str) -> UserState:
     """Create a new user state"""
     try:
-        print(f"Creating user state for user_id: {user_id}")
+        logger.debug("Creating user state for user_id: %s", user_id)
         user_state = UserState(user_id=user_id)
         db.add(user_state)
         db.commit()
         db.refresh(user_state)
-        print(f"User state created successfully: {user_state}")
+        logger.debug("User state created successfully: %s", user_state)
         return user_state
     except Exception as e:
-        print(f"Error creating user state: {e}")
+        logger.error("Error creating user state: %s", e)
         db.rollback()
         # If it's a unique constraint violation, try to get the existing user state
         if "duplicate key value violates unique constraint" in str(e):
-            print(f"User state already exists for user_id: {user_id}, fetching existing one")
+            logger.debug("User state already exists for user_id: %s, fetching existing one", user_id)
             existing_state = get_user_state(db, user_id)
             if existing_state:
                 return existing_state
         raise
 
+# Get-or-create the user's state in one round trip. Yields no row if the user does not exist.
+_LOAD_USER_CONTEXT_SQL = text("""
+    WITH target_user AS (
+        SELECT id FROM users WHERE id = :user_pk
+    ),
+    inserted AS (
+        INSERT INTO user_states (user_id, current_node, total_points, node_tasks, personal_goals,
+                                 summary_last_message_id, turns_since_summary, created_at, updated_at)
+        SELECT :user_id, 'welcome_overview', 0, CAST(:node_tasks AS JSON), CAST(:personal_goals AS JSON), 0, 0, :now, :now
+        FROM target_user
+        ON CONFLICT (user_id) DO NOTHING
+        RETURNING *
+    )
+    SELECT * FROM inserted
+    UNION ALL
+    SELECT user_states.* FROM user_states JOIN target_user ON user_states.user_id = :user_id
+""").bindparams(
+    bindparam("node_tasks", type_=JSON),
+    bindparam("personal_goals", type_=JSON)
+)
+
+@traced("db.load_user_context")
+def load_user_context(db: Session, user_pk: int) -> Optional[UserState]:
+    """Load (creating if needed) the UserState for an existing User, or None if the user doesn't exist"""
+    user_id = str(user_pk)
+    
+    if db.get_bind().dialect.name == "postgresql":
+        now = datetime.utcnow()
+        result = db.execute(
+            select(UserState).from_statement(_LOAD_USER_CONTEXT_SQL),
+            {
+                "user_pk": user_pk,
+                "user_id": user_id,
+                "node_tasks": default_node_tasks(),
+                "personal_goals": default_personal_goals(),
+                "now": now
+            }
+        ).scalars().first()
+        # Only a freshly inserted row carries this request's timestamp; persist it
+        # right away so read-only endpoints don't roll it back
+        if result is not None and result.created_at == now:
+            db.commit()
+        elif result is None:
+            # A concurrent first request may have inserted the row: ON CONFLICT DO NOTHING
+            # then returns nothing and this statement's snapshot predates that commit
+            result = get_user_state(db, user_id)
+        return result
+    
+    # Other databases (e.g. SQLite): one joined lookup, insert only for new users
+    row = (
+        db.query(User.id, UserState)
+        .outerjoin(UserState, UserState.user_id == cast(User.id, String))
+        .filter(User.id == user_pk)
+        .first()
+    )
+    if row is None:
+        return None
+    if row[1] is not None:
+        return row[1]
+    return create_user_state(db, user_id)
+
+@traced("db.get_chat_messages")
 def get_chat_messages(db: Session, user_id: str) -> List[ChatMessage]:
     """Get all chat messages for a user"""
     try:
-        print(f"Querying chat messages for user_id: {user_id}")
+        logger.debug("Querying chat messages for user_id: %s", user_id, extra=SAMPLED)
         result = db.query(ChatMessage).filter(ChatMessage.user_id == user_id).order_by(ChatMessage.timestamp).all()
-        print(f"Found {len(result)} chat messages")
+        logger.debug("Found %s chat messages", len(result), extra=SAMPLED)
         return result
     except Exception as e:
-        print(f"Error getting chat messages: {e}")
+        logger.error("Error getting chat messages: %s", e)
         raise
 
+@traced("db.get_recent_chat_messages")
+def get_recent_chat_messages(db: Session, user_id: str, limit: int) -> List[ChatMessage]:
+    """Get the most recent chat messages for a user, oldest first"""
+    if limit <= 0:
+        return []
+    result = db.query(ChatMessage).filter(ChatMessage.user_id == user_id).order_by(ChatMessage.timestamp.desc()).limit(limit).all()
+    result.reverse()
+    return result
+
+def get_chat_messages_after(db: Session, user_id: str, after_id: int) -> List[ChatMessage]:
+    """Get chat messages newer than the given message id, oldest first"""
+    return db.query(ChatMessage).filter(
+        ChatMessage.user_id == user_id,
+        ChatMessage.id > (after_id or 0)
+    ).order_by(ChatMessage.id).all()
+
 def save_chat_message(db: Session, user_id: str, role: str, content: str) -> ChatMessage:
     """Save a chat message"""
     message = ChatMessage(user_id=user_id, role=role, content=content)
@@ -284,6 +485,12 @@ def update_user_state_timestamp(db: Session, user_id: str):
         user_state.updated_at = datetime.utcnow()
         db.commit()
 
+# Priority order when inferring a task from a freeform message
+POINTS_INFERENCE_ORDER = [
+    'welcome_video', 'company_policies', 'culture_quiz',
+    'employee_perks', 'personal_info_form', 'account_setup'
+]
+
 def calculate_points_for_task(task_name: str, user_message: str) -> int:
     """Calculate points based on task completion.
 
@@ -306,20 +513,11 @@ def calculate_points_for_task(task_name: str, user_message: str) -> int:
     if task_name and task_name in points_map:
         return points_map[task_name]
 
-    # Otherwise, infer from message contents
-    user_msg_lower = (user_message or '').lower()
-    if 'watched the video' in user_msg_lower or 'video' in user_msg_lower:
-        return points_map.get('welcome_video', 0)
-    if 'reviewed all company policies' in user_msg_lower or 'policies' in user_msg_lower:
-        return points_map.get('company_policies', 0)
-    if 'completed the culture quiz' in user_msg_lower or 'quiz' in user_msg_lower:
-        return points_map.get('culture_quiz', 0)
-    if 'reviewed the employee perks' in user_msg_lower or 'perks' in user_msg_lower:
-        return points_map.get('employee_perks', 0)
-    if 'submitted the personal information form' in user_msg_lower or 'personal information' in user_msg_lower:
-        return points_map.get('personal_info_form', 0)
-    if 'account setup' in user_msg_lower and 'complete' in user_msg_lower:
-        return points_map.get('account_setup', 0)
+    # Otherwise, infer from message contents (first mentioned task wins)
+    signals = match_task_signals(user_message)
+    for task in POINTS_INFERENCE_ORDER:
+        if (task, "mentioned") in signals:
+            return points_map.get(task, 0)
 
     return 0
 
@@ -461,7 +659,7 @@ def create_performance_user(db: Session, user_id: str, name: str, email: str, ro
         try:
             hire_date_obj = datetime.strptime(hire_date, "%Y-%m-%d").date()
         except ValueError:
-            print(f"Invalid hire_date format: {hire_date}")
+            logger.warning("Invalid hire_date format: %s", hire_date)
     
     user = PerformanceUser(
         user_id=user_id, 
@@ -494,6 +692,132 @@ def get_performance_direct_reports(db: Session, manager_id: int) -> List[Perform
     """Get direct reports for a manager"""
     return db.query(PerformanceUser).filter(PerformanceUser.manager_id == manager_id).all()
 
+# Org hierarchy (recursive CTEs over performance_users.manager_id)
+
+ORG_MEMBER_COLUMNS = (
+    PerformanceUser.id,
+    PerformanceUser.user_id,
+    PerformanceUser.name,
+    PerformanceUser.role,
+    PerformanceUser.position,
+    PerformanceUser.department,
+    PerformanceUser.manager_id,
+)
+
+def _org_subtree_cte(root_id: int, max_depth: int):
+    """Everyone below root_id: (id, branch_id, depth), where branch_id is the direct report the row descends from.
+    The depth bound also stops runaway recursion if manager_id ever forms a cycle."""
+    tree = select(
+        PerformanceUser.id.label('id'),
+        PerformanceUser.id.label('branch_id'),
+        literal(1).label('depth')
+    ).where(PerformanceUser.manager_id == root_id).cte('org_tree', recursive=True)
+    child = aliased(PerformanceUser)
+    return tree.union_all(
+        select(child.id, tree.c.branch_id, tree.c.depth + 1).where(
+            child.manager_id == tree.c.id,
+            tree.c.depth < max_depth
+        )
+    )
+
+def get_org_subtree(db: Session, root_id: int, max_depth: int = None) -> List[dict]:
+    """Everyone in a manager's org (direct and skip-level reports) with their depth below the manager"""
+    tree = _org_subtree_cte(root_id, max_depth or settings.ORG_TREE_MAX_DEPTH)
+    rows = db.execute(
+        select(*ORG_MEMBER_COLUMNS, tree.c.depth)
+        .join(tree, tree.c.id == PerformanceUser.id)
+        .order_by(tree.c.depth, PerformanceUser.name)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+def get_management_chain(db: Session, user_pk: int, max_depth: int = None) -> List[dict]:
+    """A user's managers from the direct manager up to the top of the org"""
+    max_depth = max_depth or settings.ORG_TREE_MAX_DEPTH
+    management_chain = select(
+        PerformanceUser.id.label('id'),
+        PerformanceUser.manager_id.label('manager_id'),
+        literal(0).label('depth')
+    ).where(PerformanceUser.id == user_pk).cte('management_chain', recursive=True)
+    manager = aliased(PerformanceUser)
+    management_chain = management_chain.union_all(
+        select(manager.id, manager.manager_id, management_chain.c.depth + 1).where(
+            manager.id == management_chain.c.manager_id,
+            management_chain.c.depth < max_depth
+        )
+    )
+    rows = db.execute(
+        select(*ORG_MEMBER_COLUMNS, management_chain.c.depth.label('levels_up'))
+        .join(management_chain, management_chain.c.id == PerformanceUser.id)
+        .where(management_chain.c.depth > 0)
+        .order_by(management_chain.c.depth)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+def get_org_subtree_aggregates(db: Session, root_id: int, max_depth: int = None) -> List[dict]:
+    """Headcount, rating and goal completion sums for each direct report's subtree (the report included), in one query"""
+    tree = _org_subtree_cte(root_id, max_depth or settings.ORG_TREE_MAX_DEPTH)
+    members = select(tree.c.id)
+    
+    rating_stats = select(
+        PerformanceFeedback.employee_id,
+        func.sum(PerformanceFeedback.overall_rating).label('rating_sum'),
+        func.count(PerformanceFeedback.overall_rating).label('rating_count')
+    ).where(
+        PerformanceFeedback.employee_id.in_(members),
+        PerformanceFeedback.overall_rating != 0
+    ).group_by(PerformanceFeedback.employee_id).subquery()
+    goal_stats = select(
+        PerformanceGoal.employee_id,
+        func.count(PerformanceGoal.id).label('goals_total'),
+        func.count(PerformanceGoal.id).filter(PerformanceGoal.status == 'completed').label('goals_completed')
+    ).where(PerformanceGoal.employee_id.in_(members)).group_by(PerformanceGoal.employee_id).subquery()
+    member = aliased(PerformanceUser)
+    user_goal_stats = select(
+        member.id.label('employee_id'),
+        func.count(UserGoal.id).label('user_goals_total'),
+        func.count(UserGoal.id).filter(UserGoal.completed.is_(True)).label('user_goals_completed')
+    ).join(UserGoal, UserGoal.user_id == member.user_id).where(member.id.in_(members)).group_by(member.id).subquery()
+    branch = aliased(PerformanceUser)
+    
+    rows = db.execute(
+        select(
+            tree.c.branch_id,
+            branch.user_id,
+            branch.name,
+            func.count(tree.c.id).label('headcount'),
+            func.max(tree.c.depth).label('depth'),
+            func.coalesce(func.sum(rating_stats.c.rating_sum), 0).label('rating_sum'),
+            func.coalesce(func.sum(rating_stats.c.rating_count), 0).label('rating_count'),
+            func.coalesce(func.sum(goal_stats.c.goals_total), 0).label('goals_total'),
+            func.coalesce(func.sum(goal_stats.c.goals_completed), 0).label('goals_completed'),
+            func.coalesce(func.sum(user_goal_stats.c.user_goals_total), 0).label('user_goals_total'),
+            func.coalesce(func.sum(user_goal_stats.c.user_goals_completed), 0).label('user_goals_completed')
+        )
+        .select_from(tree)
+        .join(branch, branch.id == tree.c.branch_id)
+        .outerjoin(rating_stats, rating_stats.c.employee_id == tree.c.id)
+        .outerjoin(goal_stats, goal_stats.c.employee_id == tree.c.id)
+        .outerjoin(user_goal_stats, user_goal_stats.c.employee_id == tree.c.id)
+        .group_by(tree.c.branch_id, branch.user_id, branch.name)
+        .order_by(branch.name)
+    ).all()
+    return [
+        {
+            'branch_id': row.branch_id,
+            'user_id': row.user_id,
+            'name': row.name,
+            'headcount': row.headcount,
+            'depth': row.depth,
+            'rating_sum': int(row.rating_sum),
+            'rating_count': int(row.rating_count),
+            'goals_total': int(row.goals_total),
+            'goals_completed': int(row.goals_completed),
+            'user_goals_total': int(row.user_goals_total),
+            'user_goals_completed': int(row.user_goals_completed)
+        }
+        for row in rows
+    ]
+
 def create_performance_feedback(db: Session, employee_id: int, manager_id: int, feedback_text: str) -> PerformanceFeedback:
     """Create a new performance feedback"""
     feedback = PerformanceFeedback(
@@ -605,37 +929,165 @@ def get_performance_metrics_by_employee(db: Session, employee_id: int) -> List[P
     """Get all metrics for an employee"""
     return db.query(PerformanceMetric).filter(PerformanceMetric.employee_id == employee_id).all()
 
+# Columns for summary listings; the feedback text and AI analysis blobs stay out
+RECENT_FEEDBACK_COLUMNS = (
+    PerformanceFeedback.id,
+    PerformanceFeedback.manager_id,
+    PerformanceFeedback.overall_rating,
+    PerformanceFeedback.feedback_categories,
+    PerformanceFeedback.review_period,
+    PerformanceFeedback.review_year,
+    PerformanceFeedback.review_quarter,
+    PerformanceFeedback.created_at,
+    PerformanceFeedback.updated_at,
+)
+
+def _feedback_aggregates():
+    return (
+        func.count(PerformanceFeedback.id).label('total_feedbacks'),
+        func.avg(PerformanceFeedback.overall_rating).filter(PerformanceFeedback.overall_rating != 0).label('average_rating'),
+        func.max(PerformanceFeedback.created_at).label('last_feedback_date')
+    )
+
+def _goal_aggregates():
+    return (
+        func.count(PerformanceGoal.id).label('total_goals'),
+        func.count(PerformanceGoal.id).filter(PerformanceGoal.status == 'completed').label('completed_goals'),
+        func.count(PerformanceGoal.id).filter(PerformanceGoal.status == 'active').label('active_goals')
+    )
+
+def _summary_from_stats(stats, recent_feedbacks: list) -> dict:
+    return {
+        'total_feedbacks': stats.total_feedbacks or 0,
+        'average_rating': round(float(stats.average_rating), 2) if stats.average_rating else None,
+        'completed_goals': stats.completed_goals or 0,
+        'active_goals': stats.active_goals or 0,
+        'total_goals': stats.total_goals or 0,
+        'last_feedback_date': stats.last_feedback_date,
+        'recent_feedbacks': recent_feedbacks
+    }
+
 def get_performance_summary(db: Session, employee_id: int) -> dict:
     """Get comprehensive performance summary for an employee"""
-    feedbacks = db.query(PerformanceFeedback).filter(PerformanceFeedback.employee_id == employee_id).all()
-    goals = db.query(PerformanceGoal).filter(PerformanceGoal.employee_id == employee_id).all()
+    # Both tables aggregate to one row each, so a cross join returns everything in one round trip
+    feedback_stats = db.query(*_feedback_aggregates()).filter(PerformanceFeedback.employee_id == employee_id).subquery()
+    goal_stats = db.query(*_goal_aggregates()).filter(PerformanceGoal.employee_id == employee_id).subquery()
+    stats = db.query(feedback_stats, goal_stats).select_from(feedback_stats).join(goal_stats, true()).one()
     
-    total_feedbacks = len(feedbacks)
-    avg_rating = sum(f.overall_rating for f in feedbacks if f.overall_rating) / len([f for f in feedbacks if f.overall_rating]) if feedbacks else 0
-    completed_goals = len([g for g in goals if g.status == 'completed'])
-    active_goals = len([g for g in goals if g.status == 'active'])
+    recent_feedbacks = db.query(*RECENT_FEEDBACK_COLUMNS).filter(
+        PerformanceFeedback.employee_id == employee_id
+    ).order_by(PerformanceFeedback.created_at.desc()).limit(3).all()
     
-    return {
-        'total_feedbacks': total_feedbacks,
-        'average_rating': round(avg_rating, 2) if avg_rating else None,
-        'completed_goals': completed_goals,
-        'active_goals': active_goals,
-        'total_goals': len(goals),
-        'last_feedback_date': max([f.created_at for f in feedbacks]) if feedbacks else None,
-        'recent_feedbacks': feedbacks[:3]
-    }
+    return _summary_from_stats(stats, [dict(row._mapping) for row in recent_feedbacks])
+
+@traced("db.team_overview")
+def get_team_overview(db: Session, manager_id: int) -> List[dict]:
+    """Summary, checkbox goal stats and latest AI insight for every direct report of a manager.
+    Two statements regardless of team size: per-report aggregates (GROUP BY employee, plus a
+    window function for the latest progress update) and the three most recent feedbacks per report."""
+    report_ids = select(PerformanceUser.id).where(PerformanceUser.manager_id == manager_id)
+    report_user_ids = select(PerformanceUser.user_id).where(PerformanceUser.manager_id == manager_id)
+    
+    feedback_stats = select(PerformanceFeedback.employee_id, *_feedback_aggregates()).where(
+        PerformanceFeedback.employee_id.in_(report_ids)
+    ).group_by(PerformanceFeedback.employee_id).subquery()
+    goal_stats = select(PerformanceGoal.employee_id, *_goal_aggregates()).where(
+        PerformanceGoal.employee_id.in_(report_ids)
+    ).group_by(PerformanceGoal.employee_id).subquery()
+    user_goal_stats = select(
+        UserGoal.user_id,
+        func.count(UserGoal.id).label('user_goals_total'),
+        func.count(UserGoal.id).filter(UserGoal.completed.is_(True)).label('user_goals_completed')
+    ).where(UserGoal.user_id.in_(report_user_ids)).group_by(UserGoal.user_id).subquery()
+    latest_updates = select(
+        ProgressUpdate.user_id,
+        ProgressUpdate.ai_insight,
+        ProgressUpdate.created_at,
+        func.row_number().over(partition_by=ProgressUpdate.user_id, order_by=ProgressUpdate.created_at.desc()).label('rn')
+    ).where(ProgressUpdate.user_id.in_(report_user_ids)).subquery()
+    
+    rows = db.execute(
+        select(
+            PerformanceUser.id, PerformanceUser.user_id, PerformanceUser.name,
+            PerformanceUser.position, PerformanceUser.department,
+            feedback_stats.c.total_feedbacks, feedback_stats.c.average_rating, feedback_stats.c.last_feedback_date,
+            goal_stats.c.total_goals, goal_stats.c.completed_goals, goal_stats.c.active_goals,
+            user_goal_stats.c.user_goals_total, user_goal_stats.c.user_goals_completed,
+            latest_updates.c.ai_insight.label('latest_insight'), latest_updates.c.created_at.label('latest_insight_at')
+        )
+        .outerjoin(feedback_stats, feedback_stats.c.employee_id == PerformanceUser.id)
+        .outerjoin(goal_stats, goal_stats.c.employee_id == PerformanceUser.id)
+        .outerjoin(user_goal_stats, user_goal_stats.c.user_id == PerformanceUser.user_id)
+        .outerjoin(latest_updates, and_(latest_updates.c.user_id == PerformanceUser.user_id, latest_updates.c.rn == 1))
+        .where(PerformanceUser.manager_id == manager_id)
+        .order_by(PerformanceUser.name)
+    ).all()
+    if not rows:
+        return []
+    
+    ranked_feedbacks = select(
+        PerformanceFeedback.employee_id,
+        *RECENT_FEEDBACK_COLUMNS,
+        func.row_number().over(partition_by=PerformanceFeedback.employee_id, order_by=PerformanceFeedback.created_at.desc()).label('rn')
+    ).where(PerformanceFeedback.employee_id.in_(report_ids)).subquery()
+    recent_by_employee = {}
+    for row in db.execute(
+        select(ranked_feedbacks).where(ranked_feedbacks.c.rn <= 3).order_by(ranked_feedbacks.c.employee_id, ranked_feedbacks.c.rn)
+    ):
+        feedback = dict(row._mapping)
+        employee_id = feedback.pop('employee_id')
+        feedback.pop('rn')
+        recent_by_employee.setdefault(employee_id, []).append(feedback)
+    
+    overview = []
+    for row in rows:
+        goals_total = row.user_goals_total or 0
+        goals_completed = row.user_goals_completed or 0
+        overview.append({
+            'id': row.id,
+            'user_id': row.user_id,
+            'name': row.name,
+            'position': row.position,
+            'department': row.department,
+            'summary': _summary_from_stats(row, recent_by_employee.get(row.id, [])),
+            'goal_stats': {
+                'total': goals_total,
+                'completed': goals_completed,
+                'completion_rate': round(goals_completed / goals_total * 100, 1) if goals_total else None
+            },
+            'latest_insight': row.latest_insight,
+            'latest_insight_at': row.latest_insight_at
+        })
+    return overview
 
 # Progress Update Functions (Performance Database)
-def save_progress_update_performance(db: Session, user_id: str, progress_text: str, updated_goals: list, ai_insight: str = None) -> ProgressUpdate:
-    """Save a progress update to the performance database"""
+def save_progress_update_performance(db: Session, user_id: str, progress_text: str, updated_goals: list, ai_insight: str = None,
+                                    job_id: str = None) -> ProgressUpdate:
+    """Save a progress update to the performance database.
+
+    With a job_id the save is idempotent: a job that is run again returns the
+    update it already saved instead of adding a second one.
+    """
+    if job_id is not None:
+        existing = db.query(ProgressUpdate).filter(ProgressUpdate.job_id == job_id).first()
+        if existing is not None:
+            return existing
     progress_update = ProgressUpdate(
         user_id=user_id,
         progress_text=progress_text,
         updated_goals=updated_goals,
-        ai_insight=ai_insight
+        ai_insight=ai_insight,
+        job_id=job_id
     )
     db.add(progress_update)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another run of the same job saved it first
+        db.rollback()
+        if job_id is None:
+            raise
+        return db.query(ProgressUpdate).filter(ProgressUpdate.job_id == job_id).one()
     db.refresh(progress_update)
     return progress_update
 
@@ -725,50 +1177,80 @@ def migrate_goals_to_new_format(old_goals: list) -> list:
     
     return migrated_goals
 
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+@traced("db.update_user_goals")
 def update_user_goals_performance(db: Session, user_id: str, goals: list) -> bool:
-    """Update user goals in the new user_goals table"""
+    """Update user goals in the new user_goals table.
+    Reads the user's goals once, writes only the goals whose completion changed
+    (one upsert) and logs history only for those transitions."""
     try:
-        for goal_data in goals:
-            goal_id = goal_data.get('id')
+        # Later entries win if the same goal is sent twice
+        incoming = {goal_data.get('id'): goal_data for goal_data in goals}
+        existing = dict(
+            db.query(UserGoal.goal_id, UserGoal.completed).filter(UserGoal.user_id == user_id).all()
+        )
+        
+        now = datetime.utcnow()
+        changed_goals, history_entries = [], []
+        for goal_id, goal_data in incoming.items():
+            completed = bool(goal_data.get('completed', False))
+            if goal_id in existing:
+                if bool(existing[goal_id]) == completed:
+                    continue
+                action = 'completed' if completed else 'uncompleted'
+            else:
+                action = 'completed' if completed else 'created'
             goal_name = goal_data.get('name')
             category = goal_data.get('category')
-            completed = goal_data.get('completed', False)
-            
-            # Check if goal exists
-            existing_goal = db.query(UserGoal).filter(
-                UserGoal.user_id == user_id,
-                UserGoal.goal_id == goal_id
-            ).first()
-            
-            if existing_goal:
-                # Update existing goal
-                existing_goal.completed = completed
-                existing_goal.updated_at = datetime.utcnow()
-            else:
-                # Create new goal
-                new_goal = UserGoal(
-                    user_id=user_id,
-                    goal_id=goal_id,
-                    goal_name=goal_name,
-                    category=category,
-                    completed=completed
-                )
-                db.add(new_goal)
-            
-            # Log the change in history
-            history_entry = GoalProgressHistory(
-                user_id=user_id,
-                goal_id=goal_id,
-                action='completed' if completed else 'uncompleted',
-                extra_data={'goal_name': goal_name, 'category': category}
+            changed_goals.append({
+                'user_id': user_id,
+                'goal_id': goal_id,
+                'goal_name': goal_name,
+                'category': category,
+                'completed': completed,
+                'created_at': now,
+                'updated_at': now
+            })
+            history_entries.append({
+                'user_id': user_id,
+                'goal_id': goal_id,
+                'action': action,
+                'category': category,
+                'timestamp': now,
+                'extra_data': {'goal_name': goal_name, 'category': category}
+            })
+        
+        if not changed_goals:
+            return True
+        
+        insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if insert is not None:
+            upsert = insert(UserGoal).values(changed_goals)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[UserGoal.user_id, UserGoal.goal_id],
+                set_={'completed': upsert.excluded.completed, 'updated_at': upsert.excluded.updated_at}
             )
-            db.add(history_entry)
+            db.execute(upsert)
+        else:
+            for goal in changed_goals:
+                if goal['goal_id'] in existing:
+                    db.query(UserGoal).filter(
+                        UserGoal.user_id == user_id,
+                        UserGoal.goal_id == goal['goal_id']
+                    ).update({'completed': goal['completed'], 'updated_at': now}, synchronize_session=False)
+                else:
+                    db.add(UserGoal(**goal))
         
+        db.execute(GoalProgressHistory.__table__.insert(), history_entries)
         db.commit()
+        # Core statements bypass the flush hooks
+        notify_performance_write({user_id})
         return True
     except Exception as e:
         db.rollback()
-        print(f"Error updating user goals: {str(e)}")
+        logger.error("Error updating user goals: %s", str(e))
         return False
 
 def get_default_learning_track_goals() -> list:
@@ -804,8 +1286,53 @@ def get_default_learning_track_goals() -> list:
         {"id": "leadership_vision", "name": "Team Leadership - Vision", "completed": False, "category": "team_leadership"}
         ]
 
+def get_llm_usage_rows(db: Session, since: datetime) -> List[dict]:
+    """Flushed LLM usage since a point in time, summed per route, model and user"""
+    rows = db.query(
+        LLMUsage.route,
+        LLMUsage.model,
+        LLMUsage.user_id,
+        func.sum(LLMUsage.calls),
+        func.sum(LLMUsage.prompt_tokens),
+        func.sum(LLMUsage.completion_tokens),
+        func.sum(LLMUsage.cached_tokens)
+    ).filter(
+        LLMUsage.period_end >= since
+    ).group_by(LLMUsage.route, LLMUsage.model, LLMUsage.user_id).all()
+    return [
+        {
+            "route": route, "model": model, "user_id": user_id, "calls": int(calls or 0),
+            "prompt_tokens": int(prompt or 0), "completion_tokens": int(completion or 0), "cached_tokens": int(cached or 0)
+        }
+        for route, model, user_id, calls, prompt, completion, cached in rows
+    ]
+
 def get_progress_history_performance(db: Session, user_id: str, limit: int = 10) -> List[ProgressUpdate]:
     """Get progress update history for a user from performance database"""
     return db.query(ProgressUpdate).filter(
         ProgressUpdate.user_id == user_id
     ).order_by(ProgressUpdate.created_at.desc()).limit(limit).all()
+
+def get_goal_progress_daily(db: Session, user_ids: List[str], since: date) -> List[dict]:
+    """Rolled-up goal transitions since a day, summed over the given users per day and category"""
+    if not user_ids:
+        return []
+    rows = db.query(
+        GoalProgressDaily.day,
+        GoalProgressDaily.category,
+        func.sum(GoalProgressDaily.completed_count),
+        func.sum(GoalProgressDaily.uncompleted_count),
+        func.sum(GoalProgressDaily.created_count)
+    ).filter(
+        GoalProgressDaily.user_id.in_(user_ids),
+        GoalProgressDaily.day >= since
+    ).group_by(GoalProgressDaily.day, GoalProgressDaily.category).order_by(
+        GoalProgressDaily.day, GoalProgressDaily.category
+    ).all()
+    return [
+        {
+            "day": day.isoformat(), "category": category, "completed": int(completed or 0),
+            "uncompleted": int(uncompleted or 0), "created": int(created or 0)
+        }
+        for day, category, completed, uncompleted, created in rows
+    ]
@@ -0,0 +1,175 @@
+"""
+Daily rollups of goal progress history.
+
+goal_progress_history gets one row per goal transition (see
+update_user_goals_performance). A background thread folds new history rows
+into goal_progress_daily - completed / uncompleted / created counts per user,
+day and category - every GOAL_ROLLUP_INTERVAL_SECONDS, tracking its position
+with a watermark so each row is counted once. Ids are assigned at insert, not
+commit, so a row can become visible after higher ids; the rollup therefore
+only advances through rows older than GOAL_ROLLUP_GRACE_SECONDS and stops at
+the first newer one. History written before the rollup existed (when every
+save logged every goal) is skipped: the watermark starts at the highest id
+present on the first run. Analytics endpoints read the rollups and never scan
+raw history. With GOAL_HISTORY_RETENTION_DAYS > 0, raw rows older than that
+which are already rolled up are deleted.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from config import settings
+from db import PerformanceSessionLocal, GoalProgressHistory, GoalProgressDaily, RollupWatermark, UPSERT_INSERTS
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "goal_progress_daily"
+# History action -> index into the (completed, uncompleted, created) counts
+ACTION_COUNTS = {"completed": 0, "uncompleted": 1, "created": 2}
+COUNT_COLUMNS = ("completed_count", "uncompleted_count", "created_count")
+
+DailyKey = Tuple[str, object, str]
+
+
+class GoalHistoryRollup:
+    """Incremental rollup of goal_progress_history into goal_progress_daily"""
+
+    def __init__(self, session_factory=PerformanceSessionLocal, batch_size: int = 5000):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """Roll up all pending history rows; returns how many were processed"""
+        processed = 0
+        while True:
+            db = self.session_factory()
+            try:
+                count = self._roll_batch(db)
+            except Exception as e:
+                db.rollback()
+                logger.error("Goal history rollup failed: %s", e)
+                return processed
+            finally:
+                db.close()
+            processed += count
+            if count < self.batch_size:
+                break
+        if settings.GOAL_HISTORY_RETENTION_DAYS > 0:
+            self.prune()
+        return processed
+
+    def _roll_batch(self, db) -> int:
+        # Locking the watermark row keeps concurrent workers from counting rows twice
+        watermark = db.query(RollupWatermark).filter(RollupWatermark.name == WATERMARK_NAME).with_for_update().first()
+        if watermark is None:
+            # Older rows predate change-only history writes and would count untouched goals
+            legacy_max_id = db.query(func.max(GoalProgressHistory.id)).scalar() or 0
+            watermark = RollupWatermark(name=WATERMARK_NAME, last_id=legacy_max_id)
+            db.add(watermark)
+            db.flush()
+            logger.info("Goal history rollup starting after legacy history id %s", legacy_max_id)
+
+        rows = db.query(
+            GoalProgressHistory.id,
+            GoalProgressHistory.user_id,
+            GoalProgressHistory.action,
+            GoalProgressHistory.category,
+            GoalProgressHistory.timestamp,
+            GoalProgressHistory.extra_data
+        ).filter(
+            GoalProgressHistory.id > watermark.last_id
+        ).order_by(GoalProgressHistory.id).limit(self.batch_size).all()
+        # Stop at the first row inside the grace window: an earlier id may still be uncommitted
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.GOAL_ROLLUP_GRACE_SECONDS)
+        settled = 0
+        while settled < len(rows) and (rows[settled].timestamp is None or rows[settled].timestamp < cutoff):
+            settled += 1
+        rows = rows[:settled]
+        if not rows:
+            db.commit()
+            return 0
+
+        totals: Dict[DailyKey, List[int]] = {}
+        for row in rows:
+            index = ACTION_COUNTS.get(row.action)
+            if index is None or row.timestamp is None:
+                continue
+            category = row.category or (row.extra_data or {}).get("category") or "uncategorized"
+            totals.setdefault((row.user_id, row.timestamp.date(), category), [0, 0, 0])[index] += 1
+
+        self._add_totals(db, totals)
+        watermark.last_id = rows[-1].id
+        db.commit()
+        return len(rows)
+
+    def _add_totals(self, db, totals: Dict[DailyKey, List[int]]) -> None:
+        if not totals:
+            return
+        values = [
+            {"user_id": user_id, "day": day, "category": category, **dict(zip(COUNT_COLUMNS, counts))}
+            for (user_id, day, category), counts in totals.items()
+        ]
+        insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if insert is not None:
+            upsert = insert(GoalProgressDaily).values(values)
+            upsert = upsert.on_conflict_do_update(
+                index_elements=[GoalProgressDaily.user_id, GoalProgressDaily.day, GoalProgressDaily.category],
+                set_={column: getattr(GoalProgressDaily, column) + getattr(upsert.excluded, column) for column in COUNT_COLUMNS}
+            )
+            db.execute(upsert)
+            return
+
+        for value in values:
+            existing = db.query(GoalProgressDaily).filter(
+                GoalProgressDaily.user_id == value["user_id"],
+                GoalProgressDaily.day == value["day"],
+                GoalProgressDaily.category == value["category"]
+            ).first()
+            if existing is None:
+                db.add(GoalProgressDaily(**value))
+            else:
+                for column in COUNT_COLUMNS:
+                    setattr(existing, column, (getattr(existing, column) or 0) + value[column])
+
+    def prune(self) -> int:
+        """Delete raw history past the retention window that has already been rolled up"""
+        cutoff = datetime.utcnow() - timedelta(days=settings.GOAL_HISTORY_RETENTION_DAYS)
+        db = self.session_factory()
+        try:
+            watermark = db.query(RollupWatermark.last_id).filter(RollupWatermark.name == WATERMARK_NAME).scalar() or 0
+            deleted = db.query(GoalProgressHistory).filter(
+                GoalProgressHistory.id <= watermark,
+                GoalProgressHistory.timestamp < cutoff
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception as e:
+            db.rollback()
+            logger.error("Goal history prune failed: %s", e)
+            return 0
+        finally:
+            db.close()
+
+    def start(self) -> Optional[threading.Thread]:
+        """Roll up now and then periodically on a daemon thread"""
+        interval = settings.GOAL_ROLLUP_INTERVAL_SECONDS
+        if interval <= 0 or self._thread is not None:
+            return None
+
+        def _loop():
+            stop = threading.Event()
+            while True:
+                processed = self.run_once()
+                if processed:
+                    logger.info("Rolled up %s goal history rows", processed)
+                if stop.wait(interval):
+                    break
+
+        self._thread = threading.Thread(target=_loop, name="goal-history-rollup", daemon=True)
+        self._thread.start()
+        return self._thread
+
+
+goal_history_rollup = GoalHistoryRollup()
@@ -0,0 +1,179 @@
+"""
+Deterministic fast path for predictable onboarding turns.
+
+Button echoes ("I've watched the video"), form submissions and short replies to
+a question the assistant just asked are answered from the same scripted
+responses the node prompts ask the LLM to produce. Anything open-ended falls
+through to the LLM.
+"""
+import re
+import json
+from typing import Dict, Any, List, Optional
+
+# -----------------------------------------------------------------------------
+# Templated responses (kept in sync with the wording in prompts.py)
+# -----------------------------------------------------------------------------
+
+NEXT_TASK_RESPONSES = {
+    "welcome_video": "Awesome! Let's get you inspired! Click the button below to watch: SHOW_VIDEO_BUTTON",
+    "company_policies": "Great job! Now let's dive into SAP's Company Policies. Click the button below: SHOW_COMPANY_POLICIES_BUTTON",
+    "employee_perks": "Ready for some exciting news? Let's explore SAP's amazing Employee Perks and Benefits! Click the button below: SHOW_EMPLOYEE_PERKS_BUTTON",
+    "culture_quiz": "Almost there! Let's test your SAP knowledge with our fun Culture Quiz! Click the button below: SHOW_CULTURE_QUIZ_BUTTON",
+}
+
+VIDEO_COMPLETED_RESPONSE = (
+    "Amazing! SAP's mission is to help the world run better and improve people's lives. "
+    "Our core values guide everything we do: Tell it like it is, Stay curious, Build bridges not silos, Run simple, and Keep promises. "
+    "How inspiring was that video? Any questions about SAP's mission and values before we explore our company policies?"
+)
+POLICIES_COMPLETED_RESPONSE = "You're doing fantastic! Any questions about the policies we just reviewed?"
+PERKS_COMPLETED_RESPONSE = "Pretty amazing perks, right? Any questions about the employee benefits?"
+QUIZ_COMPLETED_RESPONSE = "Incredible work! You've completed the overview section! Now let's move to personal information collection. → personal_info"
+KEEP_MOMENTUM_PREFIX = "Perfect! Let's keep the momentum going!"
+
+FORM_COMPLETE_RESPONSE = (
+    "Thank you for completing the form. Personal information collection complete! "
+    "SHOW_VIEW_PERSONAL_INFO_FORM_BUTTON Now let's move to account setup. → account_setup"
+)
+MISSING_FIELD_RESPONSES = {
+    "fullName": "I see your form is missing some information. What is your full name?",
+    "email": "I need your email address. What is your email address?",
+    "phone": "I need your phone number. What is your phone number?",
+    "address": "I need your home address. What is your home address?",
+    "emergencyContactName": "I need your emergency contact's name. What is their name?",
+    "emergencyContactPhone": "I need your emergency contact's phone number. What is their phone number?",
+    "relationship": "What is your relationship to your emergency contact?",
+    "employmentContract": "Please confirm you have read and agree to the employment contract.",
+    "nda": "Please confirm you have read and agree to the non-disclosure agreement.",
+    "taxWithholding": "Please confirm you understand the tax withholding information.",
+}
+
+VERIFICATION_SENT_RESPONSE = (
+    "Perfect! I've sent a 6-digit verification code to your {channel}. "
+    "For DEMO purposes, please enter any 6-digit number to complete the verification."
+)
+ACCOUNT_SETUP_COMPLETE_RESPONSE = (
+    "Fantastic! Two-factor authentication is now enabled. Your account setup is complete! "
+    "Your IT accounts are now secure and ready. Congratulations on completing the entire onboarding process! "
+    "You've done an amazing job! If you have any further questions or need assistance, feel free to reach out. "
+    "Welcome to the SAP team! ONBOARDING_COMPLETE"
+)
+
+# -----------------------------------------------------------------------------
+# Compiled rules
+# -----------------------------------------------------------------------------
+
+_I_HAVE = r"^\s*i(?:'ve|\s+have)?\s+"
+_VIDEO_DONE = re.compile(_I_HAVE + r"(?:watched|finished watching)\s+the\s+(?:welcome\s+)?video[.!]*\s*$", re.IGNORECASE)
+_POLICIES_DONE = re.compile(_I_HAVE + r"reviewed\s+(?:all\s+)?(?:the\s+)?company\s+policies[.!]*\s*$", re.IGNORECASE)
+_PERKS_DONE = re.compile(_I_HAVE + r"reviewed\s+(?:all\s+)?(?:the\s+)?employee\s+perks[.!]*\s*$", re.IGNORECASE)
+_QUIZ_DONE = re.compile(_I_HAVE + r"completed\s+the\s+culture\s+quiz[.!]*\s*$", re.IGNORECASE)
+_FORM_SUBMITTED = re.compile(_I_HAVE + r"submitted\s+the\s+personal\s+information\s+form\s+with\s+the\s+following\s+details:\s*(\{.*\})\s*$", re.IGNORECASE | re.DOTALL)
+
+_DECLINE = re.compile(r"^\s*(?:no|nope|nah|not really|no questions?|none|all good|i'?m good)(?:\s*,?\s*(?:thanks|thank you))?[.!]*\s*$", re.IGNORECASE)
+_AFFIRM = re.compile(r"^\s*(?:yes|yeah|yep|sure|ok|okay|ready|let'?s go|let'?s do it|i'?m ready)[.!]*\s*$", re.IGNORECASE)
+_VERIFICATION_CHANNEL = re.compile(r"^\s*(?:by\s+|via\s+|to\s+my\s+|my\s+)?(email|e-mail|phone|sms|text)[.!]*\s*$", re.IGNORECASE)
+_SIX_DIGITS = re.compile(r"^\s*\d{6}\s*$")
+
+WELCOME_TASK_ORDER = ["welcome_video", "company_policies", "employee_perks", "culture_quiz"]
+REQUIRED_FORM_FIELDS = [
+    "fullName", "email", "phone", "address", "emergencyContactName",
+    "emergencyContactPhone", "relationship", "employmentContract", "nda", "taxWithholding"
+]
+
+
+def _last_assistant_message(chat_history: List[Dict[str, Any]]) -> str:
+    """Get the most recent assistant message, lowercased"""
+    for msg in reversed(chat_history or []):
+        if msg.get("role") in ("assistant", "agent"):
+            return (msg.get("content") or "").lower()
+    return ""
+
+
+def _next_welcome_task(node_tasks: Dict[str, Any]) -> Optional[str]:
+    """First welcome overview task that is not completed yet"""
+    welcome_tasks = (node_tasks or {}).get("welcome_overview", {})
+    for task in WELCOME_TASK_ORDER:
+        if not welcome_tasks.get(task, False):
+            return task
+    return None
+
+
+def _route_welcome_overview(message: str, node_tasks: Dict[str, Any], last_assistant: str) -> Optional[Dict[str, str]]:
+    if _VIDEO_DONE.match(message):
+        return {"intent": "video_completed", "response": VIDEO_COMPLETED_RESPONSE}
+    if _POLICIES_DONE.match(message):
+        return {"intent": "policies_completed", "response": POLICIES_COMPLETED_RESPONSE}
+    if _PERKS_DONE.match(message):
+        return {"intent": "perks_completed", "response": PERKS_COMPLETED_RESPONSE}
+    if _QUIZ_DONE.match(message):
+        # The quiz itself is marked complete after this turn; with other tasks still open
+        # the scripted hand-off to personal_info would be wrong, so let the LLM answer
+        if _next_welcome_task(node_tasks) not in (None, "culture_quiz"):
+            return None
+        return {"intent": "quiz_completed", "response": QUIZ_COMPLETED_RESPONSE}
+
+    next_task = _next_welcome_task(node_tasks)
+    if next_task is None:
+        return None
+
+    # "No questions" right after the assistant offered to answer some
+    if "any questions" in last_assistant and _DECLINE.match(message):
+        return {
+            "intent": "declined_questions",
+            "response": f"{KEEP_MOMENTUM_PREFIX} {NEXT_TASK_RESPONSES[next_task]}"
+        }
+
+    # "Yes" right after the assistant asked whether they are ready for the next step
+    if "ready" in last_assistant and last_assistant.rstrip().endswith("?") and _AFFIRM.match(message):
+        return {"intent": "ready_for_next_task", "response": NEXT_TASK_RESPONSES[next_task]}
+
+    return None
+
+
+def _route_personal_info(message: str, node_tasks: Dict[str, Any], last_assistant: str) -> Optional[Dict[str, str]]:
+    match = _FORM_SUBMITTED.match(message)
+    if not match:
+        return None
+    try:
+        form_data = json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(form_data, dict):
+        return None
+
+    for field in REQUIRED_FORM_FIELDS:
+        value = form_data.get(field)
+        if value is None or value is False or (isinstance(value, str) and not value.strip()):
+            return {"intent": "form_missing_field", "response": MISSING_FIELD_RESPONSES[field]}
+
+    return {"intent": "form_completed", "response": FORM_COMPLETE_RESPONSE}
+
+
+def _route_account_setup(message: str, node_tasks: Dict[str, Any], last_assistant: str) -> Optional[Dict[str, str]]:
+    if "6-digit" in last_assistant and _SIX_DIGITS.match(message):
+        return {"intent": "verification_code", "response": ACCOUNT_SETUP_COMPLETE_RESPONSE}
+
+    if "which would you prefer" in last_assistant:
+        channel_match = _VERIFICATION_CHANNEL.match(message)
+        if channel_match:
+            channel = "phone" if channel_match.group(1).lower() in ("phone", "sms", "text") else "email"
+            return {"intent": "verification_channel", "response": VERIFICATION_SENT_RESPONSE.format(channel=channel)}
+
+    return None
+
+
+_NODE_ROUTERS = {
+    "welcome_overview": _route_welcome_overview,
+    "personal_info": _route_personal_info,
+    "account_setup": _route_account_setup,
+}
+
+
+def classify_onboarding_message(user_message: str, current_node: str, node_tasks: Dict[str, Any],
+                                chat_history: List[Dict[str, Any]] = None) -> Optional[Dict[str, str]]:
+    """Return {"intent", "response"} for predictable turns, or None if the LLM should answer"""
+    router = _NODE_ROUTERS.get(current_node)
+    if router is None or not user_message:
+        return None
+    return router(user_message, node_tasks or {}, _last_assistant_message(chat_history))
@@ -1,3 +1,4 @@
+import logging
 from typing import Dict, Any, List
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
@@ -13,27 +14,39 @@ from nodes import (
     get_default_tasks,
     OnboardingState
 )
+from prompt_builder import build_onboarding_messages
+from intent_router import classify_onboarding_message
+from checkpointing import create_checkpointer, thread_config
+from tracing import span, traced
+from llm_usage import usage_callback
 import re
 
+logger = logging.getLogger(__name__)
+
 class LangGraphConnection:
     """LangGraph connection manager for SAP onboarding"""
     
     def __init__(self, openai_api_key: str):
         self.llm = None
         if not openai_api_key or openai_api_key.strip() == "":
-            print("WARNING: OpenAI API key is not configured!")
-            print("Please set OPENAI_API_KEY in your .env file")
+            logger.warning("OpenAI API key is not configured!")
+            logger.info("Please set OPENAI_API_KEY in your .env file")
         else:
             try:
                 self.llm = ChatOpenAI(
                     model=settings.OPENAI_MODEL,
                     temperature=0.3,
-                    openai_api_key=openai_api_key
+                    openai_api_key=openai_api_key,
+                    callbacks=[usage_callback]
                 )
             except Exception as e:
-                print(f"Failed to initialize OpenAI LLM, falling back. Error: {e}")
+                logger.error("Failed to initialize OpenAI LLM, falling back. Error: %s", e)
                 self.llm = None
-        self.graph = self._create_graph()
+        # Per-user conversation checkpoints so turns resume without reloading history
+        self.checkpointer = create_checkpointer()
+        self.graph = self._create_graph(self.checkpointer)
+        # One-off runs (e.g. feedback analysis) must not leave threads behind
+        self.stateless_graph = self._create_graph(None) if self.checkpointer is not None else self.graph
     
     def _split_message(self, message: str) -> List[str]:
         """Split long messages into multiple shorter messages for better conversation flow"""
@@ -126,7 +139,7 @@ class LangGraphConnection:
         
         return "\n".join(status_lines)
     
-    def _create_graph(self) -> StateGraph:
+    def _create_graph(self, checkpointer=None) -> StateGraph:
         """Create the LangGraph workflow"""
         workflow = StateGraph(OnboardingState)
         
@@ -156,7 +169,7 @@ class LangGraphConnection:
         # Set entry point
         workflow.set_entry_point("process_message")
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
     
     def _get_fallback_response(self, user_message: str, current_node: str, chat_history: list) -> str:
         """Intelligent fallback responses when LLM is unavailable"""
@@ -177,8 +190,33 @@ class LangGraphConnection:
         # Default response
         return "I'm here to help with your SAP onboarding. What would you like to know?"
     
-    def process_chat(self, user_message: str, user_id: str, chat_history: list = None, db_state: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Process chat message using LangGraph"""
+    def checkpointed_history(self, user_id: str):
+        """Chat history window from the user's latest checkpoint, or None"""
+        if self.checkpointer is None:
+            return None
+        try:
+            values = self.graph.get_state(thread_config(user_id)).values
+        except Exception as e:
+            logger.error("Checkpoint read failed for user %s: %s", user_id, e)
+            return None
+        return values.get("chat_history") if values else None
+    
+    def clear_checkpoint(self, user_id: str) -> None:
+        """Drop the user's onboarding thread (used on restart)"""
+        if self.checkpointer is None:
+            return
+        try:
+            self.checkpointer.delete_thread(str(user_id))
+        except Exception as e:
+            logger.error("Checkpoint delete failed for user %s: %s", user_id, e)
+    
+    def process_chat(self, user_message: str, user_id: str, chat_history: list = None, db_state: Dict[str, Any] = None,
+                     use_checkpoint: bool = True, checkpoint_loaded: bool = False) -> Dict[str, Any]:
+        """Process chat message using LangGraph.
+
+        Pass checkpoint_loaded=True when db_state's chat_history already comes from
+        checkpointed_history(), so the checkpoint isn't read a second time.
+        """
         try:
             # Validate input
             if not user_message or not user_message.strip():
@@ -189,6 +227,8 @@ class LangGraphConnection:
             
             # Check for restart command first
             if clean_message.lower() in ['restart', 'reset', 'start over']:
+                if use_checkpoint:
+                    self.clear_checkpoint(user_id)
                 return {
                     "agent_response": "Welcome to SAP! Let's get you set up. I'll guide you step by step!",
                     "agent_messages": ["Welcome to SAP! Let's get you set up. I'll guide you step by step!"],
@@ -204,10 +244,23 @@ class LangGraphConnection:
                 current_node = db_state.get('current_node', 'welcome_overview')
                 node_tasks = db_state.get('node_tasks', get_default_tasks())
                 existing_chat_history = db_state.get('chat_history', [])
+                conversation_summary = db_state.get('conversation_summary')
             else:
                 current_node = 'welcome_overview'
                 node_tasks = get_default_tasks()
                 existing_chat_history = []
+                conversation_summary = None
+            
+            # Resume from the checkpointed window when there is one. Task progress and
+            # current node still come from the DB since /points and restart change them.
+            checkpointed_history = None
+            if use_checkpoint and not checkpoint_loaded:
+                checkpointed_history = self.checkpointed_history(user_id)
+            if checkpointed_history is not None:
+                existing_chat_history = checkpointed_history
+            
+            # Only a bounded window of history is needed for the prompt and graph state
+            recent_history = existing_chat_history[-settings.ONBOARDING_HISTORY_WINDOW:]
             
             # If already completed, provide completion responses
             if current_node == "onboarding_complete":
@@ -216,12 +269,17 @@ class LangGraphConnection:
                     "agent_messages": ["Thank you! Your onboarding is complete. If you have any questions or need assistance, feel free to reach out. Welcome to the SAP team!"],
                     "current_node": "onboarding_complete",
                     "node_tasks": node_tasks,
-                    "chat_history": existing_chat_history,
+                    "chat_history": recent_history,
                     "restarted": False
                 }
             
-            # Handle LLM processing before graph execution
-            ai_response = self._process_with_llm(clean_message, current_node, existing_chat_history, node_tasks)
+            # Answer predictable turns (button echoes, confirmations) without an LLM round trip
+            fast_path = classify_onboarding_message(clean_message, current_node, node_tasks, recent_history)
+            if fast_path:
+                ai_response = fast_path["response"]
+            else:
+                # Handle LLM processing before graph execution
+                ai_response = self._process_with_llm(clean_message, current_node, recent_history, node_tasks, conversation_summary)
             
             # Check for onboarding completion
             onboarding_complete = "ONBOARDING_COMPLETE" in ai_response
@@ -236,7 +294,7 @@ class LangGraphConnection:
                     "agent_messages": split_messages,
                     "current_node": "onboarding_complete",
                     "node_tasks": node_tasks,
-                    "chat_history": existing_chat_history,
+                    "chat_history": recent_history,
                     "restarted": False
                 }
             
@@ -247,13 +305,17 @@ class LangGraphConnection:
                 node_tasks=node_tasks,
                 total_points=0,
                 messages=[HumanMessage(content=clean_message), AIMessage(content=ai_response)],
-                chat_history=existing_chat_history,
+                chat_history=recent_history,
                 agent_response=ai_response,
                 restarted=False
             )
             
-            # Run the graph
-            result = self.graph.invoke(initial_state)
+            # Run the graph; checkpointed runs are saved under the user's thread
+            with span("graph.invoke"):
+                if use_checkpoint and self.checkpointer is not None:
+                    result = self.graph.invoke(initial_state, thread_config(user_id))
+                else:
+                    result = self.stateless_graph.invoke(initial_state)
             
             # Split the response into multiple messages
             split_messages = self._split_message(result["agent_response"])
@@ -281,41 +343,29 @@ class LangGraphConnection:
                 "restarted": False
             }
     
-    def _process_with_llm(self, user_message: str, current_node: str, chat_history: list, node_tasks: Dict[str, Any] = None) -> str:
+    @traced("llm.onboarding")
+    def _process_with_llm(self, user_message: str, current_node: str, chat_history: list, node_tasks: Dict[str, Any] = None,
+                          conversation_summary: str = None) -> str:
         """Process message with LLM or fallback responses"""
         if self.llm is None:
             return self._get_fallback_response(user_message, current_node, chat_history)
         try:
-            from prompts import get_system_prompt, get_user_prompt, format_chat_history, get_welcome_overview_prompt, get_personal_info_prompt, get_account_setup_prompt
-            
-            # Get current node prompt
-            if current_node == 'welcome_overview':
-                node_prompt = get_welcome_overview_prompt()
-            elif current_node == 'personal_info':
-                node_prompt = get_personal_info_prompt()
-            elif current_node == 'account_setup':
-                node_prompt = get_account_setup_prompt()
-            else:
-                node_prompt = ""
-            
-            # Create task completion status context
-            task_status = self._format_task_status(current_node, node_tasks)
-            
-            # Create full prompt with limited history (last 3 messages only)
-            system_prompt = get_system_prompt()
-            user_prompt = get_user_prompt(user_message)
-            
-            # Only include recent history to avoid message combination
-            recent_history = chat_history[-3:] if len(chat_history) > 3 else chat_history
-            history_context = format_chat_history(recent_history)
-            
-            full_prompt = f"{system_prompt}\n\n{node_prompt}\n\nCurrent Node: {current_node}\n\n{task_status}\n\n{history_context}{user_prompt}"
+            with span("prompt.build"):
+                # Create task completion status context
+                task_status = self._format_task_status(current_node, node_tasks)
+                
+                # Recent window verbatim; anything older is covered by the rolling summary
+                recent_history = chat_history[-settings.ONBOARDING_HISTORY_WINDOW:]
+                
+                # Static per-node prefix is precomputed; only the tail is built per request
+                messages = build_onboarding_messages(current_node, task_status, recent_history, user_message, conversation_summary)
             
             # Get AI response
-            response = self.llm.invoke([HumanMessage(content=full_prompt)])
+            with span("llm.invoke"):
+                response = self.llm.invoke(messages)
             return response.content.strip()
             
         except Exception as e:
-            print(f"LLM Error: {e}")  # Debug logging
+            logger.error("LLM Error: %s", e)
             # Fallback to intelligent responses when LLM fails
             return self._get_fallback_response(user_message, current_node, chat_history)
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""
+LLM token and cost accounting.
+
+Every LLM call records prompt, completion and cached tokens into an in-memory
+aggregate keyed by (route, model, user). A background thread flushes the
+aggregate to the llm_usage table in the performance DB every
+LLM_USAGE_FLUSH_SECONDS; the admin usage endpoint reads both.
+
+LangChain models report through `usage_callback` (pass it in `callbacks=`);
+raw OpenAI responses (requests / AsyncOpenAI) go through `record_openai_usage`.
+Route and user default to the current request (see tracing.py).
+"""
+import atexit
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from config import settings
+from db import PerformanceSessionLocal, LLMUsage
+from tracing import current_route, current_path_param
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens: (prompt, cached prompt, completion). Override with LLM_PRICING_JSON.
+DEFAULT_MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4": (30.00, 30.00, 60.00),
+    "gpt-4-turbo": (10.00, 10.00, 30.00),
+}
+
+_usage_user: ContextVar[Optional[str]] = ContextVar("usage_user", default=None)
+
+UsageKey = Tuple[str, str, Optional[str]]
+
+
+def _load_prices() -> Dict[str, Tuple[float, float, float]]:
+    prices = dict(DEFAULT_MODEL_PRICES)
+    if settings.LLM_PRICING_JSON:
+        try:
+            prices.update({model: tuple(values) for model, values in json.loads(settings.LLM_PRICING_JSON).items()})
+        except (ValueError, TypeError) as e:
+            logger.warning("Ignoring invalid LLM_PRICING_JSON: %s", e)
+    return prices
+
+
+MODEL_PRICES = _load_prices()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> Optional[float]:
+    """Estimated USD cost, or None for models without a known price"""
+    # Versioned names (gpt-4o-2024-08-06) fall back to the longest matching base model
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(name + "-")]
+    if not matches:
+        return None
+    prompt_price, cached_price, completion_price = MODEL_PRICES[max(matches, key=len)]
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * prompt_price + cached_tokens * cached_price + completion_tokens * completion_price) / 1_000_000
+
+
+@contextmanager
+def usage_user(user_id: Optional[str]):
+    """Attribute LLM usage in this block to a user not present in the route path"""
+    token = _usage_user.set(str(user_id) if user_id is not None else None)
+    try:
+        yield
+    finally:
+        _usage_user.reset(token)
+
+
+class UsageAccountant:
+    """Thread-safe in-memory usage aggregate with periodic flush to the performance DB"""
+
+    def __init__(self, session_factory=PerformanceSessionLocal):
+        self.session_factory = session_factory
+        self._totals: Dict[UsageKey, List[int]] = {}
+        self._period_start = datetime.utcnow()
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0,
+               route: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """Add one call's token counts to the aggregate"""
+        key = (
+            route or current_route(),
+            model or "unknown",
+            user_id or _usage_user.get() or current_path_param("user_id")
+        )
+        with self._lock:
+            totals = self._totals.setdefault(key, [0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += prompt_tokens or 0
+            totals[2] += completion_tokens or 0
+            totals[3] += cached_tokens or 0
+
+    def record_openai_usage(self, model: str, usage: Any, **kwargs) -> None:
+        """Record the `usage` block of an OpenAI chat completion (dict or SDK object)"""
+        if not usage:
+            return
+        if not isinstance(usage, dict):
+            usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+        details = usage.get("prompt_tokens_details") or {}
+        self.record(
+            model,
+            usage.get("prompt_tokens", 0),
+            usage.get("completion_tokens", 0),
+            details.get("cached_tokens", 0) or 0,
+            **kwargs
+        )
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Unflushed usage rows"""
+        with self._lock:
+            items = [(key, list(totals)) for key, totals in self._totals.items()]
+        return [_usage_row(key, totals) for key, totals in items]
+
+    def flush(self) -> int:
+        """Write the current aggregate to the llm_usage table and start a new period"""
+        with self._lock:
+            totals, self._totals = self._totals, {}
+            period_start, period_end = self._period_start, datetime.utcnow()
+            self._period_start = period_end
+        if not totals:
+            return 0
+
+        db = self.session_factory()
+        try:
+            db.add_all([
+                LLMUsage(
+                    period_start=period_start, period_end=period_end,
+                    route=route, model=model, user_id=user_id,
+                    calls=calls, prompt_tokens=prompt, completion_tokens=completion, cached_tokens=cached
+                )
+                for (route, model, user_id), (calls, prompt, completion, cached) in totals.items()
+            ])
+            db.commit()
+            return len(totals)
+        except Exception as e:
+            db.rollback()
+            logger.error("LLM usage flush failed, keeping totals for the next attempt: %s", e)
+            self._merge_back(totals)
+            return 0
+        finally:
+            db.close()
+
+    def _merge_back(self, totals: Dict[UsageKey, List[int]]) -> None:
+        with self._lock:
+            for key, values in totals.items():
+                current = self._totals.setdefault(key, [0, 0, 0, 0])
+                for i, value in enumerate(values):
+                    current[i] += value
+
+    def start_flusher(self) -> Optional[threading.Thread]:
+        """Flush periodically on a daemon thread, and once more at exit"""
+        interval = settings.LLM_USAGE_FLUSH_SECONDS
+        if interval <= 0 or self._flusher is not None:
+            return None
+
+        def _loop():
+            stop = threading.Event()
+            while not stop.wait(interval):
+                self.flush()
+
+        self._flusher = threading.Thread(target=_loop, name="llm-usage-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+        return self._flusher
+
+
+def _usage_row(key: UsageKey, totals: List[int]) -> Dict[str, Any]:
+    route, model, user_id = key
+    calls, prompt, completion, cached = totals
+    return {
+        "route": route, "model": model, "user_id": user_id, "calls": calls,
+        "prompt_tokens": prompt, "completion_tokens": completion, "cached_tokens": cached,
+    }
+
+
+usage_accountant = UsageAccountant()
+record_openai_usage = usage_accountant.record_openai_usage
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """LangChain callback that records token usage for every chat model call"""
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        recorded = False
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage:
+                    continue
+                details = usage.get("input_token_details") or {}
+                model = (getattr(message, "response_metadata", None) or {}).get("model_name", "unknown")
+                usage_accountant.record(
+                    model, usage.get("input_tokens", 0), usage.get("output_tokens", 0), details.get("cache_read", 0) or 0
+                )
+                recorded = True
+
+        # Older integrations only report an aggregate in llm_output
+        if not recorded and response.llm_output:
+            token_usage = response.llm_output.get("token_usage")
+            if token_usage:
+                record_openai_usage(response.llm_output.get("model_name", "unknown"), token_usage)
+
+
+usage_callback = LLMUsageCallback()
+
+
+def summarize_usage(rows: List[Dict[str, Any]], group_by: List[str]) -> List[Dict[str, Any]]:
+    """Merge usage rows on the given dimensions and attach an estimated cost"""
+    merged: Dict[Tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = tuple(row[dim] for dim in group_by)
+        entry = merged.setdefault(key, {
+            **{dim: row[dim] for dim in group_by},
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "estimated_cost_usd": 0.0,
+        })
+        for field in ("calls", "prompt_tokens", "completion_tokens", "cached_tokens"):
+            entry[field] += row[field] or 0
+        cost = estimate_cost(row["model"], row["prompt_tokens"] or 0, row["completion_tokens"] or 0, row["cached_tokens"] or 0)
+        if cost is not None:
+            entry["estimated_cost_usd"] += cost
+
+    for entry in merged.values():
+        entry["estimated_cost_usd"] = round(entry["estimated_cost_usd"], 6)
+        entry["cache_hit_rate"] = round(entry["cached_tokens"] / entry["prompt_tokens"], 4) if entry["prompt_tokens"] else 0.0
+    return sorted(merged.values(), key=lambda entry: entry["prompt_tokens"] + entry["completion_tokens"], reverse=True)
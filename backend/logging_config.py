@@ -0,0 +1,124 @@
+"""
+Application logging setup.
+
+Modules log through the standard library (`logger = logging.getLogger(__name__)`).
+setup_logging() routes every record through a QueueHandler, so request threads
+only enqueue; a single QueueListener thread formats and writes to stdout.
+
+Configured from the environment (see config.py):
+- LOG_LEVEL:        root level, e.g. INFO
+- LOG_LEVELS:       per-module overrides, e.g. "db=WARNING,routers.career=DEBUG"
+- LOG_FORMAT:       "text" (key=value) or "json"
+- LOG_SAMPLE_RATE:  fraction of hot-path records kept, for records logged with extra=SAMPLED
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from config import settings
+
+# Pass as `extra=SAMPLED` on hot-path debug logs so they are kept at LOG_SAMPLE_RATE
+SAMPLED = {"sampled": True}
+
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+_listener: Optional[QueueListener] = None
+
+
+class SamplingFilter(logging.Filter):
+    """Drop a share of records marked as sampled; everything else passes"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = max(0.0, min(1.0, rate))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class StructuredFormatter(logging.Formatter):
+    """Render records as JSON or key=value text, including any `extra` fields"""
+
+    def __init__(self, fmt: str = "text"):
+        super().__init__()
+        self.json = fmt == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields.update({k: v for k, v in vars(record).items() if k not in _STANDARD_ATTRS})
+        if record.exc_info:
+            fields["exc"] = self.formatException(record.exc_info)
+
+        if self.json:
+            return json.dumps(fields, default=str)
+        return " ".join(
+            f"{key}={json.dumps(value, default=str) if key == 'msg' or ' ' in str(value) else value}"
+            for key, value in fields.items()
+        )
+
+
+class StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback as an `exc` field for StructuredFormatter.
+
+    The base prepare() folds the traceback into msg and clears exc_info, which
+    would leave the listener's formatter nothing to put under `exc`.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc = logging.Formatter().formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg = record.message
+        # Same clean-up as the base class: args and exc_info may not be safe to keep
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+
+def parse_module_levels(spec: str) -> Dict[str, str]:
+    """Parse "module=LEVEL,other=LEVEL" into a dict"""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging() -> None:
+    """Install the queue-based handler on the root logger (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(StructuredFormatter(settings.LOG_FORMAT.lower()))
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, level in parse_module_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
@@ -1,23 +1,19 @@
-from fastapi import FastAPI, Depends, HTTPException, Body 
+from fastapi import FastAPI, Depends, HTTPException, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
+import asyncio
 import json
 import os
+import logging
+from logging_config import setup_logging, SAMPLED
 
-def validate_user_id(user_id: str, db: Session) -> int:
-    """Validate that user_id is a valid integer and user exists"""
-    try:
-        user_id_int = int(user_id)
-        # Verify the user exists
-        user = db.query(User).filter(User.id == user_id_int).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user_id_int
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid user_id format. Must be an integer.")
+# Route all logging through the non-blocking queue handler before anything else logs
+setup_logging()
+logger = logging.getLogger(__name__)
 
 def _format_response(response: str) -> str:
     """Format response for better readability with proper spacing"""
@@ -40,12 +36,20 @@ def _format_response(response: str) -> str:
     return formatted_response
 from config import settings
 from langgraph_connection import LangGraphConnection
+from checkpointing import start_checkpoint_maintenance
+from conversation_memory import ConversationSummarizer
+from tracing import TracingMiddleware, metrics_response
+from llm_usage import usage_accountant, usage_user, summarize_usage
+from progress_jobs import progress_jobs, job_view, FINISHED_STATUSES
+from goal_history import goal_history_rollup
+from team_overview import team_overview_cache
+from services.catalog import preload_catalogs
 from prompts import PERFORMANCE_FEEDBACK_ANALYSIS, PERFORMANCE_FEEDBACK_ANALYSIS_PROMPT, REAL_TIME_FEEDBACK_SUGGESTIONS_PROMPT, FEEDBACK_DRAFT_GENERATION_PROMPT
 from langchain_core.messages import HumanMessage
 from db import (
     get_db, create_tables, UserState, ChatMessage, User, PerformanceFeedback,
-    get_user_state, create_user_state, get_chat_messages,
-    save_chat_message, update_user_state_timestamp, calculate_points_for_task,
+    get_user_state, get_chat_messages, get_recent_chat_messages, load_user_context,
+    save_chat_message, calculate_points_for_task,
     get_user_by_user_id, create_user, get_user_direct_reports,
     create_performance_feedback, get_performance_feedback_by_employee,
     get_performance_feedback_by_manager, update_performance_feedback,
@@ -55,13 +59,14 @@ from db import (
     get_performance_db, create_performance_tables, PerformanceUser, PerformanceGoal, ProgressUpdate,
     create_performance_user, create_performance_goal, get_performance_user_by_id,
     get_performance_summary, get_performance_direct_reports, get_performance_goals_by_employee,
-    save_progress_update_performance, get_latest_progress_goals_performance, get_progress_history_performance,
-    update_user_goals_performance
+    get_latest_progress_goals_performance, get_progress_history_performance,
+    update_user_goals_performance, get_llm_usage_rows, get_goal_progress_daily, get_team_overview,
+    get_org_subtree, get_management_chain, get_org_subtree_aggregates
 )
 from routers.auth import router as auth_router
 from routers.skills import router as skills_router
-from routers.career import router as career_router
-from middleware.auth_middleware import get_current_active_user
+from routers.career import router as career_router, start_coach_precompute
+from middleware.auth_middleware import get_current_active_user, get_current_superuser
 from models.user import User
 import os
 from dotenv import load_dotenv
@@ -70,9 +75,21 @@ from database import create_tables
 try:
     load_dotenv()
 except Exception as e:
-    print(f"Warning: Could not load .env file: {e}")
+    logger.warning("Could not load .env file: %s", e)
     # Continue without .env file
 
+def get_user_context(user_id: str, db: Session = Depends(get_db)) -> UserState:
+    """Validate user_id and load (or create) the user's state in a single query"""
+    try:
+        user_pk = int(user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user_id format. Must be an integer.")
+    
+    user_state = load_user_context(db, user_pk)
+    if user_state is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_state
+
 app = FastAPI(
     title="AutomateAI API", 
     description="AI-powered employee development platform",
@@ -80,7 +97,7 @@ app = FastAPI(
 )
 
 # CORS middleware - MUST be added before any routes
-print(f"Configuring CORS with allowed origins: {settings.ALLOWED_ORIGINS}")
+logger.info("Configuring CORS with allowed origins: %s", settings.ALLOWED_ORIGINS)
 
 # CORS configuration that works with credentials
 app.add_middleware(
@@ -112,6 +129,9 @@ app.add_middleware(
     ],
 )
 
+# Per-route request latency and stage spans, exported on /metrics
+app.add_middleware(TracingMiddleware)
+
 # Add explicit CORS handler for all routes
 @app.middleware("http")
 async def add_cors_headers(request, call_next):
@@ -211,6 +231,7 @@ app.include_router(career_router)
 
 # HR Agent
 hr_agent = LangGraphConnection(settings.OPENAI_API_KEY)
+conversation_summarizer = ConversationSummarizer(hr_agent.llm)
 
 # Models
 class ChatRequest(BaseModel):
@@ -357,6 +378,33 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/api/admin/llm-usage")
+def get_llm_usage(
+    hours: int = 24,
+    group_by: str = "route,model",
+    current_user: User = Depends(get_current_superuser),
+    db: Session = Depends(get_performance_db)
+):
+    """LLM token usage and estimated cost, grouped by any of route, model, user_id"""
+    dimensions = [dim.strip() for dim in group_by.split(",") if dim.strip()]
+    invalid = [dim for dim in dimensions if dim not in ("route", "model", "user_id")]
+    if invalid or not dimensions:
+        raise HTTPException(status_code=400, detail="group_by must be a comma-separated subset of route, model, user_id")
+    
+    since = datetime.utcnow() - timedelta(hours=max(1, hours))
+    # Flushed rows plus whatever is still buffered in memory
+    rows = get_llm_usage_rows(db, since) + usage_accountant.snapshot()
+    return {
+        "since": since.isoformat(),
+        "group_by": dimensions,
+        "usage": summarize_usage(rows, dimensions)
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Prometheus metrics: request and stage latency histograms"""
+    return metrics_response()
+
 @app.get("/api/cors-debug")
 def cors_debug():
     """Debug endpoint to check CORS configuration"""
@@ -371,16 +419,62 @@ def cors_debug():
 def on_startup() -> None:
     create_tables()
     
+    # Evict idle onboarding threads and compact long ones in the background
+    start_checkpoint_maintenance(hr_agent.graph, hr_agent.checkpointer)
+    
+    # Periodically persist LLM token usage to the performance database
+    usage_accountant.start_flusher()
+    
+    # Parse the job and career oracle catalogs once, before the first request
+    preload_catalogs()
+    
+    # Warm the career coach cache with common quiz answer combinations, if configured
+    start_coach_precompute()
+    
     # Run database migration for personal_goals column
     try:
         from migrate_personal_goals import migrate_personal_goals
         migrate_personal_goals()
     except Exception as e:
-        print(f"Migration warning: {e}")
+        logger.warning("Migration warning: %s", e)
+    
+    # Run database migration for conversation summary columns
+    try:
+        from migrate_conversation_summary import migrate_conversation_summary
+        migrate_conversation_summary()
+    except Exception as e:
+        logger.warning("Migration warning: %s", e)
     
     # Initialize performance tables
     create_performance_tables()
     
+    # Add the goal history category column and composite index to existing databases
+    try:
+        from migrate_goal_history import migrate_goal_history
+        migrate_goal_history()
+    except Exception as e:
+        logger.warning("Migration warning: %s", e)
+    
+    # Add the per-employee summary and team overview indexes to existing databases
+    try:
+        from migrate_performance_indexes import migrate_performance_indexes
+        migrate_performance_indexes()
+    except Exception as e:
+        logger.warning("Migration warning: %s", e)
+    
+    # Add the progress job id column and unique index to existing progress_updates tables
+    try:
+        from migrate_progress_updates import migrate_progress_updates
+        migrate_progress_updates()
+    except Exception as e:
+        logger.warning("Migration warning: %s", e)
+    
+    # Pick up progress analysis jobs a previous process left unfinished
+    progress_jobs.resume_pending()
+    
+    # Roll goal progress history up into daily aggregates for analytics
+    goal_history_rollup.start()
+    
     # Create performance users if they don't exist
     try:
         db_gen = get_performance_db()
@@ -389,7 +483,7 @@ def on_startup() -> None:
         # Check if users already exist
         existing_users = db.query(PerformanceUser).count()
         if existing_users == 0:
-            print("Creating performance users...")
+            logger.info("Creating performance users...")
             
             # Create the new users as specified
             users_to_create = [
@@ -450,7 +544,7 @@ def on_startup() -> None:
                     hire_date=user_data["hire_date"]
                 )
                 created_users[user_data["user_id"]] = user
-                print(f"Created user: {user.name} (ID: {user.id})")
+                logger.info("Created user: %s (ID: %s)", user.name, user.id)
             
             # Set manager relationships - Sarah Johnson (user002) is the manager
             manager_id = created_users["user002"].id
@@ -459,25 +553,18 @@ def on_startup() -> None:
                     user = created_users[user_id]
                     user.manager_id = manager_id
                     db.commit()
-                    print(f"Set {user.name} as report to Sarah Johnson")
+                    logger.info("Set %s as report to Sarah Johnson", user.name)
             
-            print("Performance users created successfully!")
+            logger.info("Performance users created successfully!")
         else:
-            print(f"Performance database already has {existing_users} users.")
+            logger.info("Performance database already has %s users.", existing_users)
         
         db.close()
     except Exception as e:
-        print(f"Error creating performance users: {e}")
+        logger.error("Error creating performance users: %s", e)
 
 @app.get("/api/user/{user_id}/state")
-def get_user_state_endpoint(user_id: str, db: Session = Depends(get_db)):
-    # Validate that user_id is a valid integer
-    validate_user_id(user_id, db)
-    
-    user_state = get_user_state(db, user_id)
-    if not user_state:
-        user_state = create_user_state(db, user_id)
-    
+def get_user_state_endpoint(user_id: str, user_state: UserState = Depends(get_user_context), db: Session = Depends(get_db)):
     chat_messages = get_chat_messages(db, user_id)
     chat_message_responses = [
         ChatMessageResponse(
@@ -529,12 +616,7 @@ def get_leaderboard(limit: int = 10, current_user: User = Depends(get_current_ac
     return LeaderboardResponse(entries=entries)
 
 @app.get("/api/user/{user_id}/rank", response_model=UserRankResponse)
-def get_user_rank(user_id: str, db: Session = Depends(get_db)):
-    # Validate that user_id is a valid integer
-    validate_user_id(user_id, db)
-    user_state = get_user_state(db, user_id)
-    if not user_state:
-        user_state = create_user_state(db, user_id)
+def get_user_rank(user_id: str, user_state: UserState = Depends(get_user_context), db: Session = Depends(get_db)):
     user_points = user_state.total_points or 0
     # Rank = number of users with higher points + 1
     higher_count = db.query(UserState).filter(UserState.total_points > user_points).count()
@@ -542,26 +624,22 @@ def get_user_rank(user_id: str, db: Session = Depends(get_db)):
     return UserRankResponse(user_id=user_id, total_points=user_points, rank=rank)
 
 @app.post("/api/user/{user_id}/chat")
-def handle_chat(user_id: str, request: ChatRequest, db: Session = Depends(get_db)):
-    print(f"Received chat request for user {user_id}: {request}")
-    
-    # Validate that user_id is a valid integer
-    validate_user_id(user_id, db)
-    
-    # Ensure user state exists (user_id should be integer as string)
-    user_state = get_user_state(db, user_id)
-    if not user_state:
-        user_state = create_user_state(db, user_id)
+def handle_chat(user_id: str, request: ChatRequest, user_state: UserState = Depends(get_user_context),
+                db: Session = Depends(get_db)):
+    logger.debug("Received chat request for user %s: %s", user_id, request, extra=SAMPLED)
     
-    # Get existing chat messages
-    existing_messages = get_chat_messages(db, user_id)
-    chat_history = [{"role": msg.role, "content": msg.content} for msg in existing_messages]
+    # The agent resumes from its checkpoint; only seed the window from the DB for new threads
+    chat_history = hr_agent.checkpointed_history(user_id)
+    if chat_history is None:
+        existing_messages = get_recent_chat_messages(db, user_id, settings.ONBOARDING_HISTORY_WINDOW)
+        chat_history = [{"role": msg.role, "content": msg.content} for msg in existing_messages]
     
     # Prepare database state for agent
     db_state = {
         'current_node': user_state.current_node,
         'node_tasks': user_state.node_tasks,
-        'chat_history': chat_history
+        'chat_history': chat_history,
+        'conversation_summary': user_state.conversation_summary
     }
     
     # Save user message
@@ -571,7 +649,7 @@ def handle_chat(user_id: str, request: ChatRequest, db: Session = Depends(get_db
     points_earned = 0
     
     # Get agent response with database state
-    result = hr_agent.process_chat(request.message, user_id, chat_history, db_state)
+    result = hr_agent.process_chat(request.message, user_id, chat_history, db_state, checkpoint_loaded=True)
     
     # Handle restart case
     if result.get("restarted"):
@@ -582,6 +660,9 @@ def handle_chat(user_id: str, request: ChatRequest, db: Session = Depends(get_db
         # Reset user state
         user_state.current_node = "welcome_overview"
         user_state.total_points = 0
+        user_state.conversation_summary = None
+        user_state.summary_last_message_id = 0
+        user_state.turns_since_summary = 0
         user_state.node_tasks = {
             "welcome_overview": {
                 "welcome_video": False,
@@ -619,6 +700,7 @@ def handle_chat(user_id: str, request: ChatRequest, db: Session = Depends(get_db
         user_state.current_node
     )
     user_state.personal_goals = updated_goals
+    turns_since_summary = conversation_summarizer.record_turn(user_state)
     
     db.commit()
     
@@ -627,8 +709,12 @@ def handle_chat(user_id: str, request: ChatRequest, db: Session = Depends(get_db
     for message in agent_messages:
         save_chat_message(db, user_id, "assistant", message)
     
-    # Update user state timestamp
-    update_user_state_timestamp(db, user_id)
+    # Refresh the rolling summary in the background once enough turns have passed
+    conversation_summarizer.maybe_schedule(user_id, turns_since_summary)
+    
+    # Update user state timestamp (state is already loaded; no need to query it again)
+    user_state.updated_at = datetime.utcnow()
+    db.commit()
     
     # Get updated chat messages
     updated_messages = get_chat_messages(db, user_id)
@@ -653,19 +739,13 @@ def handle_chat(user_id: str, request: ChatRequest, db: Session = Depends(get_db
 
 
 @app.post("/api/user/{user_id}/points")
-def award_points(user_id: str, request: AwardPointsRequest, db: Session = Depends(get_db)):
+def award_points(user_id: str, request: AwardPointsRequest, user_state: UserState = Depends(get_user_context),
+                 db: Session = Depends(get_db)):
     """Award points for a specific task or message-based detection.
 
     Allows frontend to explicitly award points for actions like completing
     the personal information form or finishing the career coach quiz.
     """
-    # Validate that user_id is a valid integer (and user exists)
-    validate_user_id(user_id, db)
-
-    user_state = get_user_state(db, user_id)
-    if not user_state:
-        user_state = create_user_state(db, user_id)
-
     # Prefer explicit task name if provided and enforce idempotency using node_tasks
     task_name = (request.task_name or '').strip()
     message = request.message or ''
@@ -957,15 +1037,16 @@ def debug_chat_request(request_data: dict):
 def standalone_chat(request: StandaloneChatRequest):
     """Standalone chat endpoint with RAG - not connected to onboarding system"""
     try:
-        print(f"RAG chat request from {request.user_id}: {request.message}")
-        print(f"Request data: {request.dict()}")
+        logger.debug("RAG chat request from %s: %s", request.user_id, request.message, extra=SAMPLED)
+        logger.debug("Request data: %s", request.dict(), extra=SAMPLED)
         
         # Import RAG service
         from services.rag_service import get_rag_service
         
         # Get RAG service and query with score threshold
         rag_service = get_rag_service()
-        rag_result = rag_service.query(request.message, k=3, score_threshold=1.3)
+        with usage_user(request.user_id):
+            rag_result = rag_service.query(request.message, k=3, score_threshold=1.3)
         
         if "error" in rag_result:
             # Use the RAG service's error message as a safe, static fallback
@@ -997,7 +1078,7 @@ def standalone_chat(request: StandaloneChatRequest):
         }
         
     except Exception as e:
-        print(f"Error in RAG chat: {str(e)}")
+        logger.error("Error in RAG chat: %s", str(e))
         return {
             "response": "I'm here to help with SAP career development, skills assessment, and general questions. What would you like to know?",
             "user_id": request.user_id,
@@ -1191,7 +1272,7 @@ def generate_ai_summary(feedback_id: int, db: Session = Depends(get_performance_
     analysis_prompt = PERFORMANCE_FEEDBACK_ANALYSIS.format(feedback_text=feedback.feedback_text)
     
     try:
-        result = hr_agent.process_chat(analysis_prompt, f"feedback_{feedback_id}", [], {})
+        result = hr_agent.process_chat(analysis_prompt, f"feedback_{feedback_id}", [], {}, use_checkpoint=False)
         ai_response = result["agent_response"]
         
         # Parse the AI response (text format with sections)
@@ -1252,12 +1333,12 @@ def generate_ai_summary(feedback_id: int, db: Session = Depends(get_performance_
 def analyze_feedback(request: FeedbackAnalysisRequest, db: Session = Depends(get_performance_db)):
     """Analyze feedback text and provide AI-powered suggestions"""
     try:
-        print(f"🔍 Analyzing feedback: {request.feedback_text[:100]}...")
+        logger.info("Analyzing feedback: %s...", request.feedback_text[:100])
        
         # Use direct LLM call for feedback analysis (bypass onboarding agent)
         analysis_prompt = PERFORMANCE_FEEDBACK_ANALYSIS_PROMPT.format(feedback_text=request.feedback_text)
        
-        print(f"📝 Sending prompt to LLM...")
+        logger.debug("Sending prompt to LLM...", extra=SAMPLED)
         # Call LLM directly instead of using hr_agent.process_chat()
         if hr_agent.llm is None:
             raise Exception("LLM not initialized - check API key configuration")
@@ -1266,13 +1347,13 @@ def analyze_feedback(request: FeedbackAnalysisRequest, db: Session = Depends(get
         response = hr_agent.llm.invoke([HumanMessage(content=analysis_prompt)])
         ai_response = response.content.strip()
        
-        print(f"🤖 LLM Response: {ai_response[:200]}...")
+        logger.debug("LLM Response: %s...", ai_response[:200], extra=SAMPLED)
        
         # Try to parse JSON response
         try:
             # First try direct JSON parsing
             analysis_data = json.loads(ai_response)
-            print(f"✅ Successfully parsed JSON response")
+            logger.info("Successfully parsed JSON response")
             return analysis_data
         except json.JSONDecodeError:
             # Try to extract JSON from markdown code blocks
@@ -1283,7 +1364,7 @@ def analyze_feedback(request: FeedbackAnalysisRequest, db: Session = Depends(get
                 if json_match:
                     json_content = json_match.group(1).strip()
                     analysis_data = json.loads(json_content)
-                    print(f"✅ Successfully parsed JSON from markdown block")
+                    logger.info("Successfully parsed JSON from markdown block")
                     return analysis_data
                
                 # Look for JSON within ``` ... ``` blocks (without json specifier)
@@ -1293,12 +1374,12 @@ def analyze_feedback(request: FeedbackAnalysisRequest, db: Session = Depends(get
                     # Check if it looks like JSON (starts with { and ends with })
                     if json_content.startswith('{') and json_content.endswith('}'):
                         analysis_data = json.loads(json_content)
-                        print(f"✅ Successfully parsed JSON from code block")
+                        logger.info("Successfully parsed JSON from code block")
                         return analysis_data
                        
             except json.JSONDecodeError as json_err:
-                print(f"❌ JSON parsing failed even after markdown extraction: {json_err}")
-                print(f"📄 Raw response: {ai_response}")
+                logger.error("JSON parsing failed even after markdown extraction: %s", json_err)
+                logger.debug("Raw response: %s", ai_response, extra=SAMPLED)
            
             # If JSON parsing fails, return structured response
             return {
@@ -1398,8 +1479,8 @@ def get_realtime_suggestions(request: RealTimeFeedbackRequest, db: Session = Dep
 def generate_draft_feedback(request: DraftFeedbackRequest, db: Session = Depends(get_performance_db)):
     """Generate AI-drafted feedback text for managers to copy and use"""
     try:
-        print(f"Generating draft feedback for {request.employee_name}...")
-        print(f"AI Tips received: {request.ai_tips}")
+        logger.info("Generating draft feedback for %s...", request.employee_name)
+        logger.debug("AI Tips received: %s", request.ai_tips, extra=SAMPLED)
         
         # Use direct LLM call for draft generation
         draft_prompt = FEEDBACK_DRAFT_GENERATION_PROMPT.format(
@@ -1408,7 +1489,7 @@ def generate_draft_feedback(request: DraftFeedbackRequest, db: Session = Depends
             ai_tips=request.ai_tips or "Focus on teamwork and leadership examples. Keep tone encouraging but concise."
         )
         
-        print(f"Sending draft prompt to LLM...")
+        logger.debug("Sending draft prompt to LLM...", extra=SAMPLED)
         # Call LLM directly
         if hr_agent.llm is None:
             raise Exception("LLM not initialized - check API key configuration")
@@ -1417,7 +1498,7 @@ def generate_draft_feedback(request: DraftFeedbackRequest, db: Session = Depends
         response = hr_agent.llm.invoke([HumanMessage(content=draft_prompt)])
         draft_text = response.content.strip()
         
-        print(f"Generated draft feedback: {draft_text[:100]}...")
+        logger.info("Generated draft feedback: %s...", draft_text[:100])
         
         return {
             "draft_feedback": draft_text,
@@ -1427,198 +1508,78 @@ def generate_draft_feedback(request: DraftFeedbackRequest, db: Session = Depends
         }
         
     except Exception as e:
-        print(f"Error generating draft feedback: {str(e)}")
+        logger.error("Error generating draft feedback: %s", str(e))
         return {"error": f"Failed to generate draft feedback: {str(e)}"}
 
-@app.post("/api/progress/update/{user_id}")
-def update_progress(user_id: str, request: ProgressUpdateRequest, db: Session = Depends(get_performance_db)):
-    """Update employee progress using GPT-4 with intelligent goal analysis"""
+@app.post("/api/progress/update/{user_id}", status_code=202)
+def update_progress(user_id: str, request: ProgressUpdateRequest):
+    """Queue GPT-4 analysis of a progress update and return a keyword-based estimate right away.
+    The final goals and insight arrive via /api/progress/jobs/{job_id} or its /events stream."""
     try:
-        # Create an intelligent progress analysis prompt for GPT-4
-        smart_progress_prompt = f"""
-You are an expert HR analyst and performance coach with deep understanding of employee development and goal tracking. Your task is to intelligently analyze employee progress updates and provide accurate goal assessments.
-
-EMPLOYEE PROGRESS UPDATE: "{request.progress_text}"
-
-CURRENT GOAL STATUS: {request.current_goals}
-
-ANALYSIS FRAMEWORK:
-As an expert analyst, you must:
-
-1. **CONTEXTUAL UNDERSTANDING**: Analyze the progress text for:
-   - Specific achievements mentioned
-   - Skills developed or demonstrated
-   - Tasks completed or milestones reached
-   - Learning activities undertaken
-   - Challenges overcome or areas of improvement
-
-2. **GOAL MAPPING**: Intelligently map progress to the two available goals:
-   - **TRAINING GOAL**: Any learning, skill development, course completion, certification, knowledge acquisition, professional development activities
-   - **ONBOARDING GOAL**: Company-specific tasks, policy understanding, system access, orientation activities, company culture integration, administrative tasks
-
-3. **PROGRESS CALCULATION**: Calculate realistic progress increases:
-   - Small achievements: 5-15% increase
-   - Moderate achievements: 15-30% increase  
-   - Major milestones: 30-50% increase
-   - Never exceed 100% or decrease progress
-   - Consider current progress levels when calculating increases
-
-4. **INTELLIGENT INSIGHTS**: Generate personalized, encouraging insights that:
-   - Acknowledge specific achievements mentioned
-   - Provide constructive feedback
-   - Suggest next steps or areas for continued growth
-   - Maintain an encouraging, professional tone
-
-OUTPUT REQUIREMENTS:
-You must respond with ONLY valid JSON in this exact format:
-
-{{
-  "goals": [
-    {{"id": 1, "name": "Training", "progress": [calculated_progress], "target": 100}},
-    {{"id": 2, "name": "Onboarding", "progress": [calculated_progress], "target": 100}}
-  ],
-  "chart_data": {{
-    "type": "bar",
-    "labels": ["Training", "Onboarding"],
-    "datasets": [{{
-      "label": "Progress %",
-      "data": [training_progress, onboarding_progress],
-      "backgroundColor": ["#3498db", "#2980b9"]
-    }}]
-  }},
-  "insight": "[Personalized, encouraging insight based on the specific achievements mentioned]"
-}}
-
-CRITICAL: Output ONLY the JSON response, no additional text or explanations.
-"""
-
-        # Use GPT-4 directly for better analysis
-        from langchain_openai import ChatOpenAI
-        
-        # Initialize GPT-4 model for performance analysis
-        gpt4_model = ChatOpenAI(
-            model=settings.PERFORMANCE_OPENAI_MODEL,  # Uses GPT-4
-            temperature=0.2,  # Lower temperature for more consistent analysis
-            openai_api_key=settings.OPENAI_API_KEY
-        )
-        
-        # Get AI response
-        response = gpt4_model.invoke([HumanMessage(content=smart_progress_prompt)])
-        ai_response = response.content
-        
-        # Try to parse JSON response
-        try:
-            progress_data = json.loads(ai_response)
-            
-            # Validate the response structure
-            if "goals" in progress_data and "chart_data" in progress_data and "insight" in progress_data:
-                # Save progress update to performance database
-                try:
-                    print(f"Attempting to save progress update for user: {user_id}")
-                    print(f"Progress text: {request.progress_text}")
-                    print(f"Updated goals: {progress_data['goals']}")
-                    
-                    saved_update = save_progress_update_performance(
-                        db=db,
-                        user_id=user_id,
-                        progress_text=request.progress_text,
-                        updated_goals=progress_data["goals"],
-                        ai_insight=progress_data["insight"]
-                    )
-                    print(f"Successfully saved progress update with ID: {saved_update.id}")
-                except Exception as db_error:
-                    print(f"Database save failed: {db_error}")
-                    import traceback
-                    traceback.print_exc()
-                    # Continue even if database save fails
-                
-                # Return the progress data - frontend will handle state updates
-                return progress_data
-            else:
-                raise ValueError("Invalid response structure")
-                
-        except (json.JSONDecodeError, ValueError) as e:
-            # If JSON parsing fails, return a structured response based on input analysis
-            return {
-                "goals": request.current_goals,  # Keep current goals as fallback
-                "chart_data": {
-                    "type": "bar",
-                    "labels": [goal["name"] for goal in request.current_goals],
-                    "datasets": [{
-                        "label": "Progress %",
-                        "data": [goal["progress"] for goal in request.current_goals],
-                        "backgroundColor": ["#3498db", "#2980b9"]
-                    }]
-                },
-                "insight": "Progress update received! Keep up the great work on your goals."
-            }
-        
+        job = progress_jobs.enqueue(user_id, request.progress_text, request.current_goals)
+        logger.info("Queued progress job %s for user %s", job["id"], user_id)
+        return {**job["provisional"], "job_id": job["id"], "status": job["status"]}
     except Exception as e:
-        print(f"AI API failed: {str(e)}")
-        # Fallback: Simple progress calculation without AI
-        try:
-            # Simple progress calculation based on keywords
-            progress_text_lower = request.progress_text.lower()
-            updated_goals = request.current_goals.copy()
-            
-            # Check for training-related keywords
-            training_keywords = ['course', 'training', 'learn', 'study', 'python', 'programming', 'skill']
-            onboarding_keywords = ['onboard', 'company', 'policy', 'system', 'access', 'orientation']
-            
-            training_increase = 0
-            onboarding_increase = 0
-            
-            for keyword in training_keywords:
-                if keyword in progress_text_lower:
-                    training_increase = 20  # 20% increase for training activities
-                    break
-            
-            for keyword in onboarding_keywords:
-                if keyword in progress_text_lower:
-                    onboarding_increase = 15  # 15% increase for onboarding activities
-                    break
-            
-            # Update goals
-            for goal in updated_goals:
-                if goal['name'] == 'Training':
-                    goal['progress'] = min(100, goal['progress'] + training_increase)
-                elif goal['name'] == 'Onboarding':
-                    goal['progress'] = min(100, goal['progress'] + onboarding_increase)
-            
-            # Save progress update to database
-            try:
-                saved_update = save_progress_update_performance(
-                    db=db,
-                    user_id=user_id,
-                    progress_text=request.progress_text,
-                    updated_goals=updated_goals,
-                    ai_insight="Progress updated successfully! Keep up the great work."
-                )
-                print(f"Successfully saved progress update with ID: {saved_update.id}")
-            except Exception as db_error:
-                print(f"Database save failed: {db_error}")
-            
-            return {
-                "goals": updated_goals,
-                "chart_data": {
-                    "type": "bar",
-                    "labels": [goal["name"] for goal in updated_goals],
-                    "datasets": [{
-                        "label": "Progress %",
-                        "data": [goal["progress"] for goal in updated_goals],
-                        "backgroundColor": ["#3498db", "#2980b9"]
-                    }]
-                },
-                "insight": "Progress update received! Keep up the great work on your goals."
-            }
-        except Exception as fallback_error:
-            return {"error": f"Failed to update progress: {str(fallback_error)}"}
+        logger.error("Failed to queue progress update: %s", str(e))
+        return {"error": f"Failed to update progress: {str(e)}"}
+
+@app.get("/api/progress/jobs/{job_id}")
+def get_progress_job(job_id: str):
+    """Status and, once finished, the result of a progress analysis job"""
+    job = progress_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Progress job not found")
+    return job_view(job)
+
+@app.get("/api/progress/jobs/{job_id}/events")
+async def stream_progress_job(job_id: str):
+    """Server-sent event with the job's final state, sent once it finishes (or at the stream timeout)"""
+    if await asyncio.to_thread(progress_jobs.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Progress job not found")
+
+    async def events():
+        yield "retry: 5000\n\n"
+        job = await progress_jobs.wait(job_id, settings.PROGRESS_JOB_STREAM_TIMEOUT_SECONDS)
+        if job is None:
+            return
+        event = job["status"] if job["status"] in FINISHED_STATUSES else "timeout"
+        yield f"event: {event}\ndata: {json.dumps(job_view(job))}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def _goal_analytics_response(daily: List[Dict[str, Any]], days: int) -> Dict[str, Any]:
+    by_category: Dict[str, Dict[str, int]] = {}
+    for entry in daily:
+        entry["net_completed"] = entry["completed"] - entry["uncompleted"]
+        totals = by_category.setdefault(entry["category"], {"completed": 0, "uncompleted": 0, "created": 0, "net_completed": 0})
+        for key in totals:
+            totals[key] += entry[key]
+    return {"days": days, "daily": daily, "by_category": by_category}
+
+@app.get("/api/performance/users/{user_id}/goal-analytics")
+def get_user_goal_analytics(user_id: str, days: int = Query(90, ge=1, le=730), db: Session = Depends(get_performance_db)):
+    """Daily goal completions per category for a user, from the rolled-up history"""
+    since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+    daily = get_goal_progress_daily(db, [user_id], since)
+    return {"user_id": user_id, **_goal_analytics_response(daily, days)}
+
+@app.get("/api/performance/managers/{user_id}/goal-analytics")
+def get_team_goal_analytics(user_id: str, days: int = Query(90, ge=1, le=730), db: Session = Depends(get_performance_db)):
+    """Daily goal completions per category summed over a manager's direct reports, from the rolled-up history"""
+    manager = get_performance_user_by_id(db, user_id)
+    if not manager:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    report_ids = [report.user_id for report in get_performance_direct_reports(db, manager.id)]
+    since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+    daily = get_goal_progress_daily(db, report_ids, since)
+    return {"manager_id": user_id, "user_ids": report_ids, **_goal_analytics_response(daily, days)}
 
 @app.put("/api/performance/users/{user_id}/goals")
 def update_performance_user_goals(user_id: str, request: GoalsUpdateRequest, db: Session = Depends(get_performance_db)):
     """Update progress goals for a performance user"""
     try:
-        print(f"Updating goals for user {user_id}: {len(request.goals)} goals")
+        logger.info("Updating goals for user %s: %s goals", user_id, len(request.goals))
         
         if not request.goals or not isinstance(request.goals, list):
             raise ValueError("Invalid goals data provided")
@@ -1627,7 +1588,7 @@ def update_performance_user_goals(user_id: str, request: GoalsUpdateRequest, db:
         success = update_user_goals_performance(db, user_id, request.goals)
         
         if success:
-            print(f"Successfully updated goals using new user_goals table")
+            logger.info("Successfully updated goals using new user_goals table")
             return {"message": "Goals updated successfully", "goals": request.goals, "method": "new_table"}
         
         # Fallback to old progress_updates table
@@ -1642,10 +1603,10 @@ def update_performance_user_goals(user_id: str, request: GoalsUpdateRequest, db:
         db.commit()
         db.refresh(progress_update)
         
-        print(f"Successfully saved goals update with ID: {progress_update.id} (fallback method)")
+        logger.info("Successfully saved goals update with ID: %s (fallback method)", progress_update.id)
         return {"message": "Goals updated successfully", "goals": request.goals, "update_id": progress_update.id, "method": "fallback"}
     except Exception as e:
-        print(f"Error updating goals for user {user_id}: {str(e)}")
+        logger.error("Error updating goals for user %s: %s", user_id, str(e))
         db.rollback()
         return {"error": f"Failed to update goals: {str(e)}"}
 
@@ -1856,6 +1817,76 @@ def create_performance_goal_endpoint(user_id: str, request: CreatePerformanceGoa
         updated_at=goal.updated_at
     )
 
+@app.get("/api/performance/managers/{user_id}/team-overview")
+def get_team_overview_endpoint(user_id: str, db: Session = Depends(get_performance_db)):
+    """Summary, goal stats and latest AI insight for every direct report of a manager in one response"""
+    manager = get_performance_user_by_id(db, user_id)
+    if not manager:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    overview = team_overview_cache.get(manager.id)
+    cached = overview is not None
+    if not cached:
+        generation = team_overview_cache.generation
+        overview = get_team_overview(db, manager.id)
+        team_overview_cache.put(manager.id, overview, generation)
+    return {"manager_id": user_id, "reports": overview, "cached": cached}
+
+def _org_rollup(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Averages and completion rates from summed subtree stats"""
+    return {
+        "headcount": entry["headcount"],
+        "average_rating": round(entry["rating_sum"] / entry["rating_count"], 2) if entry["rating_count"] else None,
+        "goals_total": entry["goals_total"],
+        "goals_completed": entry["goals_completed"],
+        "goal_completion_rate": round(entry["goals_completed"] / entry["goals_total"] * 100, 1) if entry["goals_total"] else None,
+        "learning_goals_total": entry["user_goals_total"],
+        "learning_goals_completed": entry["user_goals_completed"],
+        "learning_goal_completion_rate": round(entry["user_goals_completed"] / entry["user_goals_total"] * 100, 1) if entry["user_goals_total"] else None
+    }
+
+@app.get("/api/performance/users/{user_id}/org-tree")
+def get_org_tree_endpoint(user_id: str, max_depth: Optional[int] = Query(None, ge=1, le=50), db: Session = Depends(get_performance_db)):
+    """Everyone in a user's org, direct and skip-level, as a flat list with depth and manager"""
+    user = get_performance_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    members = get_org_subtree(db, user.id, max_depth)
+    user_ids = {user.id: user.user_id, **{member["id"]: member["user_id"] for member in members}}
+    for member in members:
+        member["manager_user_id"] = user_ids.get(member["manager_id"])
+    return {"user_id": user_id, "headcount": len(members), "members": members}
+
+@app.get("/api/performance/users/{user_id}/management-chain")
+def get_management_chain_endpoint(user_id: str, db: Session = Depends(get_performance_db)):
+    """A user's managers from the direct manager to the top of the org"""
+    user = get_performance_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return {"user_id": user_id, "managers": get_management_chain(db, user.id)}
+
+@app.get("/api/performance/users/{user_id}/org-summary")
+def get_org_summary_endpoint(user_id: str, max_depth: Optional[int] = Query(None, ge=1, le=50), db: Session = Depends(get_performance_db)):
+    """Headcount, average rating and goal completion for a user's whole org and for each direct report's sub-org"""
+    user = get_performance_user_by_id(db, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    branches = get_org_subtree_aggregates(db, user.id, max_depth)
+    totals = {key: sum(branch[key] for branch in branches) for key in (
+        "headcount", "rating_sum", "rating_count", "goals_total", "goals_completed", "user_goals_total", "user_goals_completed"
+    )}
+    return {
+        "user_id": user_id,
+        "org": _org_rollup(totals),
+        "branches": [
+            {"user_id": branch["user_id"], "name": branch["name"], "levels": branch["depth"], **_org_rollup(branch)}
+            for branch in branches
+        ]
+    }
+
 @app.get("/api/performance/users/{user_id}/summary")
 def get_performance_user_summary(user_id: str, db: Session = Depends(get_performance_db)):
     """Get comprehensive performance summary for a user"""
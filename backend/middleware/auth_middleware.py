@@ -1,27 +1,34 @@
+import logging
 from fastapi import Request, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db, SessionLocal
 from auth.auth_utils import verify_token
 from services.auth_service import AuthService
+from logging_config import SAMPLED
+
+logger = logging.getLogger(__name__)
 
 async def get_current_user(request: Request):
     """Get current authenticated user from token."""
-    print(f"Auth middleware called for URL: {request.url}")
-    print(f"Request headers: {dict(request.headers)}")
-    print(f"Request cookies: {dict(request.cookies)}")
+    # Header and cookie names only; values carry credentials
+    logger.debug(
+        "Auth middleware called for URL: %s headers=%s cookies=%s",
+        request.url, list(request.headers.keys()), list(request.cookies.keys()),
+        extra=SAMPLED
+    )
     
     # Try to get token from Authorization header first
     authorization = request.headers.get("Authorization")
     if authorization and authorization.startswith("Bearer "):
         token = authorization.split(" ")[1]
-        print(f"Token from Authorization header: {token[:10]}...")
+        logger.debug("Token from Authorization header", extra=SAMPLED)
     else:
         # Try to get token from cookies
         token = request.cookies.get("access_token")
-        print(f"Token from cookies: {token[:10] if token else 'None'}...")
+        logger.debug("Token from cookies: %s", "present" if token else "None", extra=SAMPLED)
     
     if not token:
-        print("No token found, raising 401")
+        logger.info("No token found, raising 401")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
@@ -30,20 +37,20 @@ async def get_current_user(request: Request):
     
     try:
         username = verify_token(token, "access")
-        print(f"Token verified for username: {username}")
+        logger.debug("Token verified for username: %s", username, extra=SAMPLED)
         db = SessionLocal()
         try:
             auth_service = AuthService(db)
             user = auth_service.get_user_by_username(username)
-            print(f"User found: {user}")
+            logger.debug("User found: %s", user, extra=SAMPLED)
             return user
         finally:
             db.close()
     except HTTPException as e:
-        print(f"HTTPException in auth middleware: {e.detail}")
+        logger.debug("HTTPException in auth middleware: %s", e.detail)
         raise
     except Exception as e:
-        print(f"Exception in auth middleware: {str(e)}")
+        logger.error("Exception in auth middleware: %s", str(e))
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add rolling conversation summary columns to user_states table
+"""
+import sys
+from sqlalchemy import create_engine, text
+from config import settings
+
+SUMMARY_COLUMNS = {
+    "conversation_summary": "TEXT",
+    "summary_last_message_id": "INTEGER DEFAULT 0",
+    "turns_since_summary": "INTEGER DEFAULT 0",
+}
+
+def migrate_conversation_summary():
+    """Add conversation summary columns to user_states table if they don't exist"""
+    try:
+        # Create engine
+        engine = create_engine(settings.DATABASE_URL)
+
+        with engine.connect() as conn:
+            # Check which summary columns already exist
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = 'user_states'
+            """))
+            existing_columns = {row[0] for row in result}
+
+            missing = [name for name in SUMMARY_COLUMNS if name not in existing_columns]
+            if not missing:
+                print("✅ conversation summary columns already exist!")
+                return
+
+            for name in missing:
+                print(f"Adding {name} column to user_states table...")
+                conn.execute(text(f"ALTER TABLE user_states ADD COLUMN {name} {SUMMARY_COLUMNS[name]}"))
+
+            conn.commit()
+            print("✅ Successfully added conversation summary columns!")
+
+    except Exception as e:
+        print(f"❌ Error migrating database: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    migrate_conversation_summary()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the category column and the (user_id, goal_id, timestamp)
+index to the goal_progress_history table
+"""
+import sys
+from sqlalchemy import create_engine, inspect, text
+from config import settings
+
+def migrate_goal_history():
+    """Add goal_progress_history.category and its composite index if they don't exist"""
+    try:
+        # Create engine
+        engine = create_engine(settings.PERFORMANCE_DATABASE_URL)
+
+        # Fresh databases get the column and index from create_performance_tables()
+        inspector = inspect(engine)
+        if not inspector.has_table("goal_progress_history"):
+            return
+        existing_columns = {column["name"] for column in inspector.get_columns("goal_progress_history")}
+
+        with engine.connect() as conn:
+            if "category" not in existing_columns:
+                print("Adding category column to goal_progress_history table...")
+                conn.execute(text("ALTER TABLE goal_progress_history ADD COLUMN category VARCHAR(50)"))
+
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_goal_history_user_goal_time
+                ON goal_progress_history (user_id, goal_id, timestamp)
+            """))
+
+            conn.commit()
+            print("✅ goal_progress_history is up to date!")
+
+    except Exception as e:
+        print(f"❌ Error migrating database: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    migrate_goal_history()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the per-employee indexes used by performance summaries
+and team overviews to existing performance databases
+"""
+import sys
+from sqlalchemy import create_engine, inspect, text
+from config import settings
+
+# (index name, table, columns)
+PERFORMANCE_INDEXES = [
+    ("ix_performance_feedbacks_employee_created", "performance_feedbacks", "employee_id, created_at"),
+    ("ix_performance_goals_employee_status", "performance_goals", "employee_id, status"),
+    ("ix_progress_updates_user_created", "progress_updates", "user_id, created_at"),
+]
+
+def migrate_performance_indexes():
+    """Create the performance summary and team overview indexes if they don't exist"""
+    try:
+        # Create engine
+        engine = create_engine(settings.PERFORMANCE_DATABASE_URL)
+        inspector = inspect(engine)
+
+        with engine.connect() as conn:
+            for name, table, columns in PERFORMANCE_INDEXES:
+                # Fresh databases get these from create_performance_tables()
+                if inspector.has_table(table):
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+            conn.commit()
+            print("✅ performance indexes are up to date!")
+
+    except Exception as e:
+        print(f"❌ Error migrating database: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    migrate_performance_indexes()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add progress_updates.job_id and the unique index that
+keeps a progress job from saving its update twice
+"""
+import sys
+from sqlalchemy import create_engine, inspect, text
+from config import settings
+
+def migrate_progress_updates():
+    """Add progress_updates.job_id and its unique index if they don't exist"""
+    try:
+        # Create engine
+        engine = create_engine(settings.PERFORMANCE_DATABASE_URL)
+
+        # Fresh databases get the column and index from create_performance_tables()
+        inspector = inspect(engine)
+        if not inspector.has_table("progress_updates"):
+            return
+        existing_columns = {column["name"] for column in inspector.get_columns("progress_updates")}
+
+        with engine.connect() as conn:
+            if "job_id" not in existing_columns:
+                print("Adding job_id column to progress_updates table...")
+                conn.execute(text("ALTER TABLE progress_updates ADD COLUMN job_id VARCHAR(36)"))
+
+            conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_progress_updates_job_id ON progress_updates (job_id)"))
+
+            conn.commit()
+            print("✅ progress_updates is up to date!")
+
+    except Exception as e:
+        print(f"❌ Error migrating database: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    migrate_progress_updates()
@@ -1,9 +1,9 @@
 from typing import Dict, Any, List, Annotated
 from typing_extensions import TypedDict
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from datetime import datetime
-import uuid
 from prompts import get_system_prompt, get_user_prompt, format_chat_history, get_welcome_overview_prompt, get_personal_info_prompt, get_account_setup_prompt
+from task_matcher import match_task_signals
+from config import settings
 
 class OnboardingState(TypedDict):
     """State definition for the onboarding workflow"""
@@ -12,48 +12,54 @@ class OnboardingState(TypedDict):
     node_tasks: Dict[str, Any]
     total_points: int
     messages: Annotated[List[BaseMessage], "Chat messages"]
-    chat_history: List[Dict[str, Any]]
+    chat_history: List[Dict[str, Any]]  # Bounded window of recent messages, checkpointed per thread
     agent_response: str
     restarted: bool
 
-def process_message_node(state: OnboardingState) -> OnboardingState:
+def process_message_node(state: OnboardingState) -> Dict[str, Any]:
     """Process incoming user message - LLM processing handled in connection layer"""
-    return state  # Pass through since LLM processing is done before graph execution
+    return {}  # No state changes since LLM processing is done before graph execution
 
-def handle_triggers_node(state: OnboardingState) -> OnboardingState:
+def _append_turn(state: OnboardingState, agent_response: str) -> List[Dict[str, Any]]:
+    """Append this turn to the history window, keeping it bounded"""
+    turn = [
+        {"role": "user", "content": _latest_user_message(state)},
+        {"role": "assistant", "content": agent_response}
+    ]
+    return (list(state.get("chat_history") or []) + turn)[-settings.ONBOARDING_HISTORY_WINDOW:]
+
+def handle_triggers_node(state: OnboardingState) -> Dict[str, Any]:
     """Handle button triggers and node transitions"""
     ai_response = state["agent_response"]
     current_node = state["current_node"]
     
+    # Scan the response once for transition markers and cues
+    signals = match_task_signals(ai_response)
+    
     # Check for node transitions
-    if ("→ personal_info" in ai_response or 
-        (current_node == "welcome_overview" and 
-         ("personal information" in ai_response.lower() or "personal info" in ai_response.lower()) and 
-         any(word in ai_response.lower() for word in ['move on', 'next step', 'let\'s', 'now', 'ready to begin', 'move to personal information']))):
+    if (("personal_info", "transition_marker") in signals or
+        (current_node == "welcome_overview" and ("personal_info", "transition_cue") in signals)):
         # Clean up the response and update node
         clean_response = ai_response.replace("→ personal_info", "").strip()
         return {
-            **state,
             "agent_response": clean_response,
-            "current_node": "personal_info"
+            "current_node": "personal_info",
+            "chat_history": _append_turn(state, clean_response)
         }
     
-    elif ("→ account_setup" in ai_response or 
-          (current_node == "personal_info" and 
-           ("account setup" in ai_response.lower() or "account set up" in ai_response.lower()) and 
-           any(word in ai_response.lower() for word in ['move on', 'next step', 'let\'s', 'now', 'ready to begin', 'personal information collection complete', 'get your accounts all set up'])) or
-          (current_node == "personal_info" and "personal information collection complete" in ai_response.lower()) or
-          (current_node == "personal_info" and "get your accounts all set up" in ai_response.lower())):
+    elif (("account_setup", "transition_marker") in signals or
+          (current_node == "personal_info" and
+           (("account_setup", "transition_cue") in signals or ("account_setup", "transition_done") in signals))):
         # Clean up the response and update node
         clean_response = ai_response.replace("→ account_setup", "").strip()
         return {
-            **state,
             "agent_response": clean_response,
-            "current_node": "account_setup"
+            "current_node": "account_setup",
+            "chat_history": _append_turn(state, clean_response)
         }
     
     # Frontend will detect button triggers and show appropriate buttons
-    return state
+    return {"chat_history": _append_turn(state, ai_response)}
 
 def route_to_node(state: OnboardingState) -> str:
     """Route to the appropriate node based on current state"""
@@ -68,160 +74,70 @@ def route_to_node(state: OnboardingState) -> str:
     # Otherwise, stay in welcome overview
     return "welcome_overview"
 
-def welcome_overview_node(state: OnboardingState) -> OnboardingState:
+def _latest_user_message(state: OnboardingState) -> str:
+    """Get the user message for this turn"""
+    messages = state["messages"]
+    return messages[-2].content if len(messages) >= 2 else ""
+
+def _complete_tasks(node_tasks: Dict[str, Any], node_name: str, completed: List[str]) -> Dict[str, Any]:
+    """Return node_tasks with the given tasks marked complete, copying only what changes"""
+    section = {**node_tasks.get(node_name, {}), **{task: True for task in completed}}
+    return {**node_tasks, node_name: section}
+
+def welcome_overview_node(state: OnboardingState) -> Dict[str, Any]:
     """Handle Node 1: Welcome & Company Overview"""
-    # Update chat history
-    user_message = state["messages"][-2].content if len(state["messages"]) >= 2 else ""
-    ai_response = state["agent_response"]
-    
-    updated_chat_history = state["chat_history"].copy()
-    updated_chat_history.append({
-        "id": str(uuid.uuid4()),
-        "role": "user",
-        "content": user_message,
-        "timestamp": datetime.now().isoformat()
-    })
-    updated_chat_history.append({
-        "id": str(uuid.uuid4()),
-        "role": "agent",
-        "content": ai_response,
-        "timestamp": datetime.now().isoformat()
-    })
-    
-    # Check for task completion and update node_tasks
-    node_tasks = state["node_tasks"].copy()
-    user_msg_lower = user_message.lower()
+    signals = match_task_signals(_latest_user_message(state))
     
-    # Task completion detection
-    completion_phrases = [
-        "watched", "completed", "finished", "done", "reviewed", "read", "studied", 
-        "gone through", "looked at", "checked", "examined", "understood", "finished watching"
+    # Welcome Video, Company Policies, Culture Quiz and Employee Perks completion
+    completed = [
+        task for task in ("welcome_video", "company_policies", "culture_quiz", "employee_perks")
+        if (task, "completed") in signals
     ]
     
-    # Welcome Video completion
-    if any(phrase in user_msg_lower for phrase in completion_phrases) and \
-       ("video" in user_msg_lower or "welcome video" in user_msg_lower):
-        node_tasks["welcome_overview"]["welcome_video"] = True
-    
-    # Company Policies completion
-    if any(phrase in user_msg_lower for phrase in completion_phrases) and \
-       ("policy" in user_msg_lower or "policies" in user_msg_lower):
-        node_tasks["welcome_overview"]["company_policies"] = True
-    
-    # Culture Quiz completion
-    if any(phrase in user_msg_lower for phrase in completion_phrases) and \
-       ("quiz" in user_msg_lower or "culture quiz" in user_msg_lower):
-        node_tasks["welcome_overview"]["culture_quiz"] = True
-    
-    # Employee Perks completion (if mentioned)
-    if any(phrase in user_msg_lower for phrase in completion_phrases) and \
-       ("perks" in user_msg_lower or "benefits" in user_msg_lower):
-        # Add employee_perks to node_tasks if not already there
-        if "employee_perks" not in node_tasks["welcome_overview"]:
-            node_tasks["welcome_overview"]["employee_perks"] = False
-        node_tasks["welcome_overview"]["employee_perks"] = True
-    
-    return {
-        **state,
-        "chat_history": updated_chat_history,
-        "current_node": "welcome_overview",
-        "node_tasks": node_tasks
-    }
+    # Only return what changed; chat history is persisted by the API layer
+    updates = {"current_node": "welcome_overview"}
+    if completed:
+        updates["node_tasks"] = _complete_tasks(state["node_tasks"], "welcome_overview", completed)
+    return updates
 
-def personal_info_node(state: OnboardingState) -> OnboardingState:
+def personal_info_node(state: OnboardingState) -> Dict[str, Any]:
     """Handle Node 2: Personal Information & Legal Forms"""
-    # Update chat history
-    user_message = state["messages"][-2].content if len(state["messages"]) >= 2 else ""
-    ai_response = state["agent_response"]
-    
-    updated_chat_history = state["chat_history"].copy()
-    updated_chat_history.append({
-        "id": str(uuid.uuid4()),
-        "role": "user",
-        "content": user_message,
-        "timestamp": datetime.now().isoformat()
-    })
-    updated_chat_history.append({
-        "id": str(uuid.uuid4()),
-        "role": "agent",
-        "content": ai_response,
-        "timestamp": datetime.now().isoformat()
-    })
-    
-    # Check for personal info form completion
-    node_tasks = state["node_tasks"].copy()
-    user_msg_lower = user_message.lower()
+    node_tasks = state["node_tasks"]
     
     # Add personal_info section if not exists
     if "personal_info" not in node_tasks:
-        node_tasks["personal_info"] = {
-            "personal_info_form": False,
-            "emergency_contact": False,
-            "legal_forms": False
+        node_tasks = {
+            **node_tasks,
+            "personal_info": {
+                "personal_info_form": False,
+                "emergency_contact": False,
+                "legal_forms": False
+            }
         }
     
     # Personal Info Form completion
-    completion_phrases = [
-        "submitted", "completed", "finished", "done", "filled out", "filled in",
-        "provided", "entered", "gave", "supplied"
-    ]
-    
-    if any(phrase in user_msg_lower for phrase in completion_phrases) and \
-       ("form" in user_msg_lower or "information" in user_msg_lower or "personal info" in user_msg_lower):
-        node_tasks["personal_info"]["personal_info_form"] = True
+    if ("personal_info_form", "completed") in match_task_signals(_latest_user_message(state)):
+        node_tasks = _complete_tasks(node_tasks, "personal_info", ["personal_info_form"])
     
-    return {
-        **state,
-        "chat_history": updated_chat_history,
-        "current_node": "personal_info",
-        "node_tasks": node_tasks
-    }
+    updates = {"current_node": "personal_info"}
+    if node_tasks is not state["node_tasks"]:
+        updates["node_tasks"] = node_tasks
+    return updates
 
-def account_setup_node(state: OnboardingState) -> OnboardingState:
+def account_setup_node(state: OnboardingState) -> Dict[str, Any]:
     """Handle Node 3: Account Setup"""
-    # Update chat history
-    user_message = state["messages"][-2].content if len(state["messages"]) >= 2 else ""
-    ai_response = state["agent_response"]
+    signals = match_task_signals(_latest_user_message(state))
     
-    updated_chat_history = state["chat_history"].copy()
-    updated_chat_history.append({
-        "id": str(uuid.uuid4()),
-        "role": "user",
-        "content": user_message,
-        "timestamp": datetime.now().isoformat()
-    })
-    updated_chat_history.append({
-        "id": str(uuid.uuid4()),
-        "role": "agent",
-        "content": ai_response,
-        "timestamp": datetime.now().isoformat()
-    })
-    
-    # Check for account setup task completion
-    node_tasks = state["node_tasks"].copy()
-    user_msg_lower = user_message.lower()
-    
-    # Email setup completion
-    if ("password" in user_msg_lower or "username" in user_msg_lower) and \
-       ("set" in user_msg_lower or "updated" in user_msg_lower or "changed" in user_msg_lower):
-        node_tasks["account_setup"]["email_setup"] = True
-    
-    # SAP access completion
-    if ("sap" in user_msg_lower or "access" in user_msg_lower) and \
-       ("granted" in user_msg_lower or "provided" in user_msg_lower or "set up" in user_msg_lower):
-        node_tasks["account_setup"]["sap_access"] = True
-    
-    # Permissions completion
-    if ("permissions" in user_msg_lower or "two-factor" in user_msg_lower or "2fa" in user_msg_lower) and \
-       ("enabled" in user_msg_lower or "set up" in user_msg_lower or "configured" in user_msg_lower):
-        node_tasks["account_setup"]["permissions"] = True
+    # Email setup, SAP access and permissions completion
+    completed = [
+        task for task in ("email_setup", "sap_access", "permissions")
+        if (task, "completed") in signals
+    ]
     
-    return {
-        **state,
-        "chat_history": updated_chat_history,
-        "current_node": "account_setup",
-        "node_tasks": node_tasks
-    }
+    updates = {"current_node": "account_setup"}
+    if completed:
+        updates["node_tasks"] = _complete_tasks(state["node_tasks"], "account_setup", completed)
+    return updates
 
 def get_default_tasks() -> Dict[str, Any]:
     """Get default node tasks"""
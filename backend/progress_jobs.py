@@ -0,0 +1,371 @@
+"""
+Background analysis of employee progress updates.
+
+POST /api/progress/update/{user_id} used to block on a GPT-4 call before
+answering. It now enqueues a job and returns at once with a keyword-based
+provisional estimate; a local worker pool runs the analysis, saves the
+progress update and stores the final goals, chart data and insight on the
+job. Clients poll GET /api/progress/jobs/{job_id} or subscribe to
+GET /api/progress/jobs/{job_id}/events (server-sent events).
+
+Jobs are persisted in the progress_jobs table of the performance database by
+default (PROGRESS_JOB_STORE=database), so queued jobs survive a restart and any
+process can answer status requests; PROGRESS_JOB_STORE=memory keeps them in
+process instead. A worker claims a job by moving it from queued to running in
+one conditional update, so a job resumed by several processes runs once. Jobs
+left running longer than PROGRESS_JOB_STALE_SECONDS (their process died) are
+put back in the queue on startup, and the saved progress update is keyed by
+job id, so re-running such a job does not save it twice.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import HumanMessage
+from config import settings
+from db import PerformanceSessionLocal, ProgressJob, save_progress_update_performance
+from prompts import PROGRESS_ANALYSIS_PROMPT
+from llm_usage import usage_callback, usage_user
+
+logger = logging.getLogger(__name__)
+
+TRAINING_KEYWORDS = ('course', 'training', 'learn', 'study', 'python', 'programming', 'skill')
+ONBOARDING_KEYWORDS = ('onboard', 'company', 'policy', 'system', 'access', 'orientation')
+TRAINING_INCREASE = 20  # % increase for training activities
+ONBOARDING_INCREASE = 15  # % increase for onboarding activities
+
+FALLBACK_INSIGHT = "Progress update received! Keep up the great work on your goals."
+FINISHED_STATUSES = ("done", "fallback")
+
+
+def progress_chart_data(goals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "type": "bar",
+        "labels": [goal.get("name") for goal in goals],
+        "datasets": [{
+            "label": "Progress %",
+            "data": [goal.get("progress", 0) for goal in goals],
+            "backgroundColor": ["#3498db", "#2980b9"]
+        }]
+    }
+
+
+def keyword_progress_estimate(progress_text: str, current_goals: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Provisional goals, chart data and insight from keywords in the progress text"""
+    text = progress_text.lower()
+    training_increase = TRAINING_INCREASE if any(keyword in text for keyword in TRAINING_KEYWORDS) else 0
+    onboarding_increase = ONBOARDING_INCREASE if any(keyword in text for keyword in ONBOARDING_KEYWORDS) else 0
+
+    updated_goals = [dict(goal) for goal in current_goals]
+    for goal in updated_goals:
+        if goal.get('name') == 'Training':
+            goal['progress'] = min(100, goal.get('progress', 0) + training_increase)
+        elif goal.get('name') == 'Onboarding':
+            goal['progress'] = min(100, goal.get('progress', 0) + onboarding_increase)
+
+    return {"goals": updated_goals, "chart_data": progress_chart_data(updated_goals), "insight": FALLBACK_INSIGHT}
+
+
+class InMemoryProgressJobStore:
+    """Jobs kept in this process only"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return None
+            job.update(status="running", started_at=datetime.utcnow())
+            return dict(job)
+
+    def requeue_stale(self, started_before: datetime) -> int:
+        with self._lock:
+            stale = [
+                job for job in self._jobs.values()
+                if job["status"] == "running" and (job.get("started_at") is None or job["started_at"] < started_before)
+            ]
+            for job in stale:
+                job["status"] = "queued"
+            return len(stale)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def pending(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values() if job["status"] not in FINISHED_STATUSES]
+
+
+class DatabaseProgressJobStore:
+    """Jobs persisted in the progress_jobs table of the performance database"""
+
+    COLUMNS = ("id", "user_id", "status", "progress_text", "current_goals", "provisional", "result", "error",
+               "created_at", "started_at", "finished_at")
+
+    def __init__(self, session_factory=PerformanceSessionLocal):
+        self.session_factory = session_factory
+
+    def _as_dict(self, row: ProgressJob) -> Dict[str, Any]:
+        return {column: getattr(row, column) for column in self.COLUMNS}
+
+    def create(self, job: Dict[str, Any]) -> None:
+        db = self.session_factory()
+        try:
+            db.add(ProgressJob(**job))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def update(self, job_id: str, **fields) -> None:
+        db = self.session_factory()
+        try:
+            db.query(ProgressJob).filter(ProgressJob.id == job_id).update(fields, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            # Only one worker's update matches while the job is still queued
+            claimed = db.query(ProgressJob).filter(
+                ProgressJob.id == job_id,
+                ProgressJob.status == "queued"
+            ).update({"status": "running", "started_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            if not claimed:
+                return None
+            row = db.query(ProgressJob).filter(ProgressJob.id == job_id).first()
+            return self._as_dict(row) if row is not None else None
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def requeue_stale(self, started_before: datetime) -> int:
+        db = self.session_factory()
+        try:
+            requeued = db.query(ProgressJob).filter(
+                ProgressJob.status == "running",
+                (ProgressJob.started_at.is_(None)) | (ProgressJob.started_at < started_before)
+            ).update({"status": "queued"}, synchronize_session=False)
+            db.commit()
+            return requeued
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            row = db.query(ProgressJob).filter(ProgressJob.id == job_id).first()
+            return self._as_dict(row) if row is not None else None
+        finally:
+            db.close()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            rows = db.query(ProgressJob).filter(ProgressJob.status.notin_(FINISHED_STATUSES)).order_by(ProgressJob.created_at).all()
+            return [self._as_dict(row) for row in rows]
+        finally:
+            db.close()
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public representation of a job for the status and events endpoints"""
+    return {
+        "job_id": job["id"],
+        "user_id": job["user_id"],
+        "status": job["status"],
+        "provisional": job.get("provisional"),
+        "result": job.get("result"),
+        "created_at": job["created_at"].isoformat() if job.get("created_at") else None,
+        "finished_at": job["finished_at"].isoformat() if job.get("finished_at") else None,
+    }
+
+
+class ProgressJobQueue:
+    """In-process worker pool for progress update analysis"""
+
+    def __init__(self, store, workers: int = None, session_factory=PerformanceSessionLocal):
+        self.store = store
+        self.session_factory = session_factory
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or settings.PROGRESS_JOB_WORKERS, thread_name_prefix="progress-job"
+        )
+        self._finished: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._llm = None
+
+    @property
+    def llm(self):
+        """Shared chat model, created on first use; None without an API key"""
+        if self._llm is None and settings.OPENAI_API_KEY:
+            with self._lock:
+                if self._llm is None:
+                    from langchain_openai import ChatOpenAI
+                    self._llm = ChatOpenAI(
+                        model=settings.PERFORMANCE_OPENAI_MODEL,
+                        temperature=0.2,  # Lower temperature for more consistent analysis
+                        openai_api_key=settings.OPENAI_API_KEY,
+                        callbacks=[usage_callback]
+                    )
+        return self._llm
+
+    def enqueue(self, user_id: str, progress_text: str, current_goals: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Store a new job and hand it to the worker pool; returns the job with its provisional estimate"""
+        job = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "status": "queued",
+            "progress_text": progress_text,
+            "current_goals": current_goals,
+            "provisional": keyword_progress_estimate(progress_text, current_goals),
+            "result": None,
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self.store.create(job)
+        self._submit(job["id"], contextvars.copy_context())
+        return job
+
+    def resume_pending(self) -> int:
+        """Re-queue jobs left unfinished by a previous process"""
+        try:
+            stale_before = datetime.utcnow() - timedelta(seconds=settings.PROGRESS_JOB_STALE_SECONDS)
+            requeued = self.store.requeue_stale(stale_before)
+            if requeued:
+                logger.info("Re-queued %s stale running progress jobs", requeued)
+            # Jobs still running elsewhere are left alone; workers only run jobs they claim
+            jobs = [job for job in self.store.pending() if job["status"] == "queued"]
+        except Exception as e:
+            logger.warning("Could not load pending progress jobs: %s", e)
+            return 0
+        for job in jobs:
+            self._submit(job["id"])
+        if jobs:
+            logger.info("Resumed %s pending progress jobs", len(jobs))
+        return len(jobs)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """The job once finished, or its current state after `timeout` seconds"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        event = self._finished.get(job_id)
+        while loop.time() < deadline:
+            if event is not None:
+                # Jobs run here signal completion without touching the store
+                if event.is_set():
+                    break
+                await asyncio.sleep(0.2)
+                continue
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                return job
+            await asyncio.sleep(1.0)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def _submit(self, job_id: str, context: Optional[contextvars.Context] = None) -> None:
+        with self._lock:
+            self._finished[job_id] = threading.Event()
+        # Run in the request's context so LLM usage is attributed to its route and user
+        run = (context or contextvars.copy_context()).run
+        self._executor.submit(run, self._run, job_id)
+
+    def _run(self, job_id: str) -> None:
+        try:
+            job = self.store.claim(job_id)
+            if job is None:
+                # Finished, or already claimed by another worker or process
+                return
+            with usage_user(job["user_id"]):
+                self._process(job)
+        except Exception as e:
+            logger.error("Progress job %s failed: %s", job_id, e)
+        finally:
+            with self._lock:
+                event = self._finished.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    def _process(self, job: Dict[str, Any]) -> None:
+        error = None
+        try:
+            result = self._analyze(job["progress_text"], job["current_goals"])
+            status = "done"
+        except Exception as e:
+            logger.warning("AI progress analysis failed for job %s, keeping keyword estimate: %s", job["id"], e)
+            result, status, error = job["provisional"], "fallback", str(e)
+
+        # The update is saved either way; a failed save doesn't lose the result
+        db = self.session_factory()
+        try:
+            saved_update = save_progress_update_performance(
+                db=db,
+                user_id=job["user_id"],
+                progress_text=job["progress_text"],
+                updated_goals=result["goals"],
+                ai_insight=result["insight"],
+                job_id=job["id"]
+            )
+            logger.info("Saved progress update %s for user %s", saved_update.id, job["user_id"])
+        except Exception as db_error:
+            db.rollback()
+            logger.error("Database save failed for progress job %s: %s", job["id"], db_error)
+        finally:
+            db.close()
+
+        self.store.update(job["id"], status=status, result=result, error=error, finished_at=datetime.utcnow())
+
+    def _analyze(self, progress_text: str, current_goals: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if self.llm is None:
+            raise RuntimeError("OpenAI API key not configured")
+        prompt = PROGRESS_ANALYSIS_PROMPT.format(progress_text=progress_text, current_goals=current_goals)
+        response = self.llm.invoke([HumanMessage(content=prompt)])
+        progress_data = json.loads(response.content)
+        if not all(key in progress_data for key in ("goals", "chart_data", "insight")):
+            raise ValueError("Invalid response structure")
+        return progress_data
+
+
+def _make_store():
+    if settings.PROGRESS_JOB_STORE == "memory":
+        return InMemoryProgressJobStore()
+    return DatabaseProgressJobStore()
+
+
+progress_jobs = ProgressJobQueue(_make_store())
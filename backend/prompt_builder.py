@@ -0,0 +1,60 @@
+"""
+Prompt assembly for the onboarding chat.
+
+The system prompt and node prompts never change at runtime, so the static
+prefix for every node is built once at import. Each request only assembles the
+dynamic tail (task status, recent history and the user message). Keeping the
+static content first and byte-identical lets the provider's prompt caching hit.
+"""
+from typing import Dict, List, Optional
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from prompts import (
+    get_system_prompt,
+    get_user_prompt,
+    format_chat_history,
+    format_conversation_summary,
+    get_welcome_overview_prompt,
+    get_personal_info_prompt,
+    get_account_setup_prompt
+)
+
+_SYSTEM_PROMPT = get_system_prompt()
+
+_NODE_PROMPTS = {
+    "welcome_overview": get_welcome_overview_prompt(),
+    "personal_info": get_personal_info_prompt(),
+    "account_setup": get_account_setup_prompt(),
+}
+
+def _build_static_prefix(current_node: str, node_prompt: str) -> str:
+    """Build the cacheable prefix for a node"""
+    return f"{_SYSTEM_PROMPT}\n\n{node_prompt}\n\nCurrent Node: {current_node}"
+
+# Precomputed static prefixes, one per onboarding node
+NODE_PREFIXES: Dict[str, str] = {
+    node: _build_static_prefix(node, prompt) for node, prompt in _NODE_PROMPTS.items()
+}
+
+def get_static_prefix(current_node: str) -> str:
+    """Get the precomputed static prefix for a node"""
+    prefix = NODE_PREFIXES.get(current_node)
+    if prefix is None:
+        # Unknown nodes have no node prompt; cache them as they appear
+        prefix = NODE_PREFIXES[current_node] = _build_static_prefix(current_node, "")
+    return prefix
+
+def build_dynamic_tail(task_status: str, chat_history: List[Dict], user_message: str,
+                       conversation_summary: Optional[str] = None) -> str:
+    """Assemble the per-request part of the prompt"""
+    return (
+        f"{task_status}\n\n{format_conversation_summary(conversation_summary)}"
+        f"{format_chat_history(chat_history)}{get_user_prompt(user_message)}"
+    )
+
+def build_onboarding_messages(current_node: str, task_status: str, chat_history: List[Dict], user_message: str,
+                              conversation_summary: Optional[str] = None) -> List[BaseMessage]:
+    """Build the LLM messages for an onboarding turn: static prefix first, dynamic tail last"""
+    return [
+        SystemMessage(content=get_static_prefix(current_node)),
+        HumanMessage(content=build_dynamic_tail(task_status, chat_history, user_message, conversation_summary))
+    ]
@@ -364,10 +364,89 @@ def format_chat_history(chat_history: list) -> str:
     if not chat_history:
         return ""
     
-    formatted = "Previous conversation:\n"
+    lines = ["Previous conversation:"]
     for msg in chat_history:
         role = "User" if msg.get("role") == "user" else "Assistant"
         content = msg.get("content", msg.get("text", ""))
-        formatted += f"{role}: {content}\n"
+        lines.append(f"{role}: {content}")
     
-    return formatted + "\n"
\ No newline at end of file
+    return "\n".join(lines) + "\n\n"
+
+def format_conversation_summary(conversation_summary: str) -> str:
+    """Format the rolling conversation summary for context"""
+    if not conversation_summary:
+        return ""
+    return f"Summary of earlier conversation:\n{conversation_summary}\n\n"
+
+CONVERSATION_SUMMARY_PROMPT = """
+You maintain a running summary of an employee's onboarding conversation with the SAP onboarding assistant.
+
+Current summary:
+{previous_summary}
+
+New messages since the summary was written:
+{new_messages}
+
+Update the summary so it covers both. Keep facts the assistant will need later:
+the employee's name and role if mentioned, questions they asked and the answers given,
+concerns or preferences they expressed, and which onboarding steps were discussed.
+Drop greetings, button prompts and small talk. Write plain prose in under {max_chars} characters.
+Return only the updated summary.
+"""
+
+PROGRESS_ANALYSIS_PROMPT = """
+You are an expert HR analyst and performance coach with deep understanding of employee development and goal tracking. Your task is to intelligently analyze employee progress updates and provide accurate goal assessments.
+
+EMPLOYEE PROGRESS UPDATE: "{progress_text}"
+
+CURRENT GOAL STATUS: {current_goals}
+
+ANALYSIS FRAMEWORK:
+As an expert analyst, you must:
+
+1. **CONTEXTUAL UNDERSTANDING**: Analyze the progress text for:
+   - Specific achievements mentioned
+   - Skills developed or demonstrated
+   - Tasks completed or milestones reached
+   - Learning activities undertaken
+   - Challenges overcome or areas of improvement
+
+2. **GOAL MAPPING**: Intelligently map progress to the two available goals:
+   - **TRAINING GOAL**: Any learning, skill development, course completion, certification, knowledge acquisition, professional development activities
+   - **ONBOARDING GOAL**: Company-specific tasks, policy understanding, system access, orientation activities, company culture integration, administrative tasks
+
+3. **PROGRESS CALCULATION**: Calculate realistic progress increases:
+   - Small achievements: 5-15% increase
+   - Moderate achievements: 15-30% increase  
+   - Major milestones: 30-50% increase
+   - Never exceed 100% or decrease progress
+   - Consider current progress levels when calculating increases
+
+4. **INTELLIGENT INSIGHTS**: Generate personalized, encouraging insights that:
+   - Acknowledge specific achievements mentioned
+   - Provide constructive feedback
+   - Suggest next steps or areas for continued growth
+   - Maintain an encouraging, professional tone
+
+OUTPUT REQUIREMENTS:
+You must respond with ONLY valid JSON in this exact format:
+
+{{
+  "goals": [
+    {{"id": 1, "name": "Training", "progress": [calculated_progress], "target": 100}},
+    {{"id": 2, "name": "Onboarding", "progress": [calculated_progress], "target": 100}}
+  ],
+  "chart_data": {{
+    "type": "bar",
+    "labels": ["Training", "Onboarding"],
+    "datasets": [{{
+      "label": "Progress %",
+      "data": [training_progress, onboarding_progress],
+      "backgroundColor": ["#3498db", "#2980b9"]
+    }}]
+  }},
+  "insight": "[Personalized, encouraging insight based on the specific achievements mentioned]"
+}}
+
+CRITICAL: Output ONLY the JSON response, no additional text or explanations.
+"""
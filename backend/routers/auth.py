@@ -14,7 +14,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
     auth_service = AuthService(db)
     try:
-        user = auth_service.create_user(user)
+        user = await auth_service.create_user(user)
         return user
     except HTTPException:
         raise
@@ -33,7 +33,7 @@ async def login(
     """Login user and return tokens."""
     auth_service = AuthService(db)
     try:
-        user, access_token, refresh_token = auth_service.login_user(user_credentials)
+        user, access_token, refresh_token = await auth_service.login_user(user_credentials)
         
         # Set secure HTTP-only cookies
         response.set_cookie(
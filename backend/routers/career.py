@@ -1,55 +1,36 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 import requests
 import os
 import json
+import logging
 from config import settings
 from services.recommendation_service import SAPJobRecommendationService
+from services.catalog import OracleCatalog, get_oracle_catalog, get_recommendation_service
+from services.career_cache import coach_cache, oracle_story_cache, canonical_answers, experience_bucket_label
+from services.career_graph import Route, RouteStep, route_style
+from logging_config import SAMPLED
+from llm_usage import record_openai_usage
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def _validate_llm_path(path: dict, user_experience: int) -> bool:
-    """
-    Validate LLM-generated career path against basic constraints
-    """
-    try:
-        # Check if role name contains SAP-relevant keywords
-        role_name = path.get("role", "").lower()
-        sap_keywords = ["sap", "abap", "fiori", "basis", "hana", "ui5"]
-        if not any(keyword in role_name for keyword in sap_keywords):
-            print(f"❌ Role '{path.get('role')}' is not SAP-relevant")
-            return False
-        
-        # Check if skills contain SAP-relevant keywords
-        skills = path.get("skills_required", [])
-        if isinstance(skills, list):
-            skills_text = " ".join(skills).lower()
-        else:
-            skills_text = str(skills).lower()
-            
-        if not any(keyword in skills_text for keyword in sap_keywords):
-            print(f"❌ Skills {skills} are not SAP-relevant")
-            return False
-        
-        # Basic timeline validation (should be reasonable)
-        timeline = path.get("timeline", "")
-        if "years" in timeline.lower():
-            import re
-            years_match = re.search(r'(\d+)', timeline)
-            if years_match:
-                required_years = int(years_match.group(1))
-                # Allow some flexibility - don't be too strict
-                if required_years > user_experience + 10:  # Allow up to 10 years ahead
-                    print(f"❌ Timeline {timeline} seems unrealistic")
-                    return False
-        
-        print(f"✅ Path {path.get('role')} passed validation")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Validation error for path {path.get('role')}: {str(e)}")
-        return False
+OPENAI_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+
+def _chat_completion(openai_key: str, payload: dict) -> requests.Response:
+    """POST a chat completion request (blocking; run via asyncio.to_thread)"""
+    return requests.post(
+        OPENAI_CHAT_COMPLETIONS_URL,
+        headers={
+            "Authorization": f"Bearer {openai_key}",
+            "Content-Type": "application/json"
+        },
+        json=payload,
+        timeout=30
+    )
 
 class QuizAnswers(BaseModel):
     answers: Dict[str, str]
@@ -86,8 +67,140 @@ class OracleResponse(BaseModel):
     experience_years: int
     career_trees: List[CareerTree]
 
+class OpenAIAuthError(Exception):
+    """OpenAI rejected the API key; the coach falls back to a mock response (never cached)"""
+
+async def _generate_coach_result(
+    user_answers: Dict[str, str],
+    recommendation_service: SAPJobRecommendationService,
+    openai_key: str,
+    openai_model: str
+) -> CareerCoachResponse:
+    """Profile summary and role suggestions for one set of quiz answers"""
+    # Create profile summary from quiz answers
+    profile_text = ", ".join([f"{k}: {v}" for k, v in user_answers.items()])
+    summary_prompt = f"""Based on these career quiz responses: {profile_text}
+
+Write a personalized, engaging profile summary in second person (using "you" and "your"). Make it sound natural and conversational, highlighting the person's strengths and work style. Keep it concise (2-3 sentences) and positive. Focus on what makes them unique and valuable in their career."""
+    
+    # Job matching depends only on the quiz answers, so it runs before either LLM call
+    logger.debug("Career Coach: Starting job recommendation matching...", extra=SAMPLED)
+    relevant_jobs = recommendation_service.get_recommended_jobs(user_answers, top_k=5)
+    job_context = recommendation_service.get_job_context(relevant_jobs)
+    logger.debug("Career Coach: Job recommendations completed, proceeding with AI generation...", extra=SAMPLED)
+    
+    # Role suggestions are grounded in the quiz responses rather than the generated
+    # summary, so both completions can run at the same time
+    roles_prompt = f"""Based on these career quiz responses: {profile_text}
+
+Here are SAP roles to consider for this person:
+
+{job_context}
+
+Select the **top 3 SAP roles** from the relevant jobs above that best match this person's profile and explain why each role is suitable in 1-2 sentences. Consider their work style, preferences, and career goals.
+
+Format your response as:
+1. [Role Name]: [Brief explanation]
+2. [Role Name]: [Brief explanation]  
+3. [Role Name]: [Brief explanation]
+
+Do not include any introductory text like "Based on the user's profile" or "The top three SAP roles are". Start directly with the first role recommendation."""
+    
+    summary_response, roles_response = await asyncio.gather(
+        asyncio.to_thread(_chat_completion, openai_key, {
+            "model": openai_model,
+            "messages": [
+                {"role": "system", "content": "You are a friendly, professional career coach specializing in SAP careers. Write in a warm, encouraging tone that makes people feel confident about their potential. Use second person (you/your) and be conversational yet professional."},
+                {"role": "user", "content": summary_prompt}
+            ],
+            "max_tokens": 150,
+            "temperature": 0.7
+        }),
+        asyncio.to_thread(_chat_completion, openai_key, {
+            "model": openai_model,
+            "messages": [
+                {"role": "system", "content": "You are an expert SAP career advisor. Analyze the user's quiz responses and match them with the most suitable SAP roles from the provided list. Focus on alignment between their work style, preferences, and the role requirements. Be specific about why each role fits their profile."},
+                {"role": "user", "content": roles_prompt}
+            ],
+            "max_tokens": 250,
+            "temperature": 0.7
+        })
+    )
+    
+    if summary_response.status_code != 200:
+        logger.error("OpenAI API error: %s - %s", summary_response.status_code, summary_response.text)
+        if summary_response.status_code == 401:
+            raise OpenAIAuthError()
+        raise HTTPException(status_code=500, detail=f"Failed to get profile summary from OpenAI API: {summary_response.status_code}")
+    
+    if roles_response.status_code != 200:
+        logger.error("OpenAI API error: %s - %s", roles_response.status_code, roles_response.text)
+        raise HTTPException(status_code=500, detail=f"Failed to get role suggestions from OpenAI API: {roles_response.status_code}")
+    
+    summary_data = summary_response.json()
+    record_openai_usage(openai_model, summary_data.get("usage"))
+    summary = summary_data["choices"][0]["message"]["content"] if "choices" in summary_data and len(summary_data["choices"]) > 0 else "No valid summary returned."
+    
+    roles_data = roles_response.json()
+    record_openai_usage(openai_model, roles_data.get("usage"))
+    suggestions = roles_data["choices"][0]["message"]["content"] if "choices" in roles_data and len(roles_data["choices"]) > 0 else "No role suggestions returned."
+    
+    return CareerCoachResponse(
+        profile_summary=summary,
+        suggestions=suggestions
+    )
+
+_precompute_task: Optional[asyncio.Task] = None
+
+def start_coach_precompute() -> Optional[asyncio.Task]:
+    """Warm the coach cache with the answer sets in CAREER_COACH_PRECOMPUTE_FILE, re-warming before entries expire.
+
+    Called from app startup; the warmer runs as a task on the app's event loop so
+    requests arriving mid-generation share its in-flight results.
+    """
+    global _precompute_task
+    path = settings.CAREER_COACH_PRECOMPUTE_FILE
+    openai_key = getattr(settings, 'OPENAI_API_KEY', os.getenv('OPENAI_API_KEY'))
+    if not path or settings.CAREER_COACH_CACHE_TTL_SECONDS <= 0 or not openai_key:
+        return None
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            answer_sets = [answers for answers in json.load(f) if isinstance(answers, dict)]
+    except (OSError, ValueError) as e:
+        logger.warning("Career coach precompute disabled, could not read %s: %s", path, e)
+        return None
+
+    openai_model = getattr(settings, 'OPENAI_MODEL', os.getenv('OPENAI_MODEL', 'gpt-4o'))
+
+    async def _warm_forever():
+        while True:
+            recommendation_service = get_recommendation_service()
+            warmed = 0
+            for user_answers in answer_sets:
+                user_answers = canonical_answers(user_answers)
+                key = coach_cache.make_key(user_answers, openai_model, recommendation_service.catalog.version)
+                try:
+                    await coach_cache.get_or_compute(
+                        key, lambda: _generate_coach_result(user_answers, recommendation_service, openai_key, openai_model)
+                    )
+                    warmed += 1
+                except Exception as e:
+                    logger.warning("Career coach precompute failed for %s: %s", user_answers, e)
+            logger.info("Career coach cache warmed with %s/%s answer sets", warmed, len(answer_sets))
+            # Entries refresh just before they expire
+            await asyncio.sleep(max(settings.CAREER_COACH_CACHE_TTL_SECONDS * 0.9, 60))
+
+    # Keep a reference so the task isn't garbage collected while it sleeps
+    _precompute_task = asyncio.get_running_loop().create_task(_warm_forever())
+    return _precompute_task
+
 @router.post("/api/career/coach", response_model=CareerCoachResponse)
-async def career_coach(answers: QuizAnswers):
+async def career_coach(
+    answers: QuizAnswers,
+    recommendation_service: SAPJobRecommendationService = Depends(get_recommendation_service)
+):
     """
     Get AI-powered career recommendations using OpenAI model
     """
@@ -96,13 +209,13 @@ async def career_coach(answers: QuizAnswers):
         openai_key = getattr(settings, 'OPENAI_API_KEY', os.getenv('OPENAI_API_KEY'))
         openai_model = getattr(settings, 'OPENAI_MODEL', os.getenv('OPENAI_MODEL', 'gpt-4o'))
         
-        print(f"OpenAI key: {'SET' if openai_key else 'NOT SET'}")
-        print(f"OpenAI model: {openai_model}")
-        print(f"Quiz answers: {answers.answers}")
+        logger.debug("OpenAI key: %s", 'SET' if openai_key else 'NOT SET', extra=SAMPLED)
+        logger.debug("OpenAI model: %s", openai_model, extra=SAMPLED)
+        logger.debug("Quiz answers: %s", answers.answers, extra=SAMPLED)
         
         if not openai_key or openai_key.strip() == "":
             # Fallback to mock response if no API key
-            print("OpenAI API key not configured, returning mock response")
+            logger.warning("OpenAI API key not configured, returning mock response")
             return CareerCoachResponse(
                 profile_summary="This is a mock summary since the OpenAI API key is not configured.",
                 suggestions=(
@@ -112,110 +225,31 @@ async def career_coach(answers: QuizAnswers):
                 )
             )
         
-        # Create profile summary from quiz answers
-        profile_text = ", ".join([f"{k}: {v}" for k, v in answers.answers.items()])
-        summary_prompt = f"""Based on these career quiz responses: {profile_text}
-
-Write a personalized, engaging profile summary in second person (using "you" and "your"). Make it sound natural and conversational, highlighting the person's strengths and work style. Keep it concise (2-3 sentences) and positive. Focus on what makes them unique and valuable in their career."""
-        
-        # Generate profile summary using OpenAI API
-        summary_response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {openai_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": openai_model,
-                "messages": [
-                    {"role": "system", "content": "You are a friendly, professional career coach specializing in SAP careers. Write in a warm, encouraging tone that makes people feel confident about their potential. Use second person (you/your) and be conversational yet professional."},
-                    {"role": "user", "content": summary_prompt}
-                ],
-                "max_tokens": 150,
-                "temperature": 0.7
-            },
-            timeout=30
-        )
-        
-        if summary_response.status_code != 200:
-            print(f"OpenAI API error: {summary_response.status_code} - {summary_response.text}")
-            if summary_response.status_code == 401:
-                print("OpenAI API authentication failed, falling back to mock response")
-                return CareerCoachResponse(
-                    profile_summary="This is a mock summary since the OpenAI API authentication failed.",
-                    suggestions=(
-                        "1. SAP Business Analyst: Good fit because the user shows analytical thinking.\n"
-                        "2. SAP Technical Consultant: Suitable due to structured problem-solving approach.\n"
-                        "3. SAP Project Manager: Matches leadership and organizational skills."
-                    )
-                )
-            raise HTTPException(status_code=500, detail=f"Failed to get profile summary from OpenAI API: {summary_response.status_code}")
-        
-        summary_data = summary_response.json()
-        summary = summary_data["choices"][0]["message"]["content"] if "choices" in summary_data and len(summary_data["choices"]) > 0 else "No valid summary returned."
-        
-        # Use recommendation service to get relevant jobs based on user responses
-        print(f"\n🚀 Career Coach: Starting job recommendation matching...")
-        recommendation_service = SAPJobRecommendationService()
-        relevant_jobs = recommendation_service.get_recommended_jobs(answers.answers, top_k=5)
-        job_context = recommendation_service.get_job_context(relevant_jobs)
-        print(f"🎯 Career Coach: Job recommendations completed, proceeding with AI generation...")
-        
-        # Generate personalized SAP role suggestions using recommendation data
-        roles_prompt = f"""Based on this user profile: {summary}
-
-Here are SAP roles to consider based on their quiz responses: {profile_text}
-
-{job_context}
-
-Select the **top 3 SAP roles** from the relevant jobs above that best match this person's profile and explain why each role is suitable in 1-2 sentences. Consider their work style, preferences, and career goals.
-
-Format your response as:
-1. [Role Name]: [Brief explanation]
-2. [Role Name]: [Brief explanation]  
-3. [Role Name]: [Brief explanation]
-
-Do not include any introductory text like "Based on the user's profile" or "The top three SAP roles are". Start directly with the first role recommendation."""
-        
-        roles_response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {openai_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": openai_model,
-                "messages": [
-                    {"role": "system", "content": "You are an expert SAP career advisor. Analyze the user's quiz responses and match them with the most suitable SAP roles from the provided list. Focus on alignment between their work style, preferences, and the role requirements. Be specific about why each role fits their profile."},
-                    {"role": "user", "content": roles_prompt}
-                ],
-                "max_tokens": 250,
-                "temperature": 0.7
-            },
-            timeout=30
+        # Identical (canonicalized) answers reuse a cached or in-flight result; the
+        # result is generated from the same canonical answers the key is built from
+        user_answers = canonical_answers(answers.answers)
+        cache_key = coach_cache.make_key(user_answers, openai_model, recommendation_service.catalog.version)
+        return await coach_cache.get_or_compute(
+            cache_key,
+            lambda: _generate_coach_result(user_answers, recommendation_service, openai_key, openai_model)
         )
         
-        if roles_response.status_code != 200:
-            print(f"OpenAI API error: {roles_response.status_code} - {roles_response.text}")
-            raise HTTPException(status_code=500, detail=f"Failed to get role suggestions from OpenAI API: {roles_response.status_code}")
-        
-        roles_data = roles_response.json()
-        suggestions = roles_data["choices"][0]["message"]["content"] if "choices" in roles_data and len(roles_data["choices"]) > 0 else "No role suggestions returned."
-        
+    except OpenAIAuthError:
+        logger.warning("OpenAI API authentication failed, falling back to mock response")
         return CareerCoachResponse(
-            profile_summary=summary,
-            suggestions=suggestions
+            profile_summary="This is a mock summary since the OpenAI API authentication failed.",
+            suggestions=(
+                "1. SAP Business Analyst: Good fit because the user shows analytical thinking.\n"
+                "2. SAP Technical Consultant: Suitable due to structured problem-solving approach.\n"
+                "3. SAP Project Manager: Matches leadership and organizational skills."
+            )
         )
-        
     except requests.exceptions.Timeout:
         raise HTTPException(status_code=504, detail="OpenAI API request timed out")
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"OpenAI API request failed: {str(e)}")
     except Exception as e:
-        print(f"Career coach error: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Career coach error (%s): %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 @router.get("/api/career/health")
@@ -225,231 +259,157 @@ async def career_health_check():
     """
     return {"status": "healthy", "service": "Career Coach API"}
 
+def _template_story(step: RouteStep, previous_role: str, next_step: Optional[RouteStep]) -> str:
+    """Deterministic story used when the LLM is unavailable"""
+    gained = ", ".join(step.skills_gained[:2]) or "broader SAP expertise"
+    story = f"Building on your experience as {previous_role}, {step.role.name} lets you develop {gained}"
+    if next_step is not None:
+        story += f" and sets you up for {next_step.role.name}"
+    return story + "."
+
+def _template_stories(request: OracleRequest, route: Route) -> List[str]:
+    previous_roles = [request.current_role] + [step.role.name for step in route.steps[:-1]]
+    next_steps = list(route.steps[1:]) + [None]
+    return [
+        _template_story(step, previous_role, next_step)
+        for step, previous_role, next_step in zip(route.steps, previous_roles, next_steps)
+    ]
+
+async def _write_route_stories(request: OracleRequest, routes: List[Route], goal_categories: Tuple[str, ...]) -> List[Tuple[List[str], bool]]:
+    """One story per route step, written by the LLM in a single call; template stories on any failure.
+    Returns (stories, ai_written) per route.
+    Stories are cached per (role, experience bucket, goal categories), so the prompt only uses those:
+    no exact years, raw goal text or per-step timelines."""
+    fallback = [(_template_stories(request, route), False) for route in routes]
+    openai_key = getattr(settings, 'OPENAI_API_KEY', os.getenv('OPENAI_API_KEY'))
+    openai_model = getattr(settings, 'OPENAI_MODEL', os.getenv('OPENAI_MODEL', 'gpt-4o'))
+    if not openai_key or openai_key.strip() == "":
+        logger.warning("OpenAI API key not configured, using template route stories")
+        return fallback
+    
+    experience = f"{experience_bucket_label(request.experience_years)} years"
+    goal = " and ".join(goal_categories) if goal_categories else 'career growth'
+    route_lines = []
+    for i, route in enumerate(routes, 1):
+        steps = " -> ".join(
+            f"{step.role.name} (gains {', '.join(step.skills_gained) or 'seniority'})"
+            for step in route.steps
+        )
+        route_lines.append(f"{i}. {steps}")
+    step_counts = [len(route.steps) for route in routes]
+    stories_prompt = f"""PROFILE: {request.current_role.strip()} with {experience} of experience, goal: {goal}
+
+CAREER ROUTES:
+{chr(10).join(route_lines)}
+
+For every step of every route, write a 1-2 sentence personal story in second person explaining why this step makes sense for someone with {experience} of experience and a {goal} goal. Do not mention specific numbers of years or timelines. Do not change, add or remove roles.
+
+Return JSON only: {{"stories": [["route 1 step 1 story", ...], ...]}} with {step_counts} stories per route."""
+    
+    try:
+        response = await asyncio.to_thread(_chat_completion, openai_key, {
+            "model": openai_model,
+            "messages": [
+                {"role": "system", "content": "You are an expert SAP career advisor. Write concise, encouraging career stories in JSON format only."},
+                {"role": "user", "content": stories_prompt}
+            ],
+            "max_tokens": 60 * sum(step_counts) + 50,
+            "temperature": 0.7
+        })
+        if response.status_code != 200:
+            logger.warning("LLM story call failed with status: %s", response.status_code)
+            return fallback
+        data = response.json()
+        record_openai_usage(openai_model, data.get("usage"))
+        content = data["choices"][0]["message"]["content"].strip()
+        if content.startswith("```json"):
+            content = content[7:]
+        if content.startswith("```"):
+            content = content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+        llm_stories = json.loads(content.strip()).get("stories", [])
+    except Exception as e:
+        logger.error("Route story generation failed: %s", str(e))
+        return fallback
+    
+    # Keep LLM stories only where they line up with the route's steps
+    results = []
+    for route, route_fallback, route_stories in zip(routes, fallback, list(llm_stories) + [None] * len(routes)):
+        if isinstance(route_stories, list) and len(route_stories) == len(route.steps) and all(isinstance(s, str) and s.strip() for s in route_stories):
+            results.append((route_stories, True))
+        else:
+            results.append(route_fallback)
+    return results
+
+async def _cached_route_stories(request: OracleRequest, routes: List[Route], oracle_catalog: OracleCatalog) -> List[Tuple[List[str], bool]]:
+    """Route stories from the oracle story cache; only fully AI-written story sets are cached"""
+    openai_model = getattr(settings, 'OPENAI_MODEL', os.getenv('OPENAI_MODEL', 'gpt-4o'))
+    goal_categories = oracle_catalog.graph.goal_categories(request.goal)
+    key = oracle_story_cache.make_key(
+        request.current_role, request.experience_years, goal_categories, openai_model, oracle_catalog.version
+    )
+    # Requests in the same bucket can still get different routes (e.g. at a seniority boundary)
+    signature = tuple(tuple(step.role.name for step in route.steps) for route in routes)
+
+    async def compute():
+        stories = await _write_route_stories(request, routes, goal_categories)
+        return stories, all(ai_written for _, ai_written in stories)
+
+    return await oracle_story_cache.get_or_compute(key, signature, compute)
+
+
+def _career_tree(request: OracleRequest, route: Route, stories: List[str], ai_written: bool) -> CareerTree:
+    tree_name, tree_icon = route_style(route)
+    previous_roles = [request.current_role] + [step.role.name for step in route.steps[:-1]]
+    paths = []
+    for level, (step, previous_role, story) in enumerate(zip(route.steps, previous_roles, stories), 1):
+        paths.append(CareerPath(
+            level=level,
+            role=step.role.name,
+            timeline=f"{step.years_from_previous}-{step.years_from_previous + 1} years",
+            experience_required=step.experience_required,
+            skills_required=list(step.role.required_skills[:4]),
+            skills_gained=list(step.skills_gained),
+            prerequisites=[f"{previous_role} experience", f"{step.role.min_experience}+ years experience"],
+            story=story,
+            next_levels=[level + 1] if level < len(route.steps) else [],
+            is_ai_generated=ai_written
+        ))
+    years = route.steps[-1].experience_required - request.experience_years
+    return CareerTree(
+        tree_name=tree_name,
+        tree_description=f"From {request.current_role} to {route.steps[-1].role.name} in about {years} years",
+        tree_icon=tree_icon,
+        progressive_paths=paths
+    )
+
 @router.post("/api/career/oracle", response_model=OracleResponse)
-async def career_oracle(request: OracleRequest):
+async def career_oracle(request: OracleRequest, oracle_catalog: OracleCatalog = Depends(get_oracle_catalog)):
     """
     AI-powered career path oracle that crafts personalized routes based on constraints
     """
     try:
-        print(f"🤖 Career Oracle: ENDPOINT CALLED!")
-        print(f"🤖 Career Oracle: Starting AI crafting for {request.current_role} with {request.experience_years} years experience")
-        print(f"🤖 Career Oracle: Request goal: {request.goal}")
-        print(f"🤖 Career Oracle: Request data: {request.dict()}")
-        
-        # Load constraints from database
-        oracle_db_path = "data/career_oracle_db.json"
-        constraints_context = ""
-        
-        if os.path.exists(oracle_db_path):
-            with open(oracle_db_path, 'r', encoding='utf-8') as f:
-                oracle_data = json.load(f)
-            
-            # Build constraints context for LLM
-            constraints_list = []
-            for role_data in oracle_data:
-                if "constraints" in role_data:
-                    constraints_list.append(
-                        f"- {role_data['role']}: {role_data['constraints']['min_experience']}+ years, "
-                        f"skills: {', '.join(role_data['constraints']['required_skills'])}, "
-                        f"types: {', '.join(role_data['constraints']['career_types'])}"
-                    )
-            
-            constraints_context = "\n".join(constraints_list[:10])  # Limit to avoid token limits
+        logger.debug("Career Oracle: ENDPOINT CALLED!", extra=SAMPLED)
+        logger.info("Career Oracle: Starting AI crafting for %s with %s years experience", request.current_role, request.experience_years)
+        logger.debug("Career Oracle: Request goal: %s", request.goal, extra=SAMPLED)
+        logger.debug("Career Oracle: Request data: %s", request.dict(), extra=SAMPLED)
         
-        # Get OpenAI configuration
-        openai_key = getattr(settings, 'OPENAI_API_KEY', os.getenv('OPENAI_API_KEY'))
-        openai_model = getattr(settings, 'OPENAI_MODEL', os.getenv('OPENAI_MODEL', 'gpt-4o'))
-        
-        print(f"🤖 Career Oracle: OpenAI key status: {'SET' if openai_key else 'NOT SET'}")
-        print(f"🤖 Career Oracle: OpenAI model: {openai_model}")
-        
-        career_trees = []
-        
-        if openai_key and openai_key.strip() != "":
-            try:
-                print(f"🤖 Career Oracle: OpenAI key found, calling LLM to craft personalized routes...")
-                print(f"🤖 Career Oracle: Constraints context length: {len(constraints_context)}")
-                
-                # Craft focused prompt for route generation
-                llm_prompt = f"""Create 2-3 realistic SAP career progression routes for this professional.
-
-PROFILE: {request.current_role} with {request.experience_years} years experience, goal: {request.goal or 'career growth'}
-
-AVAILABLE SAP ROLES:
-{constraints_context}
-
-CAREER PROGRESSION RULES:
-1. TECHNICAL ROLES (Developer, Architect) → Stay in technical track or move to Technical Lead/Manager
-2. FUNCTIONAL ROLES (Consultant, Analyst) → Progress to Senior Consultant, Lead, or Manager
-3. MANAGEMENT ROLES (Manager, Director) → Progress to Senior Management or Executive roles
-4. BUSINESS ROLES (Analyst, Business roles) → Progress to Senior Business roles or Management
-5. EXECUTIVE ROLES (CTO, VP) → Stay in executive track or board positions
-
-POSSIBLE LOGICAL PROGRESSIONS:
-- ABAP Developer → Senior Developer → Technical Lead → Development Manager
-- SAP FI Consultant → Senior Consultant → Functional Lead → Solution Architect
-- SAP Business Analyst → Senior Analyst → Business Process Consultant → Project Manager
-- SAP Project Manager → Senior PM → Program Manager → Director
-- SAP Solution Architect → Senior Architect → Principal Architect → CTO
-- SAP Security Consultant → Senior Security → Security Manager → CISO
-
-Create routes with 2-3 realistic steps each. Each step should show:
-- LOGICAL progression from current role (don't jump between unrelated tracks)
-- Realistic timeline based on their {request.experience_years} years experience
-- Specific SAP skills needed and gained
-- Personal story explaining why this step makes sense
-
-Return JSON format:
-{{
-  "career_routes": [
-    {{
-      "route_name": "Route Name",
-      "route_description": "Brief description",
-      "route_icon": "🎯",
-      "steps": [
-        {{
-          "role": "SAP Role Name",
-          "timeline": "1-2 years",
-          "experience_required": {request.experience_years + 1},
-          "skills_required": ["SAP skill1", "SAP skill2"],
-          "skills_gained": ["new skill1", "new skill2"],
-          "prerequisites": ["prereq1"],
-          "story": "Why this role fits their {request.experience_years} years experience and {request.goal or 'career growth'} goal"
-        }}
-      ]
-    }}
-  ]
-}}
-
-CRITICAL: Follow logical career progression rules above. Don't suggest Project Manager → Solution Architect or other illogical jumps."""
-
-                llm_response = requests.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {openai_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": openai_model,
-                        "messages": [
-                            {"role": "system", "content": "You are an expert SAP career advisor. Generate realistic, personalized career routes in JSON format only."},
-                            {"role": "user", "content": llm_prompt}
-                        ],
-                        "max_tokens": 1200,
-                        "temperature": 0.7
-                    },
-                    timeout=30
-                )
-                
-                if llm_response.status_code == 200:
-                    llm_data = llm_response.json()
-                    llm_content = llm_data["choices"][0]["message"]["content"]
-                    
-                    print(f"🤖 Career Oracle: LLM response status: {llm_response.status_code}")
-                    print(f"🤖 Career Oracle: Raw LLM content: {llm_content[:500]}...")
-                    
-                    # Parse and validate LLM response
-                    try:
-                        print(f"🤖 Career Oracle: Processing LLM response...")
-                        
-                        # Clean the response
-                        cleaned_content = llm_content.strip()
-                        if cleaned_content.startswith("```json"):
-                            cleaned_content = cleaned_content[7:]
-                        if cleaned_content.startswith("```"):
-                            cleaned_content = cleaned_content[3:]
-                        if cleaned_content.endswith("```"):
-                            cleaned_content = cleaned_content[:-3]
-                        cleaned_content = cleaned_content.strip()
-                        
-                        ai_data = json.loads(cleaned_content)
-                        print(f"🔍 Parsed LLM data: {ai_data}")
-                        validated_routes = []
-                        
-                        # Check if we have the expected structure
-                        if "career_routes" not in ai_data:
-                            print("❌ No 'career_routes' key in LLM response")
-                            print(f"Available keys: {list(ai_data.keys())}")
-                            career_trees = []
-                        else:
-                            for route in ai_data.get("career_routes", []):
-                                print(f"🔍 Processing route: {route.get('route_name', 'Unknown')}")
-                                validated_steps = []
-                                
-                                for step in route.get("steps", []):
-                                    # More lenient validation - accept any role that looks professional
-                                    role_name = step.get("role", "").lower()
-                                    if role_name and len(role_name) > 3:  # Basic validation
-                                        step["is_ai_generated"] = True
-                                        validated_steps.append(step)
-                                        print(f"✅ Validated step: {step.get('role')}")
-                                    else:
-                                        print(f"❌ Rejected invalid role: {step.get('role')}")
-                                
-                                if validated_steps:
-                                    validated_routes.append({
-                                        "tree_name": route["route_name"],
-                                        "tree_description": route["route_description"],
-                                        "tree_icon": route["route_icon"],
-                                        "progressive_paths": validated_steps
-                                    })
-                                    print(f"✅ Added route: {route['route_name']}")
-                                else:
-                                    print(f"❌ No valid steps for route: {route.get('route_name')}")
-                            
-                            career_trees = validated_routes
-                        print(f"🤖 Career Oracle: Generated {len(career_trees)} career routes")
-                        
-                        if len(career_trees) == 0:
-                            print("⚠️ No valid career routes generated - all routes were filtered out")
-                            
-                    except json.JSONDecodeError as e:
-                        print(f"❌ Failed to parse LLM response: {str(e)}")
-                        print(f"Raw response: {llm_content[:200]}...")
-                        career_trees = []
-                else:
-                    print(f"❌ LLM API call failed with status: {llm_response.status_code}")
-                    print(f"❌ Response: {llm_response.text}")
-                    career_trees = []
-                        
-            except Exception as e:
-                print(f"❌ LLM generation failed: {str(e)}")
-                career_trees = []
-        else:
-            print("❌ OpenAI API key not configured")
-            career_trees = []
+        # Routes come from the deterministic career graph; the LLM only writes the stories
+        routes = oracle_catalog.graph.routes(request.current_role, request.experience_years, request.goal)
+        logger.debug("Career Oracle: Graph produced %s routes", len(routes), extra=SAMPLED)
+        stories = await _cached_route_stories(request, routes, oracle_catalog) if routes else []
         
-        # Convert to response format
-        final_career_trees = []
-        
-        for tree in career_trees:
-            paths = []
-            for path in tree["progressive_paths"]:
-                paths.append(CareerPath(
-                    level=path.get("level", 1),
-                    role=path["role"],
-                    timeline=path["timeline"],
-                    experience_required=path["experience_required"],
-                    skills_required=path["skills_required"],
-                    skills_gained=path["skills_gained"],
-                    prerequisites=path["prerequisites"],
-                    story=path["story"],
-                    next_levels=path.get("next_levels", []),
-                    is_ai_generated=path.get("is_ai_generated", True)
-                ))
-            
-            final_career_trees.append(CareerTree(
-                tree_name=tree["tree_name"],
-                tree_description=tree["tree_description"],
-                tree_icon=tree["tree_icon"],
-                progressive_paths=paths
-            ))
+        final_career_trees = [
+            _career_tree(request, route, route_stories, ai_written)
+            for route, (route_stories, ai_written) in zip(routes, stories)
+        ]
         
-        print(f"🤖 Career Oracle: Returning {len(final_career_trees)} crafted routes")
-        print(f"🤖 Career Oracle: final_career_trees content: {[tree.tree_name for tree in final_career_trees]}")
+        logger.info("Career Oracle: Returning %s crafted routes", len(final_career_trees))
+        logger.debug("Career Oracle: final_career_trees content: %s", [tree.tree_name for tree in final_career_trees], extra=SAMPLED)
         
         if len(final_career_trees) == 0:
-            print("⚠️ No career routes to return - generating fallback routes")
+            logger.warning("No career routes to return - generating fallback routes")
             # Generate basic fallback routes
             fallback_routes = [
                 {
@@ -501,12 +461,10 @@ CRITICAL: Follow logical career progression rules above. Don't suggest Project M
         )
         
     except Exception as e:
-        print(f"❌ Career oracle error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Career oracle error: %s", e)
         
         # Return fallback response even on error
-        print("🔄 Returning fallback response due to error")
+        logger.error("Returning fallback response due to error")
         fallback_tree = CareerTree(
             tree_name="Career Guidance",
             tree_description="Basic career progression guidance",
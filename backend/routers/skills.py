@@ -5,11 +5,15 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
 import json
-import traceback
+import logging
 from serpapi import GoogleSearch
 
 # Assumes you have your OpenAI API key and SerpAPI key in config.py
 from config import settings
+from tracing import span
+from llm_usage import record_openai_usage
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -51,9 +55,10 @@ def search_courses(skill_name: str, max_results: int = 4) -> List[Resource]:
 
     try:
         search = GoogleSearch(params)
-        results = search.get_dict()
+        with span("serpapi.search"):
+            results = search.get_dict()
     except Exception as e:
-        print(f"Search error for {skill_name}: {e}")
+        logger.error("Search error for %s: %s", skill_name, e)
         return []
 
     resources = []
@@ -103,6 +108,7 @@ async def get_skill_recommendations(request: SkillRecommendationRequest):
             response_format={"type": "json_object"}
         )
 
+        record_openai_usage(skill_response.model, skill_response.usage)
         skills_json = skill_response.choices[0].message.content.strip()
         skills_data = json.loads(skills_json)
         recommendations_list = skills_data.get("recommendations", [])
@@ -130,5 +136,5 @@ async def get_skill_recommendations(request: SkillRecommendationRequest):
         return SkillRecommendationResponse(recommendations=recommendations)
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Skill recommendation error: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to generate skill recommendations: {str(e)}")
@@ -3,13 +3,13 @@ from fastapi import HTTPException, status
 from datetime import datetime
 from models.user import User
 from schemas.auth import UserCreate, UserLogin
-from auth.auth_utils import verify_password, get_password_hash, create_tokens, verify_token
+from auth.auth_utils import get_password_hash_async, verify_and_update_password_async, create_tokens, verify_token
 
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_user(self, user: UserCreate) -> User:
+    async def create_user(self, user: UserCreate) -> User:
         """Create a new user."""
         # Check if user already exists
         db_user = self.db.query(User).filter(
@@ -29,7 +29,7 @@ class AuthService:
                 )
         
         # Create new user
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         db_user = User(
             username=user.username,
             email=user.email,
@@ -42,7 +42,7 @@ class AuthService:
         self.db.refresh(db_user)
         return db_user
 
-    def authenticate_user(self, username: str, password: str) -> User:
+    async def authenticate_user(self, username: str, password: str) -> User:
         """Authenticate a user with username and password."""
         user = self.db.query(User).filter(User.username == username).first()
         
@@ -53,13 +53,18 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Stored hash uses outdated cost parameters - upgrade it transparently
+        if new_hash:
+            user.hashed_password = new_hash
+        
         if not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -68,11 +73,11 @@ class AuthService:
         
         return user
 
-    def login_user(self, user_credentials: UserLogin) -> tuple[User, str, str]:
+    async def login_user(self, user_credentials: UserLogin) -> tuple[User, str, str]:
         """Login a user and return user data with tokens."""
-        user = self.authenticate_user(user_credentials.username, user_credentials.password)
+        user = await self.authenticate_user(user_credentials.username, user_credentials.password)
         
-        # Update last login
+        # Update last login (also persists any rehashed password)
         user.last_login = datetime.utcnow()
         self.db.commit()
         
@@ -0,0 +1,244 @@
+"""
+Career coach result cache keyed by canonicalized quiz answers.
+
+The career quiz has a small discrete answer space (five questions with four
+options each), so many users submit identical answers. Results are cached per
+(model, job catalog version, answers) for CAREER_COACH_CACHE_TTL_SECONDS, and
+concurrent requests for the same answers share a single generation.
+
+Career oracle route stories are cached per (role, experience bucket, goal
+categories). Routes themselves come from the deterministic career graph, so
+only the LLM-written stories are kept - up to ORACLE_CACHE_VARIANTS per key so
+popular profiles still see some variety. Missing variants and entries close to
+expiry are generated in the background while a cached variant is served.
+"""
+import asyncio
+import bisect
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple, TypeVar
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def canonicalize_answers(answers: Dict[str, Any]) -> Tuple[Tuple[str, str], ...]:
+    """Order- and case-insensitive form of a quiz answers dict"""
+    return tuple(sorted((str(key).strip().lower(), str(value).strip().lower()) for key, value in answers.items()))
+
+
+def canonical_answers(answers: Dict[str, Any]) -> Dict[str, str]:
+    """Quiz answers in canonical form, for generating results that are cached under it.
+
+    Quiz option values are lowercase identifiers, so job matching sees the same
+    answers whatever casing or order the client sent.
+    """
+    return dict(canonicalize_answers(answers))
+
+
+class CoachResultCache:
+    """Thread-safe LRU cache with per-entry TTL and per-event-loop request coalescing"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[Any, Hashable], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(answers: Dict[str, Any], model: str, catalog_version: float = 0.0) -> Hashable:
+        return (model, catalog_version, canonicalize_answers(answers))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """Cached value, or the result of compute() shared with concurrent callers for the same key"""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        inflight_key = (loop, key)
+        pending = self._inflight.get(inflight_key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = loop.create_future()
+        self._inflight[inflight_key] = future
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(inflight_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Upper bounds of the experience buckets: 0-1, 2-3, 4-5, 6-8, 9-12, 13+ years
+EXPERIENCE_BUCKET_BOUNDS = (1, 3, 5, 8, 12)
+
+
+def experience_bucket(experience_years: int) -> int:
+    return bisect.bisect_left(EXPERIENCE_BUCKET_BOUNDS, max(0, experience_years))
+
+
+def experience_bucket_label(experience_years: int) -> str:
+    """Human-readable bucket, e.g. "2-3"; the only experience detail cached stories may depend on"""
+    bucket = experience_bucket(experience_years)
+    low = EXPERIENCE_BUCKET_BOUNDS[bucket - 1] + 1 if bucket > 0 else 0
+    if bucket == len(EXPERIENCE_BUCKET_BOUNDS):
+        return f"{low}+"
+    return f"{low}-{EXPERIENCE_BUCKET_BOUNDS[bucket]}"
+
+
+def normalize_role(current_role: str) -> str:
+    return re.sub(r"\s+", " ", (current_role or "").strip().lower())
+
+
+@dataclass
+class _StoryVariant:
+    signature: Hashable
+    stories: Any
+    expires_at: float
+
+
+class OracleStoryCache:
+    """Per-key pools of route story variants with refresh-ahead in the background"""
+
+    # Entries in the last part of their TTL are regenerated in the background
+    REFRESH_AHEAD_FRACTION = 0.1
+
+    def __init__(self, ttl_seconds: float, variants: int, max_keys: int):
+        self.ttl_seconds = ttl_seconds
+        self.variants = max(1, variants)
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[Hashable, List[_StoryVariant]]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(current_role: str, experience_years: int, goal_categories: Tuple[str, ...], model: str, catalog_version: float = 0.0) -> Hashable:
+        return (model, catalog_version, normalize_role(current_role), experience_bucket(experience_years), tuple(sorted(goal_categories)))
+
+    def _lookup(self, key: Hashable, signature: Hashable) -> Tuple[Optional[Any], bool]:
+        """A random live variant for the route signature, and whether the pool needs topping up"""
+        now = time.monotonic()
+        with self._lock:
+            pool = [v for v in self._entries.get(key, []) if v.expires_at > now]
+            if pool:
+                self._entries[key] = pool
+                self._entries.move_to_end(key)
+            else:
+                self._entries.pop(key, None)
+            matching = [v for v in pool if v.signature == signature]
+            if not matching:
+                self.misses += 1
+                return None, True
+            self.hits += 1
+            refresh_at = now + self.ttl_seconds * self.REFRESH_AHEAD_FRACTION
+            needs_more = len(matching) < self.variants or any(v.expires_at <= refresh_at for v in matching)
+            return random.choice(matching).stories, needs_more
+
+    def add(self, key: Hashable, signature: Hashable, stories: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            # Variants for a different route signature are stale (the graph or catalog changed)
+            pool = [v for v in self._entries.get(key, []) if v.signature == signature]
+            pool.append(_StoryVariant(signature, stories, time.monotonic() + self.ttl_seconds))
+            pool.sort(key=lambda v: v.expires_at)
+            self._entries[key] = pool[-self.variants:]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def _refresh_in_background(self, key: Hashable, signature: Hashable, compute: Callable[[], Awaitable[Tuple[Any, bool]]]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def _refresh():
+            try:
+                stories, cacheable = await compute()
+                if cacheable:
+                    self.add(key, signature, stories)
+            except Exception as e:
+                logger.warning("Background oracle story refresh failed: %s", e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = asyncio.get_running_loop().create_task(_refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get_or_compute(self, key: Hashable, signature: Hashable, compute: Callable[[], Awaitable[Tuple[Any, bool]]]) -> Any:
+        """Cached stories for the key and route signature, else compute() inline.
+        compute returns (stories, cacheable); only cacheable results are stored."""
+        if self.ttl_seconds <= 0:
+            return (await compute())[0]
+        cached, needs_more = self._lookup(key, signature)
+        if cached is not None:
+            if needs_more:
+                self._refresh_in_background(key, signature, compute)
+            return cached
+        stories, cacheable = await compute()
+        if cacheable:
+            self.add(key, signature, stories)
+        return stories
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "keys": len(self._entries),
+                "variants": sum(len(pool) for pool in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+coach_cache = CoachResultCache(settings.CAREER_COACH_CACHE_TTL_SECONDS, settings.CAREER_COACH_CACHE_MAX_ENTRIES)
+oracle_story_cache = OracleStoryCache(settings.ORACLE_CACHE_TTL_SECONDS, settings.ORACLE_CACHE_VARIANTS, settings.ORACLE_CACHE_MAX_KEYS)
@@ -0,0 +1,338 @@
+"""
+Deterministic career path engine for the Career Oracle.
+
+Roles from data/career_oracle_db.json become nodes of a DAG. An edge u -> v
+exists when v needs more experience than u (at most MAX_STEP_GAP more years)
+and the move follows the progression rules the oracle prompt used to spell out:
+technical roles stay technical or move into management, functional and
+business roles move up their track or into management, management moves to
+executive, and so on. Well-known ladders (e.g. Junior Developer -> Senior
+Developer -> Technical Lead) are preferred edges. Experience strictly increases
+along every edge, so the graph is acyclic by construction.
+
+Routes are the k cheapest paths of MIN_STEPS..MAX_STEPS steps from the
+user's current role to roles matching their goal (Yen's algorithm over a
+hop-bounded DAG shortest path). Only the story text is left to the LLM.
+"""
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+MIN_STEPS = 2
+MAX_STEPS = 3
+MAX_STEP_GAP = 4           # max extra years of experience between consecutive roles
+TRACK_SWITCH_COST = 1.5    # extra cost for changing tracks
+PREFERRED_EDGE_FACTOR = 0.5
+CANDIDATE_PATHS = 12       # k for the k-shortest-path search before picking diverse routes
+
+# Primary track of a role: first career type found, in this order
+TRACK_PRIORITY = [
+    ("executive", "executive"),
+    ("management", "management"),
+    ("sales", "sales"),
+    ("technical", "technical"),
+    ("functional", "functional"),
+    ("consulting", "functional"),
+    ("business", "business"),
+    ("leadership", "management"),
+]
+
+# Allowed track moves (mirrors the oracle's CAREER PROGRESSION RULES)
+TRACK_TRANSITIONS = {
+    "technical": {"technical", "management"},
+    "functional": {"functional", "management"},
+    "business": {"business", "functional", "management"},
+    "management": {"management", "executive"},
+    "executive": {"executive"},
+    "sales": {"sales", "management"},
+    "specialist": {"specialist", "technical", "functional", "management"},
+}
+
+# Logical progressions from the oracle prompt, expressed with catalog role names
+PREFERRED_PROGRESSIONS = [
+    ("SAP Junior Developer", "SAP Senior Developer"),
+    ("SAP Senior Developer", "SAP Technical Lead"),
+    ("SAP Technical Lead", "SAP Development Manager"),
+    ("SAP FI Consultant", "SAP Senior Consultant"),
+    ("SAP Functional Consultant", "SAP Senior Consultant"),
+    ("SAP Senior Consultant", "SAP Functional Lead"),
+    ("SAP Functional Lead", "SAP Solution Architect"),
+    ("SAP Business Analyst", "SAP Senior Business Analyst"),
+    ("SAP Business Analyst", "SAP Business Process Consultant"),
+    ("SAP Business Process Consultant", "SAP Project Manager"),
+    ("SAP Project Manager", "SAP Senior Project Manager"),
+    ("SAP Senior Project Manager", "SAP Program Manager"),
+    ("SAP Program Manager", "SAP Director"),
+    ("SAP Solution Architect", "SAP Senior Solution Architect"),
+    ("SAP Senior Solution Architect", "SAP Principal Architect"),
+    ("SAP Principal Architect", "SAP Chief Technology Officer"),
+]
+
+# Goal categories: keywords in the goal text -> career types / role-name keywords that satisfy it
+GOAL_TARGETS = [
+    ("leadership", ("leader", "manage", "director", "executive", "head"), {"management", "leadership", "executive"}, ()),
+    ("architecture", ("architect",), set(), ("architect",)),
+    ("technical", ("technical", "mastery", "expert", "engineer", "develop"), {"expert", "senior"}, ("architect", "senior developer", "lead")),
+    ("consulting", ("consult",), {"consulting"}, ("consultant",)),
+    ("innovation", ("innovat", "r&d", "research", "ai", "ml"), {"innovation"}, ()),
+    ("analytics", ("analy", "data"), {"analytics"}, ("analyst",)),
+    ("sales", ("sales",), {"sales"}, ()),
+]
+
+TRACK_ROUTE_STYLE = {
+    "technical": ("Technical Track", "💻"),
+    "functional": ("Functional Track", "🧩"),
+    "business": ("Business Track", "📊"),
+    "management": ("Leadership Track", "👔"),
+    "executive": ("Executive Track", "🏛️"),
+    "sales": ("Sales Track", "🤝"),
+    "specialist": ("Specialist Track", "🎯"),
+}
+
+_START = "__start__"
+_SINK = "__sink__"
+_WORD = re.compile(r"[a-z0-9/&]+")
+
+
+@dataclass(frozen=True)
+class RoleNode:
+    name: str
+    min_experience: int
+    required_skills: Tuple[str, ...]
+    career_types: FrozenSet[str]
+    track: str
+
+
+@dataclass(frozen=True)
+class RouteStep:
+    role: RoleNode
+    experience_required: int
+    years_from_previous: int
+    skills_gained: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class Route:
+    steps: Tuple[RouteStep, ...]
+    cost: float
+
+    @property
+    def track(self) -> str:
+        return self.steps[-1].role.track
+
+
+def _track(career_types: Iterable[str]) -> str:
+    types = set(career_types)
+    for career_type, track in TRACK_PRIORITY:
+        if career_type in types:
+            return track
+    return "specialist"
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower())) - {"sap"}
+
+
+def _skill_overlap(a: RoleNode, b: RoleNode) -> float:
+    left, right = {s.lower() for s in a.required_skills}, {s.lower() for s in b.required_skills}
+    return len(left & right) / len(left | right) if left and right else 0.0
+
+
+class CareerGraph:
+    """Role progression DAG with hop-bounded k-shortest-path route search"""
+
+    def __init__(self, roles: Sequence[Mapping[str, Any]]):
+        self.nodes: Dict[str, RoleNode] = {}
+        for role_data in roles:
+            constraints = role_data.get("constraints")
+            if not constraints or "role" not in role_data:
+                continue
+            types = frozenset(t.lower() for t in constraints.get("career_types", ()))
+            self.nodes[role_data["role"]] = RoleNode(
+                name=role_data["role"],
+                min_experience=int(constraints.get("min_experience", 0)),
+                required_skills=tuple(constraints.get("required_skills", ())),
+                career_types=types,
+                track=_track(types),
+            )
+        self._by_lower = {name.lower(): node for name, node in self.nodes.items()}
+        self.edges: Dict[str, Dict[str, float]] = {name: {} for name in self.nodes}
+        preferred = {(u, v) for u, v in PREFERRED_PROGRESSIONS if u in self.nodes and v in self.nodes}
+        for u in self.nodes.values():
+            for v in self.nodes.values():
+                gap = v.min_experience - u.min_experience
+                if gap <= 0:
+                    continue
+                is_preferred = (u.name, v.name) in preferred
+                if not is_preferred and (gap > MAX_STEP_GAP or v.track not in TRACK_TRANSITIONS[u.track]):
+                    continue
+                cost = gap + (TRACK_SWITCH_COST if v.track != u.track else 0.0) + (1.0 - _skill_overlap(u, v))
+                self.edges[u.name][v.name] = cost * PREFERRED_EDGE_FACTOR if is_preferred else cost
+        # Experience strictly increases along edges, so this is a topological order
+        self.order = sorted(self.nodes, key=lambda name: (self.nodes[name].min_experience, name))
+
+    def resolve_role(self, current_role: str, experience_years: int = 0) -> Optional[RoleNode]:
+        """Catalog node for free-text role input: exact or "SAP "-prefixed name, else best word overlap
+        (ties go to the role whose experience requirement is closest to the user's)"""
+        text = (current_role or "").strip().lower()
+        node = self._by_lower.get(text) or self._by_lower.get(f"sap {text}")
+        if node is not None:
+            return node
+        query = _words(text)
+        best, best_score = None, (0.0, 0)
+        for candidate in self.nodes.values():
+            words = _words(candidate.name)
+            overlap = len(query & words) / len(query | words) if query and words else 0.0
+            score = (overlap, -abs(candidate.min_experience - experience_years))
+            if overlap > 0 and score > best_score:
+                best, best_score = candidate, score
+        return best
+
+    @staticmethod
+    def goal_categories(goal: Optional[str]) -> Tuple[str, ...]:
+        """Goal categories mentioned in free-text goal input; empty for none or unrecognized goals"""
+        text = (goal or "").lower()
+        # Keywords match at word starts ("innovat" matches "innovation", "ai" doesn't match "maintain")
+        return tuple(
+            label for label, keywords, _, _ in GOAL_TARGETS
+            if any(re.search(r"\b" + re.escape(keyword), text) for keyword in keywords)
+        )
+
+    def goal_targets(self, goal: Optional[str]) -> Set[str]:
+        """Role names that satisfy the goal; every role when the goal is empty or unrecognized"""
+        categories = set(self.goal_categories(goal))
+        targets: Set[str] = set()
+        for label, _, types, name_keywords in GOAL_TARGETS:
+            if label in categories:
+                for node in self.nodes.values():
+                    if node.career_types & types or any(k in node.name.lower() for k in name_keywords):
+                        targets.add(node.name)
+        return targets or set(self.nodes)
+
+    def routes(self, current_role: str, experience_years: int, goal: Optional[str] = None,
+               max_routes: int = 3) -> List[Route]:
+        """Up to max_routes diverse, cheapest routes for the profile"""
+        start = self.resolve_role(current_role, experience_years)
+        adjacency = dict(self.edges)
+        if start is not None:
+            source_edges = self.edges[start.name]
+        else:
+            # Unknown role: enter the graph at roles reachable from the user's experience
+            source_edges = {
+                node.name: 1.0 + max(node.min_experience - experience_years, 0)
+                for node in self.nodes.values()
+                if experience_years - 1 <= node.min_experience <= experience_years + MAX_STEP_GAP
+            }
+        adjacency[_START] = source_edges
+        order = [_START] + self.order + [_SINK]
+
+        paths = []
+        # Fall back to fewer steps, then to any destination, when the goal can't be reached
+        for targets, min_steps in ((self.goal_targets(goal), MIN_STEPS), (self.goal_targets(goal), 1),
+                                   (set(self.nodes), MIN_STEPS), (set(self.nodes), 1)):
+            with_sink = {u: ({**edges, _SINK: 0.0} if u in targets else edges) for u, edges in adjacency.items()}
+            paths = _k_shortest_paths(with_sink, order, CANDIDATE_PATHS, min_steps + 1, MAX_STEPS + 1)
+            if paths:
+                break
+
+        chosen: List[List[str]] = []
+        used_ends: Set[str] = set()
+        used_first: Set[str] = set()
+        # Prefer distinct destinations, then distinct first steps, then anything
+        for strict in (2, 1, 0):
+            for _, path in paths:
+                if len(chosen) >= max_routes:
+                    break
+                roles = path[1:-1]
+                if roles in chosen:
+                    continue
+                if strict >= 1 and roles[-1] in used_ends:
+                    continue
+                if strict >= 2 and roles[0] in used_first:
+                    continue
+                chosen.append(roles)
+                used_ends.add(roles[-1])
+                used_first.add(roles[0])
+
+        cost_by_path = {tuple(path[1:-1]): cost for cost, path in paths}
+        return [self._route(start, experience_years, roles, cost_by_path[tuple(roles)]) for roles in chosen]
+
+    def _route(self, start: Optional[RoleNode], experience_years: int, roles: List[str], cost: float) -> Route:
+        steps = []
+        previous, experience = start, experience_years
+        for name in roles:
+            node = self.nodes[name]
+            required = max(node.min_experience, experience + 1)
+            known = {s.lower() for s in previous.required_skills} if previous else set()
+            gained = tuple(s for s in node.required_skills if s.lower() not in known)[:3]
+            steps.append(RouteStep(node, required, required - experience, gained))
+            previous, experience = node, required
+        return Route(tuple(steps), round(cost, 3))
+
+
+def _shortest_path(adjacency: Mapping[str, Mapping[str, float]], order: Sequence[str], source: str,
+                   min_hops: int, max_hops: int, banned_nodes: Set[str],
+                   banned_edges: Set[Tuple[str, str]]) -> Optional[Tuple[float, List[str]]]:
+    """Cheapest source -> sink path with min_hops..max_hops edges on the DAG (layered DP)"""
+    if source in banned_nodes:
+        return None
+    position = {node: i for i, node in enumerate(order)}
+    # best[h][node] = (cost, predecessor) using exactly h edges
+    best: List[Dict[str, Tuple[float, Optional[str]]]] = [{source: (0.0, None)}]
+    for _ in range(max_hops):
+        layer: Dict[str, Tuple[float, Optional[str]]] = {}
+        for u, (cost, _) in best[-1].items():
+            for v, weight in adjacency.get(u, {}).items():
+                if v in banned_nodes or (u, v) in banned_edges or position.get(v, -1) <= position[u]:
+                    continue
+                candidate = cost + weight
+                if v not in layer or candidate < layer[v][0]:
+                    layer[v] = (candidate, u)
+        best.append(layer)
+
+    options = [(best[h][_SINK][0], h) for h in range(max(min_hops, 1), max_hops + 1) if _SINK in best[h]]
+    if not options:
+        return None
+    cost, hops = min(options)
+    path, node = [_SINK], _SINK
+    for h in range(hops, 0, -1):
+        node = best[h][node][1]
+        path.append(node)
+    return cost, path[::-1]
+
+
+def _path_cost(adjacency: Mapping[str, Mapping[str, float]], path: Sequence[str]) -> float:
+    return sum(adjacency[u][v] for u, v in zip(path, path[1:]))
+
+
+def _k_shortest_paths(adjacency: Mapping[str, Mapping[str, float]], order: Sequence[str], k: int,
+                      min_hops: int, max_hops: int) -> List[Tuple[float, List[str]]]:
+    """Yen's algorithm for the k cheapest loopless _START -> _SINK paths within the hop bounds"""
+    first = _shortest_path(adjacency, order, _START, min_hops, max_hops, set(), set())
+    if first is None:
+        return []
+    accepted = [first]
+    seen = {tuple(first[1])}
+    candidates: List[Tuple[float, List[str]]] = []
+    while len(accepted) < k:
+        previous = accepted[-1][1]
+        for i in range(len(previous) - 1):
+            root = previous[:i + 1]
+            banned_edges = {(path[i], path[i + 1]) for _, path in accepted if path[:i + 1] == root}
+            spur = _shortest_path(adjacency, order, root[-1], min_hops - i, max_hops - i, set(root[:-1]), banned_edges)
+            if spur is None:
+                continue
+            path = root[:-1] + spur[1]
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (_path_cost(adjacency, path), path))
+        if not candidates:
+            break
+        accepted.append(heapq.heappop(candidates))
+    return accepted
+
+
+def route_style(route: Route) -> Tuple[str, str]:
+    """(tree name, icon) for a route's destination track"""
+    return TRACK_ROUTE_STYLE.get(route.track, TRACK_ROUTE_STYLE["specialist"])
@@ -0,0 +1,152 @@
+"""
+Shared read-only data catalogs.
+
+The SAP job catalog (data/sap_jobs.json) and the career oracle role database
+(data/career_oracle_db.json) are parsed once per process into immutable,
+indexed structures and handed to routes through FastAPI dependencies. A file's
+mtime is checked at most every CATALOG_RELOAD_CHECK_SECONDS; when it changes the
+file is re-parsed and the new catalog swapped in. If the new file fails to
+parse, the previous catalog stays in use.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Generic, Mapping, Optional, Tuple, TypeVar
+from config import settings
+from services.recommendation_service import (
+    JobFeatureMatrix, NUMPY_AVAILABLE, SAPJobRecommendationService
+)
+from services.career_graph import CareerGraph
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+T = TypeVar("T")
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts to read-only mappings and lists to tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+@dataclass(frozen=True)
+class JobCatalog:
+    """SAP jobs with lookup indexes and the precompiled scoring matrix"""
+    jobs: Tuple[Mapping[str, Any], ...]
+    by_id: Mapping[Any, Mapping[str, Any]]
+    by_category: Mapping[str, Tuple[Mapping[str, Any], ...]]
+    feature_matrix: Optional[JobFeatureMatrix]
+    version: float = 0.0
+
+    @classmethod
+    def from_data(cls, data: Any, version: float = 0.0) -> "JobCatalog":
+        jobs = freeze(data.get("sap_jobs", []) if isinstance(data, dict) else [])
+        by_category = {}
+        for job in jobs:
+            by_category.setdefault(job.get("category", ""), []).append(job)
+        return cls(
+            jobs=jobs,
+            by_id=MappingProxyType({job.get("id"): job for job in jobs}),
+            by_category=MappingProxyType({category: tuple(items) for category, items in by_category.items()}),
+            feature_matrix=JobFeatureMatrix(jobs) if NUMPY_AVAILABLE and jobs else None,
+            version=version,
+        )
+
+
+@dataclass(frozen=True)
+class OracleCatalog:
+    """Career oracle roles indexed by lower-cased role name, plus the progression graph"""
+    roles: Tuple[Mapping[str, Any], ...]
+    by_role: Mapping[str, Mapping[str, Any]]
+    graph: CareerGraph
+    version: float = 0.0
+
+    @classmethod
+    def from_data(cls, data: Any, version: float = 0.0) -> "OracleCatalog":
+        roles = freeze(data if isinstance(data, list) else [])
+        return cls(
+            roles=roles,
+            by_role=MappingProxyType({role_data["role"].lower(): role_data for role_data in roles if "role" in role_data}),
+            graph=CareerGraph(roles),
+            version=version,
+        )
+
+
+class ReloadingCatalog(Generic[T]):
+    """A JSON file parsed once and re-parsed when its mtime changes"""
+
+    def __init__(self, path: Path, builder: Callable[[Any, float], T], check_interval: Optional[float] = None):
+        self.path = Path(path)
+        self.builder = builder
+        self.check_interval = settings.CATALOG_RELOAD_CHECK_SECONDS if check_interval is None else check_interval
+        self._value: Optional[T] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        """Current catalog, reloading first if the file changed"""
+        value = self._value
+        if value is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return value
+        with self._lock:
+            if self._value is None or time.monotonic() - self._checked_at >= self.check_interval:
+                self._refresh()
+            return self._value
+
+    def _refresh(self) -> None:
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if self._value is None:
+                logger.error("Catalog %s unavailable: %s", self.path.name, e)
+                self._value = self.builder(None, 0.0)
+            return
+        if mtime == self._mtime and self._value is not None:
+            return
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._value = self.builder(data, mtime)
+            self._mtime = mtime
+            logger.info("Loaded catalog %s", self.path.name)
+        except Exception as e:
+            logger.error("Error loading catalog %s: %s", self.path.name, e)
+            if self._value is None:
+                self._value = self.builder(None, 0.0)
+
+
+job_catalog: ReloadingCatalog[JobCatalog] = ReloadingCatalog(DATA_DIR / "sap_jobs.json", JobCatalog.from_data)
+oracle_catalog: ReloadingCatalog[OracleCatalog] = ReloadingCatalog(DATA_DIR / "career_oracle_db.json", OracleCatalog.from_data)
+
+
+def preload_catalogs() -> None:
+    """Parse all catalogs up front so the first requests don't pay for it"""
+    job_catalog.get()
+    oracle_catalog.get()
+
+
+# FastAPI dependencies
+
+def get_job_catalog() -> JobCatalog:
+    return job_catalog.get()
+
+
+def get_oracle_catalog() -> OracleCatalog:
+    return oracle_catalog.get()
+
+
+def get_recommendation_service() -> SAPJobRecommendationService:
+    return SAPJobRecommendationService(job_catalog.get())
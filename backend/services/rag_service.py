@@ -20,6 +20,9 @@ except ImportError as e:
     logging.warning(f"RAG dependencies not available: {e}")
     RAG_DEPENDENCIES_AVAILABLE = False
 
+from tracing import traced
+from llm_usage import usage_callback
+
 logger = logging.getLogger(__name__)
 
 
@@ -114,7 +117,8 @@ class RAGService:
         self.llm = ChatOpenAI(
             model=self.LLM_MODEL,
             temperature=self.LLM_TEMPERATURE,
-            openai_api_key=self.openai_api_key
+            openai_api_key=self.openai_api_key,
+            callbacks=[usage_callback]
         )
         logger.info(f"ChatOpenAI initialized with model: {self.LLM_MODEL}")
     
@@ -186,6 +190,7 @@ class RAGService:
             logger.error(f"Error in RAG query: {e}")
             return self._create_error_response(f"Query processing failed: {str(e)}")
     
+    @traced("rag.retrieve_documents")
     def _retrieve_documents(self, question: str, k: int, score_threshold: float) -> Tuple[List[Document], List[float]]:
         """Retrieve and filter documents based on similarity scores"""
         # Retrieve more documents than needed to allow for filtering
@@ -208,6 +213,7 @@ class RAGService:
         """Extract source information from documents"""
         return [doc.metadata.get('source', 'Unknown') for doc in docs]
     
+    @traced("rag.generate_response")
     def _generate_response(self, context: str, question: str) -> str:
         """Generate response using RAG chain"""
         prompt = ChatPromptTemplate.from_template("""
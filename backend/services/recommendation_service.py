@@ -1,129 +1,209 @@
-import json
-import os
-from typing import List, Dict, Any
-from pathlib import Path
+import logging
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+from logging_config import SAMPLED
+
+# NumPy powers vectorized scoring; fall back to the per-job loop without it
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from services.catalog import JobCatalog
+
+logger = logging.getLogger(__name__)
+
+# Map quiz answers to job work styles
+ANSWER_MAPPING = {
+    'technical_expert': ['technical', 'analytical'],
+    'team_lead': ['leadership', 'management', 'collaborative'],
+    'management': ['leadership', 'management'],
+    'entrepreneur': ['innovative', 'strategic'],
+    'startup': ['innovative', 'technical'],
+    'enterprise': ['systematic', 'analytical'],
+    'consulting': ['collaborative', 'analytical'],
+    'remote': ['remote_friendly'],
+    'technical': ['technical', 'analytical'],
+    'business': ['analytical', 'collaborative'],
+    'leadership': ['leadership', 'management'],
+    'innovation': ['innovative', 'strategic'],
+    'analytical': ['analytical', 'systematic'],
+    'collaborative': ['collaborative'],
+    'creative': ['innovative'],
+    'systematic': ['systematic', 'analytical'],
+    'impact': ['leadership', 'strategic'],
+    'growth': ['growth_potential'],
+    'stability': ['enterprise'],
+    'recognition': ['leadership', 'management']
+}
+ENVIRONMENT_ANSWERS = ('startup', 'enterprise', 'consulting', 'remote')
+LEADERSHIP_ANSWERS = ('team_lead', 'management', 'leadership')
+HIGH_GROWTH_LEVELS = ('High', 'Very High')
+SENIOR_LEVELS = ('Senior',)
+
+WORK_STYLE_WEIGHT = 0.4
+ENVIRONMENT_WEIGHT = 0.3
+GROWTH_WEIGHT = 0.2
+EXPERIENCE_WEIGHT = 0.1
+
+
+class JobFeatureMatrix:
+    """Job catalog compiled to one-hot features (work style, environment, growth, experience).
+
+    Quiz answers become a weight vector over the same columns, so scoring the
+    whole catalog is one matrix-vector product. Scores match
+    SAPJobRecommendationService._calculate_match_score.
+    """
+
+    def __init__(self, jobs: List[Dict[str, Any]]):
+        self.jobs = jobs
+        self.columns: Dict[str, int] = {}
+        rows, cols = [], []
+        for i, job in enumerate(jobs):
+            features = {f"work_style:{style}" for style in job.get('work_style', [])}
+            features.update(f"environment:{env}" for env in job.get('environment', []))
+            features.add(f"growth:{job.get('growth_potential', 'Medium')}")
+            features.add(f"experience:{job.get('experience_level', 'Mid')}")
+            for feature in features:
+                rows.append(i)
+                cols.append(self.columns.setdefault(feature, len(self.columns)))
+        self.matrix = np.zeros((len(jobs), len(self.columns)), dtype=np.float64)
+        self.matrix[rows, cols] = 1.0
+
+    def weight_vector(self, user_responses: Dict[str, str]) -> Tuple["np.ndarray", float]:
+        """Per-column weights for these answers and the normalizing total weight"""
+        weights = np.zeros(len(self.columns), dtype=np.float64)
+        total_weight = 0.0
+
+        def add(feature: str, weight: float):
+            index = self.columns.get(feature)
+            if index is not None:
+                weights[index] += weight
+
+        for answer_value in user_responses.values():
+            if answer_value in ANSWER_MAPPING:
+                for style in ANSWER_MAPPING[answer_value]:
+                    add(f"work_style:{style}", WORK_STYLE_WEIGHT)
+                total_weight += WORK_STYLE_WEIGHT
+            if answer_value in ENVIRONMENT_ANSWERS:
+                add(f"environment:{answer_value}", ENVIRONMENT_WEIGHT)
+                total_weight += ENVIRONMENT_WEIGHT
+            if answer_value == 'growth':
+                for level in HIGH_GROWTH_LEVELS:
+                    add(f"growth:{level}", GROWTH_WEIGHT)
+                total_weight += GROWTH_WEIGHT
+            if answer_value in LEADERSHIP_ANSWERS:
+                for level in SENIOR_LEVELS:
+                    add(f"experience:{level}", EXPERIENCE_WEIGHT)
+                total_weight += EXPERIENCE_WEIGHT
+        return weights, total_weight
+
+    def scores(self, user_responses: Dict[str, str]) -> "np.ndarray":
+        """Match score (0-1) for every job in catalog order"""
+        weights, total_weight = self.weight_vector(user_responses)
+        return self.matrix @ weights / max(total_weight, 1.0)
+
+    def top_k(self, user_responses: Dict[str, str], k: int) -> List[Tuple[Dict[str, Any], float]]:
+        """Highest scoring (job, score) pairs; ties keep catalog order like a stable sort"""
+        if not self.jobs or k <= 0:
+            return []
+        # Round away float noise so equal scores tie the same way as the reference loop
+        scores = np.round(self.scores(user_responses), 9)
+        k = min(k, len(scores))
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+        return [(self.jobs[i], float(scores[i])) for i in ranked]
+
 
 class SAPJobRecommendationService:
     """Recommendation service for matching SAP jobs based on user profile and preferences"""
     
-    def __init__(self):
-        self.jobs_data = self._load_jobs_data()
-    
-    def _load_jobs_data(self) -> List[Dict[str, Any]]:
-        """Load SAP jobs data from JSON file"""
-        try:
-            data_file = Path(__file__).parent.parent / "data" / "sap_jobs.json"
-            with open(data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('sap_jobs', [])
-        except Exception as e:
-            print(f"Error loading jobs data: {e}")
-            return []
+    def __init__(self, catalog: Optional["JobCatalog"] = None):
+        if catalog is None:
+            # Shared, parsed-once catalog (see services/catalog.py)
+            from services.catalog import job_catalog
+            catalog = job_catalog.get()
+        self.catalog = catalog
+        self.jobs_data = catalog.jobs
+        self.feature_matrix: Optional[JobFeatureMatrix] = catalog.feature_matrix
     
     def _calculate_match_score(self, job: Dict[str, Any], user_responses: Dict[str, str]) -> float:
-        """Calculate how well a job matches user responses"""
+        """Calculate how well a job matches user responses (reference for JobFeatureMatrix)"""
         score = 0.0
         total_weight = 0.0
         
-        # Map quiz answers to job attributes
-        answer_mapping = {
-            'technical_expert': ['technical', 'analytical'],
-            'team_lead': ['leadership', 'management', 'collaborative'],
-            'management': ['leadership', 'management'],
-            'entrepreneur': ['innovative', 'strategic'],
-            'startup': ['innovative', 'technical'],
-            'enterprise': ['systematic', 'analytical'],
-            'consulting': ['collaborative', 'analytical'],
-            'remote': ['remote_friendly'],
-            'technical': ['technical', 'analytical'],
-            'business': ['analytical', 'collaborative'],
-            'leadership': ['leadership', 'management'],
-            'innovation': ['innovative', 'strategic'],
-            'analytical': ['analytical', 'systematic'],
-            'collaborative': ['collaborative'],
-            'creative': ['innovative'],
-            'systematic': ['systematic', 'analytical'],
-            'impact': ['leadership', 'strategic'],
-            'growth': ['growth_potential'],
-            'stability': ['enterprise'],
-            'recognition': ['leadership', 'management']
-        }
-        
         # Calculate work style match
-        work_style_weight = 0.4
         job_work_styles = job.get('work_style', [])
         for answer_key, answer_value in user_responses.items():
-            if answer_value in answer_mapping:
-                matching_styles = answer_mapping[answer_value]
+            if answer_value in ANSWER_MAPPING:
+                matching_styles = ANSWER_MAPPING[answer_value]
                 for style in matching_styles:
                     if style in job_work_styles:
-                        score += work_style_weight
-                total_weight += work_style_weight
+                        score += WORK_STYLE_WEIGHT
+                total_weight += WORK_STYLE_WEIGHT
         
         # Calculate environment match
-        environment_weight = 0.3
         job_environments = job.get('environment', [])
         for answer_key, answer_value in user_responses.items():
-            if answer_value in ['startup', 'enterprise', 'consulting', 'remote']:
+            if answer_value in ENVIRONMENT_ANSWERS:
                 if answer_value in job_environments:
-                    score += environment_weight
-                total_weight += environment_weight
+                    score += ENVIRONMENT_WEIGHT
+                total_weight += ENVIRONMENT_WEIGHT
         
         # Calculate growth potential match
-        growth_weight = 0.2
         job_growth = job.get('growth_potential', 'Medium')
         for answer_key, answer_value in user_responses.items():
             if answer_value == 'growth':
-                if job_growth in ['High', 'Very High']:
-                    score += growth_weight
-                total_weight += growth_weight
+                if job_growth in HIGH_GROWTH_LEVELS:
+                    score += GROWTH_WEIGHT
+                total_weight += GROWTH_WEIGHT
         
         # Calculate experience level match (bonus for senior roles if leadership/management chosen)
-        experience_weight = 0.1
         job_experience = job.get('experience_level', 'Mid')
         for answer_key, answer_value in user_responses.items():
-            if answer_value in ['team_lead', 'management', 'leadership']:
-                if job_experience in ['Senior']:
-                    score += experience_weight
-                total_weight += experience_weight
+            if answer_value in LEADERSHIP_ANSWERS:
+                if job_experience in SENIOR_LEVELS:
+                    score += EXPERIENCE_WEIGHT
+                total_weight += EXPERIENCE_WEIGHT
         
         return score / max(total_weight, 1.0)  # Normalize to 0-1
     
     def get_recommended_jobs(self, user_responses: Dict[str, str], top_k: int = 5) -> List[Dict[str, Any]]:
         """Get top-k recommended SAP jobs based on user responses and preferences"""
-        print(f"\n🔍 Recommendation Service: Starting job matching for user responses: {user_responses}")
+        logger.debug("Recommendation Service: Starting job matching for user responses: %s", user_responses, extra=SAMPLED)
         
         if not self.jobs_data:
-            print("❌ Recommendation Service: No jobs data loaded!")
+            logger.warning("Recommendation Service: No jobs data loaded!")
             return []
         
-        print(f"📊 Recommendation Service: Analyzing {len(self.jobs_data)} SAP jobs...")
-        
-        # Calculate match scores for all jobs
-        job_scores = []
-        for job in self.jobs_data:
-            score = self._calculate_match_score(job, user_responses)
-            job_scores.append((job, score))
-            print(f"   📋 {job['title']}: Score {score:.3f}")
+        logger.debug("Recommendation Service: Analyzing %s SAP jobs...", len(self.jobs_data), extra=SAMPLED)
         
-        # Sort by score (highest first) and return top-k
-        job_scores.sort(key=lambda x: x[1], reverse=True)
-        top_jobs = [job for job, score in job_scores[:top_k]]
+        if self.feature_matrix is not None:
+            # One mat-vec over the catalog plus a partial sort for the top-k
+            top_scores = self.feature_matrix.top_k(user_responses, top_k)
+        else:
+            job_scores = [(job, self._calculate_match_score(job, user_responses)) for job in self.jobs_data]
+            job_scores.sort(key=lambda x: x[1], reverse=True)
+            top_scores = job_scores[:top_k]
+        top_jobs = [job for job, score in top_scores]
         
-        print(f"\n✅ Recommendation Service: Top {top_k} matching jobs:")
-        for i, (job, score) in enumerate(job_scores[:top_k], 1):
-            print(f"   {i}. {job['title']} (Score: {score:.3f})")
-            print(f"      Skills: {', '.join(job['skills'][:3])}...")
-            print(f"      Work Style: {', '.join(job['work_style'])}")
+        if logger.isEnabledFor(logging.DEBUG):
+            top_summary = "; ".join(
+                f"{i}. {job['title']} ({score:.3f}, {', '.join(job['work_style'])})"
+                for i, (job, score) in enumerate(top_scores, 1)
+            )
+            logger.debug("Recommendation Service: Top %s matching jobs: %s", top_k, top_summary, extra=SAMPLED)
         
         return top_jobs
     
     def get_job_context(self, relevant_jobs: List[Dict[str, Any]]) -> str:
         """Convert recommended jobs into context string for LLM"""
-        print(f"\n📝 Recommendation Service: Generating context for {len(relevant_jobs)} recommended jobs...")
+        logger.debug("Recommendation Service: Generating context for %s recommended jobs...", len(relevant_jobs), extra=SAMPLED)
         
         if not relevant_jobs:
-            print("❌ Recommendation Service: No recommended jobs to generate context from!")
+            logger.warning("Recommendation Service: No recommended jobs to generate context from!")
             return "No recommended jobs found."
         
         context = "Relevant SAP job opportunities based on your profile:\n\n"
@@ -136,7 +216,7 @@ class SAPJobRecommendationService:
             context += f"   Growth: {job['growth_potential']}\n"
             context += f"   Description: {job['description']}\n\n"
         
-        print(f"✅ Recommendation Service: Generated context with {len(context)} characters")
-        print(f"📄 Recommendation Service: Context preview: {context[:200]}...")
+        logger.debug("Recommendation Service: Generated context with %s characters", len(context), extra=SAMPLED)
+        logger.debug("Recommendation Service: Context preview: %s...", context[:200], extra=SAMPLED)
         
         return context
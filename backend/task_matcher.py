@@ -0,0 +1,134 @@
+"""
+Single-pass keyword matcher for onboarding task detection.
+
+All keywords used by the onboarding nodes, node transitions and points
+calculation are compiled into one regex at import. A message is lowercased and
+scanned once; the result is the set of (target, signal) pairs whose rules are
+satisfied, e.g. ("welcome_video", "completed") or ("personal_info", "transition_cue").
+"""
+import re
+from typing import Dict, List, Set, Tuple
+
+# Keyword groups - matching is substring based, same as the previous `in` checks
+KEYWORD_GROUPS: Dict[str, List[str]] = {
+    # Node 1: Welcome & Company Overview (user message)
+    "welcome_completion": [
+        "watched", "completed", "finished", "done", "reviewed", "read", "studied",
+        "gone through", "looked at", "checked", "examined", "understood", "finished watching"
+    ],
+    "video_topic": ["video", "welcome video"],
+    "policy_topic": ["policy", "policies"],
+    "quiz_topic": ["quiz", "culture quiz"],
+    "perks_topic": ["perks", "benefits"],
+
+    # Node 2: Personal Information (user message)
+    "form_completion": [
+        "submitted", "completed", "finished", "done", "filled out", "filled in",
+        "provided", "entered", "gave", "supplied"
+    ],
+    "form_topic": ["form", "information", "personal info"],
+
+    # Node 3: Account Setup (user message)
+    "credential_topic": ["password", "username"],
+    "credential_action": ["set", "updated", "changed"],
+    "access_topic": ["sap", "access"],
+    "access_action": ["granted", "provided", "set up"],
+    "permission_topic": ["permissions", "two-factor", "2fa"],
+    "permission_action": ["enabled", "set up", "configured"],
+
+    # Points inference from freeform messages
+    "policies_mention": ["policies"],
+    "perks_mention": ["perks"],
+    "personal_information_mention": ["personal information"],
+    "account_setup_mention": ["account setup"],
+    "complete_mention": ["complete"],
+
+    # Node transitions (AI response)
+    "personal_info_marker": ["→ personal_info"],
+    "personal_info_topic": ["personal information", "personal info"],
+    "personal_info_cue": ["move on", "next step", "let's", "now", "ready to begin", "move to personal information"],
+    "account_setup_marker": ["→ account_setup"],
+    "account_setup_topic": ["account setup", "account set up"],
+    "account_setup_cue": [
+        "move on", "next step", "let's", "now", "ready to begin",
+        "personal information collection complete", "get your accounts all set up"
+    ],
+    "account_setup_done": ["personal information collection complete", "get your accounts all set up"],
+}
+
+# (target, signal, keyword groups that must all be present)
+TASK_RULES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    # Task completion detected in the user message
+    ("welcome_video", "completed", ("welcome_completion", "video_topic")),
+    ("company_policies", "completed", ("welcome_completion", "policy_topic")),
+    ("culture_quiz", "completed", ("welcome_completion", "quiz_topic")),
+    ("employee_perks", "completed", ("welcome_completion", "perks_topic")),
+    ("personal_info_form", "completed", ("form_completion", "form_topic")),
+    ("email_setup", "completed", ("credential_topic", "credential_action")),
+    ("sap_access", "completed", ("access_topic", "access_action")),
+    ("permissions", "completed", ("permission_topic", "permission_action")),
+
+    # Task mentioned at all (used for points inference)
+    ("welcome_video", "mentioned", ("video_topic",)),
+    ("company_policies", "mentioned", ("policies_mention",)),
+    ("culture_quiz", "mentioned", ("quiz_topic",)),
+    ("employee_perks", "mentioned", ("perks_mention",)),
+    ("personal_info_form", "mentioned", ("personal_information_mention",)),
+    ("account_setup", "mentioned", ("account_setup_mention", "complete_mention")),
+
+    # Node transitions detected in the AI response
+    ("personal_info", "transition_marker", ("personal_info_marker",)),
+    ("personal_info", "transition_cue", ("personal_info_topic", "personal_info_cue")),
+    ("account_setup", "transition_marker", ("account_setup_marker",)),
+    ("account_setup", "transition_cue", ("account_setup_topic", "account_setup_cue")),
+    ("account_setup", "transition_done", ("account_setup_done",)),
+]
+
+
+def _compile_matcher():
+    """Build the scanning regex plus keyword -> group lookup tables"""
+    keyword_groups: Dict[str, Set[str]] = {}
+    for group, keywords in KEYWORD_GROUPS.items():
+        for keyword in keywords:
+            keyword_groups.setdefault(keyword, set()).add(group)
+
+    # Longest first so the alternation reports the longest keyword at each position
+    keywords = sorted(keyword_groups, key=len, reverse=True)
+    # Zero-width lookahead lets matches overlap (e.g. "finished watching" and "watched")
+    pattern = re.compile("(?=(" + "|".join(re.escape(k) for k in keywords) + "))")
+
+    # Any shorter keyword starting at the same position is a prefix of the reported one
+    groups_at_match: Dict[str, frozenset] = {}
+    for keyword in keywords:
+        groups = set()
+        for other in keywords:
+            if keyword.startswith(other):
+                groups |= keyword_groups[other]
+        groups_at_match[keyword] = frozenset(groups)
+
+    return pattern, groups_at_match
+
+
+_PATTERN, _GROUPS_AT_MATCH = _compile_matcher()
+
+
+def match_keyword_groups(text: str) -> Set[str]:
+    """Scan text once and return every keyword group that occurs in it"""
+    found: Set[str] = set()
+    if not text:
+        return found
+    for keyword in _PATTERN.findall(text.lower()):
+        found |= _GROUPS_AT_MATCH[keyword]
+    return found
+
+
+def match_task_signals(text: str) -> Set[Tuple[str, str]]:
+    """Scan text once and return every matched (target, signal) pair"""
+    groups = match_keyword_groups(text)
+    if not groups:
+        return set()
+    return {
+        (target, signal)
+        for target, signal, required in TASK_RULES
+        if all(group in groups for group in required)
+    }
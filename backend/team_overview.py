@@ -0,0 +1,63 @@
+"""
+Cached manager team overviews.
+
+GET /api/performance/managers/{user_id}/team-overview computes every direct
+report's summary, goal stats and latest insight with get_team_overview (two
+set-based statements). Results are kept per manager for up to
+TEAM_OVERVIEW_CACHE_TTL_SECONDS and dropped as soon as a committed write
+touches one of the manager's reports (see on_performance_write in db.py), so
+the next request recomputes them. Invalidation is per process; other workers
+catch up within the TTL.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from config import settings
+from db import ALL_EMPLOYEES, on_performance_write
+
+
+class TeamOverviewCache:
+    """Per-manager overviews, invalidated by writes to any member of the team"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # manager id -> (expires_at, member keys, overview)
+        self._entries: Dict[int, Tuple[float, Set[Any], List[dict]]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Read before computing an overview and pass to put(), so results racing a write are discarded"""
+        return self._generation
+
+    def get(self, manager_id: int) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._entries.get(manager_id)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(manager_id, None)
+                return None
+            return entry[2]
+
+    def put(self, manager_id: int, overview: List[dict], generation: int) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        members = {report['id'] for report in overview} | {report['user_id'] for report in overview}
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[manager_id] = (time.monotonic() + self.ttl_seconds, members, overview)
+
+    def invalidate(self, employee_keys: Set[Any]) -> None:
+        with self._lock:
+            self._generation += 1
+            if ALL_EMPLOYEES in employee_keys:
+                self._entries.clear()
+                return
+            stale = [manager_id for manager_id, (_, members, _) in self._entries.items() if members & employee_keys]
+            for manager_id in stale:
+                del self._entries[manager_id]
+
+
+team_overview_cache = TeamOverviewCache(settings.TEAM_OVERVIEW_CACHE_TTL_SECONDS)
+on_performance_write(team_overview_cache.invalidate)
@@ -0,0 +1,240 @@
+"""
+Request-level latency instrumentation.
+
+TracingMiddleware times every request and collects the stage spans recorded
+while handling it. Spans are added with the `span(stage)` context manager or
+the `@traced(stage)` decorator; SQLAlchemy commits are timed automatically.
+Durations are exported as histograms on /metrics:
+
+- automateai_request_duration_seconds{method, route, status}
+- automateai_stage_duration_seconds{route, stage}
+
+prometheus_client is used when installed; otherwise a small built-in registry
+renders the same metrics in the Prometheus text format. Requests slower than
+SLOW_REQUEST_LOG_MS are logged with their stage breakdown.
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional Prometheus client, handle gracefully if not installed
+try:
+    from prometheus_client import Histogram, CONTENT_TYPE_LATEST, generate_latest
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage spans recorded during the current request: [(stage, seconds), ...]
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+# ASGI scope of the current request; routing fills in endpoint and path_params
+_request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_scope", default=None)
+_route_paths: Dict[Any, str] = {}
+
+
+class _FallbackHistogram:
+    """Minimal labelled histogram used when prometheus_client is unavailable"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            # Per-bucket counts, then count and sum
+            series = self._series.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._series.items()]
+        for labels, series in items:
+            base = ",".join(f'{name}="{value}"' for name, value in zip(self.labelnames, labels))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative:g}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-2]:g}')
+            lines.append(f"{self.name}_count{{{base}}} {series[-2]:g}")
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+        return lines
+
+
+class _Metrics:
+    """Request and stage histograms, backed by prometheus_client when available"""
+
+    def __init__(self):
+        request_args = ("automateai_request_duration_seconds", "HTTP request latency by route",
+                        ("method", "route", "status"))
+        stage_args = ("automateai_stage_duration_seconds", "Latency of instrumented stages by route",
+                      ("route", "stage"))
+        if PROMETHEUS_AVAILABLE:
+            self._request = Histogram(*request_args, buckets=LATENCY_BUCKETS)
+            self._stage = Histogram(*stage_args, buckets=LATENCY_BUCKETS)
+        else:
+            self._request = _FallbackHistogram(*request_args)
+            self._stage = _FallbackHistogram(*stage_args)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        labels = (method, route, str(status))
+        if PROMETHEUS_AVAILABLE:
+            self._request.labels(*labels).observe(seconds)
+        else:
+            self._request.observe(labels, seconds)
+
+    def observe_stage(self, route: str, stage: str, seconds: float) -> None:
+        if PROMETHEUS_AVAILABLE:
+            self._stage.labels(route, stage).observe(seconds)
+        else:
+            self._stage.observe((route, stage), seconds)
+
+    def render(self) -> bytes:
+        if PROMETHEUS_AVAILABLE:
+            return generate_latest()
+        return ("\n".join(self._request.render() + self._stage.render()) + "\n").encode("utf-8")
+
+
+metrics = _Metrics()
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Resolve the matched route's path template (e.g. /api/user/{user_id}/chat)"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    path = _route_paths.get(endpoint)
+    if path is None:
+        for route in scope["app"].router.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                path = route.path
+                break
+        path = _route_paths[endpoint] = path or getattr(endpoint, "__name__", "unknown")
+    return path
+
+
+def current_route() -> str:
+    """Route template of the request being handled, or "background" outside requests"""
+    scope = _request_scope.get()
+    return route_template(scope) if scope is not None else "background"
+
+
+def current_path_param(name: str) -> Optional[str]:
+    """Path parameter of the request being handled (e.g. user_id), if any"""
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    value = scope.get("path_params", {}).get(name)
+    return str(value) if value is not None else None
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Attach a stage duration to the current request, or export it directly outside a request"""
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+    elif settings.METRICS_ENABLED:
+        metrics.observe_stage("background", stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a block of code as a named stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def traced(stage: str) -> Callable:
+    """Decorator form of span() for sync functions"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Time every ORM commit, wherever it happens
+@event.listens_for(Session, "before_commit")
+def _before_commit(session: Session) -> None:
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        record_stage("db.commit", time.perf_counter() - started)
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """Time each request and export its stage spans labelled by route template"""
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        # Usage accounting reads the route and user from the scope even with metrics off
+        scope_token = _request_scope.set(request.scope)
+        try:
+            if not settings.METRICS_ENABLED or request.url.path == "/metrics":
+                return await call_next(request)
+            return await self._timed(request, call_next)
+        finally:
+            _request_scope.reset(scope_token)
+
+    async def _timed(self, request: Request, call_next) -> Response:
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_spans.reset(token)
+            route = route_template(request.scope)
+            metrics.observe_request(request.method, route, status, elapsed)
+            for stage, seconds in spans:
+                metrics.observe_stage(route, stage, seconds)
+
+            if elapsed * 1000 >= settings.SLOW_REQUEST_LOG_MS:
+                breakdown = {}
+                for stage, seconds in spans:
+                    breakdown[stage] = breakdown.get(stage, 0.0) + seconds
+                logger.warning(
+                    "Slow request %s %s took %.0fms",
+                    request.method, route, elapsed * 1000,
+                    extra={"stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in breakdown.items()}}
+                )
+
+
+def metrics_response() -> Response:
+    """Prometheus exposition for the /metrics endpoint"""
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE_LATEST)
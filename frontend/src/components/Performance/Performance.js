@@ -1391,6 +1391,9 @@ function EmployeeView({ feedbacks, loading, showAIAnalysis, setShowAIAnalysis, o
 
 // Personal Goals Section Component
 function PersonalGoalsSection({ currentUserId, chartData, setChartData, goals, setGoals, loadingGoals }) {
+  const [progressUpdate, setProgressUpdate] = useState('');
+  const [isUpdating, setIsUpdating] = useState(false);
+  const [insight, setInsight] = useState('');
 
   // Update chart data when goals change - group by category
   useEffect(() => {
@@ -1467,6 +1470,63 @@ function PersonalGoalsSection({ currentUserId, chartData, setChartData, goals, s
     }
   };
 
+  // Post a free-text progress note; the server answers at once with a quick estimate
+  const handleProgressUpdate = async () => {
+    if (!progressUpdate.trim()) return;
+
+    setIsUpdating(true);
+
+    try {
+      const response = await fetch(buildApiUrl(`/api/progress/update/${currentUserId}`), {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          progress_text: progressUpdate,
+          current_goals: goals
+        }),
+      });
+
+      if (response.ok) {
+        const result = await response.json();
+        if (result.insight) {
+          setInsight(result.insight);
+        }
+        setProgressUpdate('');
+
+        // The AI analysis runs as a background job and arrives as a server-sent event.
+        // Only its insight is applied: goals here are tracked by the checkboxes above.
+        if (result.job_id) {
+          const events = new EventSource(buildApiUrl(`/api/progress/jobs/${result.job_id}/events`));
+          events.addEventListener('done', (event) => {
+            const job = JSON.parse(event.data);
+            if (job.result && job.result.insight) {
+              setInsight(job.result.insight);
+            }
+            events.close();
+          });
+          events.addEventListener('fallback', () => events.close());
+          events.addEventListener('timeout', () => events.close());
+          events.onerror = () => events.close();
+        }
+      } else {
+        console.error('Failed to update progress');
+      }
+    } catch (err) {
+      console.error('Error updating progress:', err);
+    } finally {
+      setIsUpdating(false);
+    }
+  };
+
+  const handleProgressKeyPress = (e) => {
+    if (e.key === 'Enter' && !e.shiftKey) {
+      e.preventDefault();
+      handleProgressUpdate();
+    }
+  };
+
 
 
 
@@ -1596,6 +1656,43 @@ function PersonalGoalsSection({ currentUserId, chartData, setChartData, goals, s
           </div>
         </div>
       </div>
+
+      {/* AI Insight */}
+      {insight && (
+        <div className="insight-container">
+          <div className="insight-header">
+            <span className="insight-icon">💡</span>
+            <h4>AI Insight</h4>
+          </div>
+          <p className="insight-text">{insight}</p>
+        </div>
+      )}
+
+      {/* Progress Update Input */}
+      <div className="progress-update-section">
+        <label htmlFor="progress-update" className="update-label">
+          Update your progress
+        </label>
+        <div className="update-input-container">
+          <textarea
+            id="progress-update"
+            value={progressUpdate}
+            onChange={(e) => setProgressUpdate(e.target.value)}
+            onKeyPress={handleProgressKeyPress}
+            placeholder="I finished my first training course..."
+            className="progress-update-input"
+            rows={3}
+            disabled={isUpdating}
+          />
+          <button
+            onClick={handleProgressUpdate}
+            disabled={isUpdating || !progressUpdate.trim()}
+            className="update-btn"
+          >
+            {isUpdating ? 'Updating...' : 'Update'}
+          </button>
+        </div>
+      </div>
     </div>
   );
 }